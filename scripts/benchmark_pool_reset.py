@@ -0,0 +1,87 @@
+"""
+Benchmark: per-request latency of pooled checkouts with and without
+session reset.
+
+Simulates the hot read path (several checkouts per request, one cheap
+query each) against the database configured in .env, once the way the
+old MySQLConnectionPool behaved (ping on every checkout, session reset
+on every return) and once with reset_mode="dirty" and idle-only pings.
+
+Usage (from the repository root):
+    python scripts/benchmark_pool_reset.py --requests 500 --checkouts 4
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.main.python.utils.database import DatabaseConfig  # noqa: E402
+from src.main.python.utils.db_pool import (  # noqa: E402
+    ElasticConnectionPool, RESET_ALWAYS, RESET_DIRTY
+)
+
+
+def run(reset_mode: str, ping_interval: float, requests: int, checkouts: int) -> list:
+    pool = ElasticConnectionPool(
+        pool_name=f"bench_{reset_mode}",
+        pool_size=1,
+        max_overflow=0,
+        reset_mode=reset_mode,
+        ping_interval=ping_interval,
+        host=DatabaseConfig.HOST,
+        port=DatabaseConfig.PORT,
+        user=DatabaseConfig.USER,
+        password=DatabaseConfig.PASSWORD,
+        database=DatabaseConfig.DATABASE,
+    )
+    pool.warmup(1)
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        for _ in range(checkouts):
+            conn = pool.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            conn.commit()
+            conn.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    pool.close_idle()
+    return latencies
+
+
+def summarize(label: str, latencies: list) -> float:
+    ordered = sorted(latencies)
+    mean = statistics.mean(ordered)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<9} mean={mean:.3f}ms  p50={p50:.3f}ms  p95={p95:.3f}ms")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--checkouts", type=int, default=4,
+                        help="connection checkouts per simulated request")
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests x {args.checkouts} checkouts "
+          f"against {DatabaseConfig.HOST}:{DatabaseConfig.PORT}")
+    always = summarize("baseline", run(RESET_ALWAYS, 0, args.requests, args.checkouts))
+    dirty = summarize(RESET_DIRTY, run(
+        RESET_DIRTY, DatabaseConfig.POOL_PING_INTERVAL, args.requests, args.checkouts
+    ))
+    print(f"saved     {always - dirty:.3f}ms per request "
+          f"({(always - dirty) / always * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
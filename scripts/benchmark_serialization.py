@@ -0,0 +1,104 @@
+"""
+Benchmark: building and serializing a page of opinions from DB rows.
+
+Renders a 100-item OpinionList from synthetic rows shaped like the
+list query's (Decimal coordinates, datetimes, 0/1 BOOLEANs, media and
+tags), once the old way (validate every row, model_dump_json) and once
+with utils.serialization (trusted() + orjson). No database is needed.
+
+Usage (from the repository root):
+    python scripts/benchmark_serialization.py --items 100 --rounds 500
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.main.python.models.opinion import OpinionList, OpinionWithUser  # noqa: E402
+from src.main.python.utils.serialization import dump_json, trusted  # noqa: E402
+
+
+def make_rows(items: int) -> list:
+    created = datetime(2024, 1, 1, 8, 0, 0)
+    return [
+        {
+            "id": i, "user_id": i % 17 + 1, "title": f"Opinion title number {i}",
+            "content": "Street lights on the corner have been out for a week. " * 4,
+            "category_id": i % 5 + 1, "category_name": "Transport", "region": "Da'an",
+            "latitude": Decimal("25.03300000") + Decimal(i) / 10000,
+            "longitude": Decimal("121.56540000"), "is_public": 1, "status": "approved",
+            "view_count": i * 3, "merged_to_id": None, "hot_score": 0.0,
+            "created_at": created + timedelta(minutes=i), "updated_at": created + timedelta(hours=i),
+            "auto_moderation_status": "approved", "auto_moderation_score": Decimal("0.12"),
+            "auto_category_id": None, "moderation_reason": None, "needs_manual_review": 0,
+            "reviewed_by": None, "reviewed_at": None,
+            "upvotes": i % 7, "downvotes": i % 3, "comment_count": i % 4,
+            "username": f"citizen{i}", "user_full_name": None,
+            "tags": ["lighting", "safety"],
+            "media": [{
+                "id": i, "opinion_id": i, "media_type": "image", "file_path": f"/uploads/{i}.jpg",
+                "file_size": 204800, "mime_type": "image/jpeg", "created_at": created,
+            }],
+        }
+        for i in range(1, items + 1)
+    ]
+
+
+def page(items: list) -> OpinionList:
+    return OpinionList(
+        total=len(items), total_estimated=False, has_more=False,
+        page=1, page_size=len(items), items=items, next_cursor=None
+    )
+
+
+def validated(rows: list) -> bytes:
+    return page([OpinionWithUser(**row) for row in rows]).model_dump_json().encode()
+
+
+def fast(rows: list) -> bytes:
+    return dump_json(page([trusted(OpinionWithUser, row) for row in rows]))
+
+
+def run(render, rows: list, rounds: int) -> list:
+    latencies = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        render(rows)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summarize(label: str, latencies: list) -> float:
+    ordered = sorted(latencies)
+    mean = statistics.mean(ordered)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<9} mean={mean:.3f}ms  p50={p50:.3f}ms  p95={p95:.3f}ms")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = make_rows(args.items)
+    if fast(rows) != validated(rows):
+        sys.exit("fast path output differs from Pydantic's")
+
+    print(f"{args.rounds} renders of a {args.items}-item OpinionList")
+    baseline = summarize("baseline", run(validated, rows, args.rounds))
+    trusted_mean = summarize("fast", run(fast, rows, args.rounds))
+    print(f"saved     {baseline - trusted_mean:.3f}ms per page "
+          f"({(baseline - trusted_mean) / baseline * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
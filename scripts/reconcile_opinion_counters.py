@@ -0,0 +1,35 @@
+"""
+Repair drift in the denormalized opinion counters (upvotes, downvotes,
+comment_count) by recomputing them from votes and comments.
+
+The app runs the same job every COUNTER_RECONCILE_INTERVAL seconds in
+one worker (see BACKGROUND_JOBS_LEADER); use this script after bulk
+imports or manual data fixes, or from cron with BACKGROUND_JOBS_LEADER=never.
+Caches of running app processes expire within their TTL.
+
+Usage (from the repository root):
+    python scripts/reconcile_opinion_counters.py --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.main.python.services.opinion_service import OpinionService  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="opinions recomputed per transaction")
+    args = parser.parse_args()
+
+    repaired = asyncio.run(OpinionService.reconcile_counters(args.batch_size))
+    print(f"{repaired} opinions corrected")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,12 @@ from typing import Optional
 from ..models.user import User, UserCreate, UserLogin, Token
 from ..services.auth_service import AuthService
 from ..utils.security import get_user_from_token
+from ..utils.database import bind_request_user
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 # 根據 JWT token 獲取當前用戶的資料
-def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     """Dependency to get current user from JWT token"""
     if not authorization:
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -27,13 +28,23 @@ def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     if not user_data:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    # async dependency: runs in the request's context, so the binding is
+    # visible to the database layer (read-your-writes routing)
+    bind_request_user(user_data["user_id"])
     return user_data
 
+# 可匿名存取的路由使用: 未帶 token 時為 None
+async def get_current_user_optional(authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    """Dependency for routes open to anonymous callers (None without a token)"""
+    if not authorization:
+        return None
+    return await get_current_user(authorization)
+
 # 使用username或是email註冊新用戶
 @router.post("/register", response_model=User, status_code=201)
 async def register(user_data: UserCreate):
     """Register a new user"""
-    user = AuthService.create_user(user_data)
+    user = await AuthService.create_user(user_data)
 
     if not user:
         raise HTTPException(
@@ -47,7 +58,7 @@ async def register(user_data: UserCreate):
 @router.post("/login", response_model=Token)
 async def login(login_data: UserLogin):
     """Login user and get JWT token"""
-    token = AuthService.login(login_data)
+    token = await AuthService.login(login_data)
 
     if not token:
         raise HTTPException(
@@ -63,7 +74,7 @@ async def login(login_data: UserLogin):
 @router.get("/me", response_model=User)
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current user information"""
-    user = AuthService.get_user_by_id(current_user["user_id"])
+    user = await AuthService.get_user_by_id(current_user["user_id"])
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -2,43 +2,56 @@
 Category API routes
 """
 
-from fastapi import APIRouter, HTTPException
-from ..utils.database import get_db_cursor
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header
+from ..utils.database import get_async_db_read_cursor
+from ..utils.category_cache import category_cache
+from ..utils.etag import conditional_json, render_json
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @router.get("")
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(None)):
     """Get all categories"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT id, name, description, created_at
-            FROM categories
-            ORDER BY name
-        """)
-
-        categories = cursor.fetchall()
-
-        return {
+    rendered = category_cache.get("all")
+    if rendered is None:
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, name, description, created_at
+                FROM categories
+                ORDER BY name
+            """)
+
+            categories = await cursor.fetchall()
+
+        rendered = render_json({
             "categories": categories,
             "total": len(categories)
-        }
+        })
+        category_cache.set("all", rendered)
+
+    return conditional_json(rendered, if_none_match)
 
 
 @router.get("/{category_id}")
-async def get_category(category_id: int):
+async def get_category(category_id: int, if_none_match: Optional[str] = Header(None)):
     """Get category by ID"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT id, name, description, created_at
-            FROM categories
-            WHERE id = %s
-        """, (category_id,))
+    rendered = category_cache.get(category_id)
+    if rendered is None:
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute("""
+                SELECT id, name, description, created_at
+                FROM categories
+                WHERE id = %s
+            """, (category_id,))
 
-        category = cursor.fetchone()
+            category = await cursor.fetchone()
 
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
 
-        return category
+        rendered = render_json(category)
+        category_cache.set(category_id, rendered)
+
+    return conditional_json(rendered, if_none_match)
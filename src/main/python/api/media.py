@@ -25,11 +25,13 @@ ALLOWED_AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg", ".m4a", ".aac"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB for images
 
-# Create upload directories
-(UPLOAD_DIR / "images").mkdir(parents=True, exist_ok=True)
-(UPLOAD_DIR / "videos").mkdir(parents=True, exist_ok=True)
-(UPLOAD_DIR / "audio").mkdir(parents=True, exist_ok=True)
-(UPLOAD_DIR / "thumbnails").mkdir(parents=True, exist_ok=True)
+UPLOAD_SUBDIRS = ("images", "videos", "audio", "thumbnails")
+
+
+def ensure_upload_dirs():
+    """Create upload directories (called at startup, not at import)"""
+    for subdir in UPLOAD_SUBDIRS:
+        (UPLOAD_DIR / subdir).mkdir(parents=True, exist_ok=True)
 
 
 def get_media_type(filename: str) -> MediaType:
@@ -137,6 +139,7 @@ async def upload_media(
         save_dir = UPLOAD_DIR / "audio"
 
     file_path = save_dir / unique_filename
+    ensure_upload_dirs()
 
     # Save file
     try:
@@ -3,13 +3,21 @@ Moderation API routes (admin only)
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 from ..services.moderation_service import ModerationService
+from ..services.opinion_service import OpinionService, EXPORT_COLUMNS
+from ..models.opinion import OpinionStatus
 from ..models.user import UserRole
 from ..api.auth import get_current_user
 from ..models.opinion_history import OpinionHistoryList
+from ..utils.totals import TOTAL_EXACT, TOTAL_MODE_PATTERN
+from ..utils.export import (
+    EXPORT_CSV, EXPORT_FORMAT_PATTERN, EXPORT_MEDIA_TYPES, EXPORT_NDJSON,
+    csv_header, to_csv, to_ndjson
+)
 
 router = APIRouter(prefix="/admin", tags=["Moderation"])
 
@@ -37,7 +45,7 @@ async def get_dashboard_stats(
     moderator: dict = Depends(require_moderator)
 ):
     """Get dashboard statistics"""
-    stats = ModerationService.get_dashboard_stats()
+    stats = await ModerationService.get_dashboard_stats()
     return stats
 
 @router.post("/opinions/{opinion_id}/approve", status_code=200)
@@ -46,7 +54,7 @@ async def approve_opinion(
     moderator: dict = Depends(require_moderator)
 ):
     """Approve an opinion"""
-    success = ModerationService.approve_opinion(opinion_id, moderator["user_id"])
+    success = await ModerationService.approve_opinion(opinion_id, moderator["user_id"])
 
     if not success:
         raise HTTPException(status_code=400, detail="Failed to approve opinion")
@@ -62,7 +70,7 @@ async def reject_opinion(
 ):
     
     """Reject an opinion"""
-    success = ModerationService.reject_opinion(
+    success = await ModerationService.reject_opinion(
         opinion_id, moderator["user_id"], request.reason
     )
 
@@ -79,7 +87,7 @@ async def merge_opinions(
     moderator: dict = Depends(require_moderator)
 ):
     """Merge opinion into another"""
-    success = ModerationService.merge_opinions(
+    success = await ModerationService.merge_opinions(
         opinion_id, request.target_id, moderator["user_id"]
     )
 
@@ -95,7 +103,7 @@ async def delete_comment(
     moderator: dict = Depends(require_moderator)
 ):
     """Delete a comment"""
-    success = ModerationService.delete_comment(comment_id, moderator["user_id"])
+    success = await ModerationService.delete_comment(comment_id, moderator["user_id"])
 
     if not success:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -110,7 +118,7 @@ async def update_opinion_category(
     moderator: dict = Depends(require_moderator)
 ):
     """Update opinion category"""
-    success = ModerationService.update_opinion_category(
+    success = await ModerationService.update_opinion_category(
         opinion_id, request.category_id, moderator["user_id"]
     )
 
@@ -121,22 +129,49 @@ async def update_opinion_category(
 
 
 @router.get("/history", response_model=OpinionHistoryList)
-def get_history(
+async def get_history(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     opinion_id: Optional[int] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
+    total_mode: str = Query(TOTAL_EXACT, pattern=TOTAL_MODE_PATTERN),
     moderator: dict = Depends(require_moderator)
 ) -> OpinionHistoryList:
     """Get moderation history with optional filters"""
-    total = ModerationService.get_moderation_history(
+    total = await ModerationService.get_moderation_history(
         page=page,
         page_size=page_size,
         opinion_id=opinion_id,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        total_mode=total_mode
     )
 
     return total
-    
\ No newline at end of file
+    
+
+
+@router.get("/opinions/export")
+async def export_opinions(
+    export_format: str = Query(EXPORT_NDJSON, alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    status: Optional[OpinionStatus] = None,
+    category_id: Optional[int] = None,
+    include_private: bool = False,
+    moderator: dict = Depends(require_moderator)
+):
+    """Stream every matching opinion as NDJSON or CSV (constant memory)"""
+    async def body():
+        if export_format == EXPORT_CSV:
+            yield csv_header(EXPORT_COLUMNS)
+        async for rows in OpinionService.export_opinions(status, category_id, include_private):
+            if export_format == EXPORT_CSV:
+                yield to_csv(rows, EXPORT_COLUMNS)
+            else:
+                yield to_ndjson(rows)
+
+    filename = f"opinions-{datetime.now():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        body(), media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -7,6 +7,7 @@ from typing import List
 from ..models.notification import Notification
 from ..services.notification_service import NotificationService
 from ..api.auth import get_current_user
+from ..utils.serialization import FastJSONResponse
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
@@ -17,10 +18,10 @@ async def get_notifications(
     current_user: dict = Depends(get_current_user)
 ):
     """Get user's notifications"""
-    return NotificationService.get_user_notifications(
+    return FastJSONResponse(await NotificationService.get_user_notifications(
         current_user["user_id"],
         unread_only
-    )
+    ))
 
 
 @router.post("/{notification_id}/read", status_code=200)
@@ -29,7 +30,7 @@ async def mark_notification_read(
     current_user: dict = Depends(get_current_user)
 ):
     """Mark notification as read"""
-    success = NotificationService.mark_as_read(notification_id, current_user["user_id"])
+    success = await NotificationService.mark_as_read(notification_id, current_user["user_id"])
 
     if not success:
         raise HTTPException(status_code=404, detail="Notification not found")
@@ -2,15 +2,27 @@
 Opinion API routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks
-from typing import Optional, List
-
-from ..models.opinion import Opinion, OpinionCreate, OpinionList, OpinionStatus, OpinionWithUser
+from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from datetime import date
+from typing import Optional, List, Union
+
+from ..models.opinion import (
+    Opinion, OpinionCreate, OpinionList, OpinionStatus, OpinionWithUser, NearbyOpinionList,
+    OpinionClusterList, OpinionCardList
+)
 from ..models.comment import Comment, CommentCreate
 from ..models.vote import VoteCreate
-from ..services.opinion_service import OpinionService
+from ..services.opinion_service import OpinionService, BATCH_MAX_IDS, parse_list_fields
+from ..services.map_service import MapService
 from ..services.ai_content_moderation_service import AIContentModerationService
-from ..api.auth import get_current_user
+from ..api.auth import get_current_user, get_current_user_optional
+from ..utils.database import db_unit_of_work
+from ..utils.pagination import InvalidCursorError
+from ..utils.totals import TOTAL_EXACT, TOTAL_MODE_PATTERN
+from ..utils.etag import etag_matches, not_modified
+from ..utils.opinion_cache import detail_etag
+from ..utils.serialization import FastJSONResponse
 import threading
 
 router = APIRouter(prefix="/opinions", tags=["Opinions"])
@@ -27,14 +39,14 @@ async def create_opinion(
     print("DEBUG current_user:", current_user)
 
     # 創建意見
-    opinion = OpinionService.create_opinion(current_user["user_id"], opinion_data)
+    opinion = await OpinionService.create_opinion(current_user["user_id"], opinion_data)
 
     if not opinion:
         raise HTTPException(status_code=400, detail="Failed to create opinion")
 
     # 檢查是否啟用AI審核
-    ai_moderation_enabled = AIContentModerationService._get_config(
-        'ai_moderation_enabled', 'true'
+    ai_moderation_enabled = await run_in_threadpool(
+        AIContentModerationService._get_config, 'ai_moderation_enabled', 'true'
     ) == 'true'
 
     if ai_moderation_enabled:
@@ -59,55 +71,169 @@ async def create_opinion(
     return opinion
 
 
-@router.get("", response_model=OpinionList)
+# Items are full opinions by default, cards (or only the selected card
+# fields) with `fields=`
+@router.get("", response_model=Union[OpinionList, OpinionCardList])
 async def get_opinions(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     status: Optional[OpinionStatus] = None,
     category_id: Optional[int] = None,
-    sort_by: Optional[str] = None
+    sort_by: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    total_mode: str = Query(TOTAL_EXACT, pattern=TOTAL_MODE_PATTERN),
+    fields: Optional[str] = Query(
+        None, description="full (default), card, or comma-separated OpinionCard fields"
+    ),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get paginated list of opinions"""
-    return OpinionService.get_opinions(page, page_size, status, category_id, sort_by)
+    """Get paginated list of opinions (page/page_size, or cursor for infinite scroll)"""
+    try:
+        page_entry, hit = await OpinionService.get_opinions_page(
+            page, page_size, status, category_id, sort_by, cursor, total_mode,
+            parse_list_fields(fields)
+        )
+    except ValueError as e:
+        # InvalidCursorError or unknown field names
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Cached pages are already serialized OpinionList/OpinionCardList JSON
+    cache_header = {"X-Cache": "HIT" if hit else "MISS"}
+    if etag_matches(if_none_match, page_entry.etag):
+        return not_modified(page_entry.etag, cache_header)
+    return Response(
+        content=page_entry.body, media_type="application/json",
+        headers={**cache_header, "ETag": page_entry.etag}
+    )
 
 #固定路徑要放在參數路徑前面，否則會被當成參數處理
+@router.get("/search", response_model=OpinionList)
+async def search_opinions(
+    q: str = Query(..., min_length=2, max_length=100, description="Search text (title and content)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    status: Optional[OpinionStatus] = None,
+    category_id: Optional[int] = None,
+    region: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    total_mode: str = Query(TOTAL_EXACT, pattern=TOTAL_MODE_PATTERN)
+):
+    """Search public opinions by relevance, with optional filters"""
+    try:
+        return FastJSONResponse(await OpinionService.search_opinions(
+            q.strip(), page, page_size, status, category_id, region,
+            date_from, date_to, cursor, total_mode
+        ))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/nearby", response_model=NearbyOpinionList)
+async def get_nearby_opinions(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(1000, gt=0, le=50000, description="Search radius in meters"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lng: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lng: Optional[float] = Query(None, ge=-180, le=180),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    status: Optional[OpinionStatus] = None,
+    category_id: Optional[int] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    total_mode: str = Query(TOTAL_EXACT, pattern=TOTAL_MODE_PATTERN)
+):
+    """Get public opinions closest to a point, within a radius or a bounding box (map view)"""
+    bbox = (min_lat, min_lng, max_lat, max_lng)
+    if all(v is None for v in bbox):
+        bbox = None
+    elif any(v is None for v in bbox) or min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(
+            status_code=400,
+            detail="min_lat, min_lng, max_lat and max_lng must be given together with min <= max"
+        )
+
+    try:
+        return FastJSONResponse(await OpinionService.get_nearby_opinions(
+            lat, lng, radius_m, bbox, page, page_size, status, category_id, cursor, total_mode
+        ))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/clusters", response_model=OpinionClusterList)
+async def get_opinion_clusters(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22, description="Map zoom level"),
+    status: Optional[OpinionStatus] = None,
+    category_id: Optional[int] = None
+):
+    """Get opinion counts per map cell for the visible area (marker clustering)"""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="min_lat/min_lng must not exceed max_lat/max_lng")
+
+    return await MapService.get_clusters(
+        min_lat, min_lng, max_lat, max_lng, zoom, status, category_id
+    )
+
 @router.get("/collect", response_model=OpinionList)
 async def get_bookmarked_opinions(
     page: int = Query(1, ge=1),
     page_size: int = Query(5, ge=1, le=50),
+    total_mode: str = Query(TOTAL_EXACT, pattern=TOTAL_MODE_PATTERN),
     current_user: dict = Depends(get_current_user)
 ):
     """Get paginated list of opinions bookmarked by current user"""
-    return OpinionService.get_bookmarked_opinions(
+    return FastJSONResponse(await OpinionService.get_bookmarked_opinions(
         user_id=current_user["user_id"],
         page=page,
-        page_size=page_size
-    )
+        page_size=page_size,
+        total_mode=total_mode
+    ))
+
+@router.get("/batch", response_model=List[OpinionWithUser])
+async def get_opinions_batch(
+    ids: List[int] = Query([], description=f"Opinion ids (repeat the parameter), at most {BATCH_MAX_IDS}")
+):
+    """Get several opinions by id in the requested order (views are not counted)"""
+    if not ids or len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {BATCH_MAX_IDS} ids")
+    return FastJSONResponse(await OpinionService.get_opinions_by_ids(ids))
 
 @router.get("/{opinion_id}", response_model=OpinionWithUser)
-async def get_opinion(opinion_id: int):
+async def get_opinion(opinion_id: int, if_none_match: Optional[str] = Header(None)):
     """Get opinion by ID"""
-    opinion = OpinionService.get_opinion_by_id(opinion_id, increment_view=True)
+    opinion = await OpinionService.get_opinion_by_id(opinion_id, increment_view=True)
 
     if not opinion:
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    return opinion
+    etag = detail_etag(opinion)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return FastJSONResponse(opinion, headers={"ETag": etag})
 
 
-@router.post("/{opinion_id}/comments", response_model=Comment, status_code=201)
+@router.post(
+    "/{opinion_id}/comments", response_model=Comment, status_code=201,
+    dependencies=[Depends(db_unit_of_work)]
+)
 async def add_comment(
     opinion_id: int,
     comment_data: CommentCreate,
     current_user: dict = Depends(get_current_user)
 ):
     """Add a comment to an opinion"""
-    # Check if opinion exists
-    opinion = OpinionService.get_opinion_by_id(opinion_id)
-    if not opinion:
+    # Check if opinion exists and is visible to the caller
+    probe = await OpinionService.probe_opinion(opinion_id)
+    if not probe or not probe.visible_to(current_user["user_id"]):
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    comment = OpinionService.add_comment(opinion_id, current_user["user_id"], comment_data)
+    comment = await OpinionService.add_comment(opinion_id, current_user["user_id"], comment_data)
 
     if not comment:
         raise HTTPException(status_code=400, detail="Failed to add comment")
@@ -117,21 +243,26 @@ async def add_comment(
 @router.get("/{opinion_id}/comments", response_model=List[Comment])
 async def get_comments(
     opinion_id: int,
-    limit: int = Query(50, ge=1, le=500)
+    limit: int = Query(50, ge=1, le=500),
+    current_user: Optional[dict] = Depends(get_current_user_optional)
 ):
     """Get comments for an opinion with limit"""
 
-    # Check if opinion exists
-    opinion = OpinionService.get_opinion_by_id(opinion_id)
-    if not opinion:
+    # Check if opinion exists and is visible to the caller (anonymous
+    # callers only see public opinions)
+    probe = await OpinionService.probe_opinion(opinion_id)
+    if not probe or not probe.visible_to(current_user["user_id"] if current_user else None):
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    comments = OpinionService.get_comments_by_opinion_id(opinion_id, limit)
+    comments = await OpinionService.get_comments_by_opinion_id(opinion_id, limit)
 
-    return comments
+    return FastJSONResponse(comments)
 
 
-@router.post("/{opinion_id}/vote", status_code=200)
+@router.post(
+    "/{opinion_id}/vote", status_code=200,
+    dependencies=[Depends(db_unit_of_work)]
+)
 async def vote_opinion(
     opinion_id: int,
     vote_data: VoteCreate,
@@ -139,12 +270,12 @@ async def vote_opinion(
 ):
     print("DEBUG vote_data:", vote_data)
     """Vote on an opinion"""
-    # Check if opinion exists
-    opinion = OpinionService.get_opinion_by_id(opinion_id)
-    if not opinion:
+    # Check if opinion exists and is visible to the caller
+    probe = await OpinionService.probe_opinion(opinion_id)
+    if not probe or not probe.visible_to(current_user["user_id"]):
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    success = OpinionService.vote_opinion(opinion_id, current_user["user_id"], vote_data)
+    success = await OpinionService.vote_opinion(opinion_id, current_user["user_id"], vote_data)
 
     if not success:
         raise HTTPException(status_code=400, detail="Failed to vote")
@@ -154,18 +285,21 @@ async def vote_opinion(
 
 
 
-@router.post("/{opinion_id}/collect", status_code=200)
+@router.post(
+    "/{opinion_id}/collect", status_code=200,
+    dependencies=[Depends(db_unit_of_work)]
+)
 async def collect_opinion(
     opinion_id: int,
     current_user: dict = Depends(get_current_user)
 ):
     """Add opinion to collection"""
-    # Check if opinion exists
-    opinion = OpinionService.get_opinion_by_id(opinion_id)
-    if not opinion:
+    # Check if opinion exists and is visible to the caller
+    probe = await OpinionService.probe_opinion(opinion_id)
+    if not probe or not probe.visible_to(current_user["user_id"]):
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    success = OpinionService.collect_opinion(opinion_id, current_user["user_id"])
+    success = await OpinionService.collect_opinion(opinion_id, current_user["user_id"])
 
     if not success:
         raise HTTPException(status_code=400, detail="Failed to collect opinion")
@@ -178,12 +312,12 @@ async def get_collect_status(
     current_user: dict = Depends(get_current_user)
 ):
     """Check if current user has collected this opinion"""
-    # 確認意見存在
-    opinion = OpinionService.get_opinion_by_id(opinion_id)
-    if not opinion:
+    # 確認意見存在且可見
+    probe = await OpinionService.probe_opinion(opinion_id)
+    if not probe or not probe.visible_to(current_user["user_id"]):
         raise HTTPException(status_code=404, detail="Opinion not found")
 
-    is_collected = OpinionService.is_collected(opinion_id, current_user["user_id"])
+    is_collected = await OpinionService.is_collected(opinion_id, current_user["user_id"])
     return {"is_collected": is_collected}
 
 @router.delete("/{opinion_id}/collect", status_code=200)
@@ -192,7 +326,7 @@ async def uncollect_opinion(
     current_user: dict = Depends(get_current_user)
 ):
     """Remove opinion from collection"""
-    success = OpinionService.uncollect_opinion(opinion_id, current_user["user_id"])
+    success = await OpinionService.uncollect_opinion(opinion_id, current_user["user_id"])
 
     if not success:
         raise HTTPException(status_code=404, detail="Collection not found")
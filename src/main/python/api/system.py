@@ -0,0 +1,44 @@
+"""
+System diagnostics API routes (admin only)
+"""
+
+from fastapi import APIRouter, Depends, Query
+from ..api.moderation import require_moderator
+from ..utils.database import get_pool_stats
+from ..utils import query_stats
+from ..utils.totals import count_cache
+from ..utils.page_cache import page_cache
+from ..utils.opinion_cache import detail_cache, probe_cache, tag_id_cache
+from ..utils.category_cache import category_cache
+
+router = APIRouter(prefix="/admin/system", tags=["System"])
+
+
+@router.get("/db-pool", status_code=200)
+async def get_db_pool_stats(moderator: dict = Depends(require_moderator)):
+    """Get live database connection pool statistics"""
+    return get_pool_stats()
+
+
+@router.get("/caches", status_code=200)
+async def get_cache_stats(moderator: dict = Depends(require_moderator)):
+    """Get size and hit/miss counters of the in-process caches"""
+    return [
+        count_cache.stats(), page_cache.stats(), detail_cache.stats(),
+        probe_cache.stats(), tag_id_cache.stats(), category_cache.stats()
+    ]
+
+
+@router.get("/queries", status_code=200)
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=200),
+    moderator: dict = Depends(require_moderator)
+):
+    """Get per-fingerprint query timings, recent slow queries and N+1 detections"""
+    return query_stats.snapshot(limit)
+
+
+@router.delete("/queries", status_code=204)
+async def reset_query_stats(moderator: dict = Depends(require_moderator)):
+    """Clear collected query statistics"""
+    query_stats.reset()
@@ -2,16 +2,40 @@
 Main FastAPI application for Citizen Urban Planning Participation System
 """
 
-from fastapi import FastAPI
+import os
+import asyncio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 
 # 使用絕對導入以支持測試環境
 try:
     # 當作為模組導入時使用相對導入
-    from api import auth, opinions, notifications, moderation, media, categories
+    from api import auth, opinions, notifications, moderation, media, categories, system
+    from services.opinion_service import OpinionService
+    from services.map_service import MapService
+    from services.trending_service import TrendingService
+    from utils.db_pool import PoolTimeoutError
+    from utils import query_stats
+    from utils import leader
+    from utils.view_buffer import VIEW_FLUSH_INTERVAL
+    from utils.database import (
+        DatabaseConfig, init_connection_pool, close_connection_pool, ping_idle_connections
+    )
 except ImportError:
     # 當作為獨立腳本或測試時使用絕對導入
-    from ..api import auth, opinions, notifications, moderation, media, categories
+    from ..api import auth, opinions, notifications, moderation, media, categories, system
+    from ..services.opinion_service import OpinionService
+    from ..services.map_service import MapService
+    from ..services.trending_service import TrendingService
+    from ..utils.db_pool import PoolTimeoutError
+    from ..utils import query_stats
+    from ..utils import leader
+    from ..utils.view_buffer import VIEW_FLUSH_INTERVAL
+    from ..utils.database import (
+        DatabaseConfig, init_connection_pool, close_connection_pool, ping_idle_connections
+    )
 
 # Create FastAPI app
 app = FastAPI(
@@ -31,6 +55,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def track_request_queries(request: Request, call_next):
+    """Collect the SQL issued by each request to flag N+1 patterns"""
+    token = query_stats.begin_request(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        query_stats.end_request(token, DatabaseConfig.N_PLUS_ONE_THRESHOLD)
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(opinions.router)
@@ -38,6 +73,103 @@ app.include_router(categories.router)
 app.include_router(notifications.router)
 app.include_router(moderation.router)
 app.include_router(media.router)
+app.include_router(system.router)
+
+
+# Seconds between vote/comment counter reconciliation runs (0 = off)
+COUNTER_RECONCILE_INTERVAL = float(os.getenv("COUNTER_RECONCILE_INTERVAL", "3600"))
+# Seconds between full rebuilds of the map cluster aggregates (0 = off)
+MAP_CLUSTER_REBUILD_INTERVAL = float(os.getenv("MAP_CLUSTER_REBUILD_INTERVAL", "86400"))
+# Seconds between hot score decay refreshes (0 = off)
+HOT_SCORE_REFRESH_INTERVAL = float(os.getenv("HOT_SCORE_REFRESH_INTERVAL", "600"))
+
+# Periodic background jobs started with the app
+_background_tasks = []
+
+
+def _start_periodic_task(name: str, interval: float, func, leader_only: bool = False):
+    """
+    Run a job every `interval` seconds
+
+    Coroutine functions are awaited; blocking functions run in the
+    thread pool. `leader_only` jobs work on shared rows and are skipped
+    in every worker but the elected one (see utils.leader).
+    """
+    if interval <= 0:
+        return
+
+    async def runner():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if leader_only and not await run_in_threadpool(leader.is_leader):
+                    continue
+                if asyncio.iscoroutinefunction(func):
+                    await func()
+                else:
+                    await run_in_threadpool(func)
+            except Exception as e:
+                print(f"[Background] {name} failed: {e}")
+
+    _background_tasks.append(asyncio.create_task(runner(), name=name))
+
+
+@app.on_event("startup")
+async def on_startup():
+    """Prepare resources that used to be created at import time"""
+    media.ensure_upload_dirs()
+    try:
+        opened = await run_in_threadpool(init_connection_pool)
+        if opened:
+            print(f"[DB] Connection pool warmed up with {opened} connections")
+    except Exception as e:
+        # Let the app boot anyway; requests will retry on first checkout
+        print(f"[DB] Connection pool warm-up failed: {e}")
+
+    _start_periodic_task(
+        "db-pool-ping", DatabaseConfig.POOL_PING_INTERVAL, ping_idle_connections
+    )
+    _start_periodic_task(
+        "opinion-counter-reconcile", COUNTER_RECONCILE_INTERVAL, OpinionService.reconcile_counters,
+        leader_only=True
+    )
+    _start_periodic_task(
+        "opinion-view-flush", VIEW_FLUSH_INTERVAL, OpinionService.flush_view_counts
+    )
+    _start_periodic_task(
+        "map-cluster-rebuild", MAP_CLUSTER_REBUILD_INTERVAL, MapService.rebuild_clusters,
+        leader_only=True
+    )
+    _start_periodic_task(
+        "hot-score-refresh", HOT_SCORE_REFRESH_INTERVAL, TrendingService.refresh_scores,
+        leader_only=True
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Stop background jobs and release pooled connections"""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    # Buffered views would be lost with the process
+    try:
+        await OpinionService.flush_view_counts()
+    except Exception as e:
+        print(f"[Views] Final view count flush failed: {e}")
+    await run_in_threadpool(leader.release_leadership)
+    await run_in_threadpool(close_connection_pool)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """Database pool exhausted: ask the client to retry instead of a 500"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
 
 
 @app.get("/")
@@ -137,7 +137,86 @@ class OpinionWithUser(Opinion):
 
 class OpinionList(BaseModel):
     """Paginated opinion list"""
-    total: int
+    # None when requested with total_mode=none
+    total: Optional[int] = None
+    # True when total is the optimizer's estimate (total_mode=estimate)
+    total_estimated: bool = False
+    has_more: bool = False
     page: int
     page_size: int
     items: List[OpinionWithUser]
+    # Opaque token for the next page (keyset pagination); None on the last page
+    next_cursor: Optional[str] = None
+
+
+class OpinionCard(BaseModel):
+    """
+    Opinion as shown in the list feed
+
+    Only the requested fields (`fields=`) are present in the response.
+    The default card carries a truncated `snippet` instead of `content`.
+    """
+    id: int
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+    content: Optional[str] = None
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+    region: Optional[str] = None
+    latitude: Optional[Decimal] = None
+    longitude: Optional[Decimal] = None
+    is_public: Optional[bool] = None
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    user_full_name: Optional[str] = None
+    status: Optional[OpinionStatus] = None
+    view_count: Optional[int] = None
+    merged_to_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    auto_moderation_status: Optional[AutoModerationStatus] = None
+    auto_moderation_score: Optional[Decimal] = None
+    auto_category_id: Optional[int] = None
+    moderation_reason: Optional[str] = None
+    needs_manual_review: Optional[bool] = None
+    reviewed_by: Optional[int] = None
+    reviewed_at: Optional[datetime] = None
+    media: Optional[List[OpinionMedia]] = None
+    tags: Optional[List[str]] = None
+    upvotes: Optional[int] = None
+    downvotes: Optional[int] = None
+    comment_count: Optional[int] = None
+
+
+class OpinionCardList(OpinionList):
+    """Paginated opinion feed of cards (see OpinionCard)"""
+    items: List[OpinionCard]
+
+
+class NearbyOpinion(OpinionWithUser):
+    """Opinion with its distance from the searched point"""
+    distance_m: float
+
+
+class NearbyOpinionList(OpinionList):
+    """Paginated opinions ordered by distance"""
+    items: List[NearbyOpinion]
+
+
+class OpinionCluster(BaseModel):
+    """Public opinions of one geohash cell on the map"""
+    cell: str
+    count: int
+    # Mean position of the opinions in the cell
+    latitude: float
+    longitude: float
+    # Most recent opinions of the cell (at most one per status/category)
+    opinion_ids: List[int] = Field(default_factory=list)
+
+
+class OpinionClusterList(BaseModel):
+    """Map clusters for a bounding box and zoom level"""
+    zoom: int
+    precision: int
+    total: int
+    clusters: List[OpinionCluster]
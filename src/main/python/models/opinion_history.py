@@ -27,7 +27,9 @@ class OpinionHistoryItem(BaseModel):
     created_at: datetime
 
 class OpinionHistoryList(BaseModel):
-    total: int
+    total: Optional[int] = None
+    total_estimated: bool = False
+    has_more: bool = False
     page: int
     page_size: int
     items: List[OpinionHistoryItem]
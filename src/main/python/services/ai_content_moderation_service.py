@@ -8,8 +8,11 @@ import json
 import time
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
-from ..utils.database import get_db_cursor
+from ..utils.database import get_db_cursor, get_async_db_cursor, after_commit
+from ..utils.totals import invalidate_totals
+from ..utils.opinion_cache import invalidate_opinion
 from ..services.moderation_service import ModerationService
+from ..services.map_service import MapService
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -593,7 +596,7 @@ class AIContentModerationService:
             return False
 
     @staticmethod
-    def update_opinion_moderation_status(
+    async def update_opinion_moderation_status(
         opinion_id: int,
         auto_moderation_status: str,
         auto_moderation_score: float,
@@ -609,10 +612,10 @@ class AIContentModerationService:
                 final_status = "pending"
             elif auto_moderation_status == "approved":
                 final_status = "approved"
-                ModerationService.approve_opinion(opinion_id, moderator_id=0)
+                await ModerationService.approve_opinion(opinion_id, moderator_id=0)
             elif auto_moderation_status == "rejected":
                 final_status = "rejected"
-                ModerationService.reject_opinion(opinion_id, reason=moderation_reason, moderator_id=0)
+                await ModerationService.reject_opinion(opinion_id, reason=moderation_reason, moderator_id=0)
             else:
                 final_status = "pending"
 
@@ -635,8 +638,9 @@ class AIContentModerationService:
                     WHERE id = %s
                 """
 
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (
+            async with get_async_db_cursor() as cursor:
+                before = await MapService.cell_state(cursor, opinion_id)
+                await cursor.execute(query, (
                     final_status,
                     auto_moderation_status,
                     auto_moderation_score,
@@ -646,6 +650,12 @@ class AIContentModerationService:
                     auto_category_id,
                     opinion_id
                 ))
+                after = await MapService.cell_state(cursor, opinion_id)
+                await MapService.move_opinion(cursor, opinion_id, before, after)
+                after_commit(lambda: invalidate_totals("opinions"))
+                after_commit(lambda: invalidate_opinion(
+                    opinion_id, enters=[(final_status, None)]
+                ))
 
                 return True
 
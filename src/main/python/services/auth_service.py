@@ -2,9 +2,10 @@
 Authentication service
 """
 
+import asyncio
 from typing import Optional
 from ..models.user import User, UserCreate, UserLogin, UserInDB, Token
-from ..utils.database import get_db_cursor
+from ..utils.database import get_async_db_cursor
 from ..utils.security import hash_password, verify_password, create_access_token
 
 
@@ -12,7 +13,7 @@ class AuthService:
     """Authentication service for user management"""
 
     @staticmethod
-    def create_user(user_data: UserCreate) -> Optional[User]:
+    async def create_user(user_data: UserCreate) -> Optional[User]:
         """
         Create a new user
 
@@ -22,7 +23,8 @@ class AuthService:
         Returns:
             Created user or None if username/email exists
         """
-        password_hash = hash_password(user_data.password)
+        # bcrypt is CPU bound, keep it off the event loop
+        password_hash = await asyncio.to_thread(hash_password, user_data.password)
 
         query = """
             INSERT INTO users (username, email, password_hash, full_name, role)
@@ -30,8 +32,8 @@ class AuthService:
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(
                     query,
                     (user_data.username, user_data.email, password_hash,
                      user_data.full_name, user_data.role.value)
@@ -40,12 +42,12 @@ class AuthService:
                 user_id = cursor.lastrowid
 
                 # Fetch the created user
-                cursor.execute(
+                await cursor.execute(
                     "SELECT id, username, email, full_name, role, is_active, created_at, updated_at "
                     "FROM users WHERE id = %s",
                     (user_id,)
                 )
-                user_row = cursor.fetchone()
+                user_row = await cursor.fetchone()
 
                 if user_row:
                     return User(**user_row)
@@ -55,7 +57,7 @@ class AuthService:
             return None
 
     @staticmethod
-    def authenticate_user(login_data: UserLogin) -> Optional[UserInDB]:
+    async def authenticate_user(login_data: UserLogin) -> Optional[UserInDB]:
         """
         Authenticate user with username and password
 
@@ -71,21 +73,23 @@ class AuthService:
             WHERE username = %s AND is_active = TRUE
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (login_data.username,))
-            user_row = cursor.fetchone()
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (login_data.username,))
+            user_row = await cursor.fetchone()
 
             if not user_row:
                 return None
 
             # Verify password
-            if not verify_password(login_data.password, user_row['password_hash']):
+            if not await asyncio.to_thread(
+                verify_password, login_data.password, user_row['password_hash']
+            ):
                 return None
 
             return UserInDB(**user_row)
 
     @staticmethod
-    def login(login_data: UserLogin) -> Optional[Token]:
+    async def login(login_data: UserLogin) -> Optional[Token]:
         """
         Login user and generate JWT token
 
@@ -95,7 +99,7 @@ class AuthService:
         Returns:
             JWT token or None if authentication fails
         """
-        user = AuthService.authenticate_user(login_data)
+        user = await AuthService.authenticate_user(login_data)
 
         if not user:
             return None
@@ -112,7 +116,7 @@ class AuthService:
         return Token(access_token=access_token, token_type="bearer")
 
     @staticmethod
-    def get_user_by_id(user_id: int) -> Optional[User]:
+    async def get_user_by_id(user_id: int) -> Optional[User]:
         """
         Get user by ID
 
@@ -128,9 +132,9 @@ class AuthService:
             WHERE id = %s
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (user_id,))
-            user_row = cursor.fetchone()
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (user_id,))
+            user_row = await cursor.fetchone()
 
             if user_row:
                 return User(**user_row)
@@ -138,7 +142,7 @@ class AuthService:
         return None
 
     @staticmethod
-    def get_user_by_username(username: str) -> Optional[User]:
+    async def get_user_by_username(username: str) -> Optional[User]:
         """
         Get user by username
 
@@ -154,9 +158,9 @@ class AuthService:
             WHERE username = %s
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (username,))
-            user_row = cursor.fetchone()
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (username,))
+            user_row = await cursor.fetchone()
 
             if user_row:
                 return User(**user_row)
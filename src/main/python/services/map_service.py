@@ -0,0 +1,220 @@
+"""
+Map service: per-cell opinion aggregates for marker clustering
+"""
+
+import os
+from typing import List, Optional, Tuple
+from ..models.opinion import OpinionCluster, OpinionClusterList, OpinionStatus
+from ..utils.database import get_async_db_cursor, get_async_db_read_cursor
+from ..utils.geo import GEOHASH_FIRST_CHARS, cell_count, covering_cells, precision_for_zoom
+
+
+# Finest precision kept in opinion_geo_cells (8 = ~38m x 19m cells)
+CLUSTER_MAX_PRECISION = 8
+# Clusters returned at most; the precision is lowered for huge boxes
+MAX_CLUSTERS = int(os.getenv("MAP_MAX_CLUSTERS", "2000"))
+
+# Statuses not shown on the map (a merged opinion is shown through its target)
+HIDDEN_STATUSES = ("merged",)
+
+# Columns of an opinion that decide which aggregates it counts in
+CELL_STATE_QUERY = """
+    SELECT status, category_id, latitude, longitude, geohash, is_public
+    FROM opinions WHERE id = %s FOR UPDATE
+"""
+
+# Adds (or, with negative values, removes) opinions to per-cell buckets.
+# latest_opinion_id keeps the newest opinion of a bucket; it is cleared
+# when that opinion leaves and refilled by the next one (or a rebuild).
+UPSERT_CELLS = """
+    INSERT INTO opinion_geo_cells
+        (precision_level, cell, category_id, status,
+         opinion_count, sum_lat, sum_lng, latest_opinion_id)
+    VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        opinion_count = opinion_count + VALUES(opinion_count),
+        sum_lat = sum_lat + VALUES(sum_lat),
+        sum_lng = sum_lng + VALUES(sum_lng),
+        latest_opinion_id = IF(
+            VALUES(opinion_count) < 0,
+            IF(latest_opinion_id = VALUES(latest_opinion_id), NULL, latest_opinion_id),
+            GREATEST(COALESCE(latest_opinion_id, 0), VALUES(latest_opinion_id))
+        )
+"""
+
+# Clear and recompute the buckets under a geohash prefix (LIKE pattern)
+# from opinions, one statement for all levels
+DELETE_CELLS = "DELETE FROM opinion_geo_cells WHERE cell LIKE %s"
+REBUILD_CELLS = """
+    INSERT INTO opinion_geo_cells
+        (precision_level, cell, category_id, status,
+         opinion_count, sum_lat, sum_lng, latest_opinion_id)
+    SELECT levels.p, LEFT(o.geohash, levels.p), COALESCE(o.category_id, 0), o.status,
+           COUNT(*), SUM(o.latitude), SUM(o.longitude), MAX(o.id)
+    FROM opinions o
+    JOIN (SELECT 1 AS p UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4
+          UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8) levels
+    WHERE o.is_public = TRUE AND o.geohash LIKE %s AND o.status <> 'merged'
+    GROUP BY levels.p, LEFT(o.geohash, levels.p), COALESCE(o.category_id, 0), o.status
+"""
+
+
+class MapService:
+    """Service for map clustering"""
+
+    @staticmethod
+    async def cell_state(cursor, opinion_id: int) -> Optional[dict]:
+        """
+        Lock an opinion's row and return the columns its aggregates
+        depend on (call before changing status or category)
+        """
+        await cursor.execute(CELL_STATE_QUERY, (opinion_id,))
+        return await cursor.fetchone()
+
+    @staticmethod
+    async def move_opinion(cursor, opinion_id: int,
+                           before: Optional[dict], after: Optional[dict]):
+        """
+        Move an opinion between per-cell aggregates in the caller's transaction
+
+        `before` / `after` hold status, category_id, latitude, longitude,
+        geohash and is_public (None for "not counted"). One statement
+        updates every precision level.
+        """
+        counted_before = MapService._counted(before)
+        counted_after = MapService._counted(after)
+        if counted_before and counted_after and MapService._bucket(before) == MapService._bucket(after):
+            return
+
+        rows = []
+        if counted_before:
+            rows += MapService._bucket_rows(opinion_id, before, -1)
+        if counted_after:
+            rows += MapService._bucket_rows(opinion_id, after, 1)
+        if not rows:
+            return
+
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows))
+        await cursor.execute(
+            UPSERT_CELLS.format(values=values),
+            [value for row in rows for value in row]
+        )
+
+    @staticmethod
+    def _counted(state: Optional[dict]) -> bool:
+        return (bool(state) and bool(state.get('is_public', True)) and bool(state.get('geohash'))
+                and MapService._status(state) not in HIDDEN_STATUSES)
+
+    @staticmethod
+    def _bucket(state: dict) -> Tuple:
+        return (state['geohash'], state.get('category_id') or 0, MapService._status(state))
+
+    @staticmethod
+    def _status(state: dict) -> str:
+        status = state['status']
+        return status.value if isinstance(status, OpinionStatus) else str(status)
+
+    @staticmethod
+    def _bucket_rows(opinion_id: int, state: dict, sign: int) -> List[Tuple]:
+        latitude = float(state['latitude']) * sign
+        longitude = float(state['longitude']) * sign
+        category_id = state.get('category_id') or 0
+        status = MapService._status(state)
+        return [
+            (precision, state['geohash'][:precision], category_id, status,
+             sign, latitude, longitude, opinion_id)
+            for precision in range(1, CLUSTER_MAX_PRECISION + 1)
+        ]
+
+    @staticmethod
+    async def get_clusters(min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                           zoom: int,
+                           status: Optional[OpinionStatus] = None,
+                           category_id: Optional[int] = None) -> OpinionClusterList:
+        """
+        Opinion counts per geohash cell inside a bounding box
+
+        Read from opinion_geo_cells (no scan of opinions), at the
+        precision matching `zoom`, lowered if the box would return more
+        than MAX_CLUSTERS cells.
+        """
+        precision = precision_for_zoom(zoom, CLUSTER_MAX_PRECISION)
+        while precision > 1 and cell_count(min_lat, min_lng, max_lat, max_lng, precision) > MAX_CLUSTERS:
+            precision -= 1
+
+        prefixes = covering_cells(min_lat, min_lng, max_lat, max_lng)
+        prefixes = [prefix[:precision] for prefix in prefixes]
+        prefixes = list(dict.fromkeys(prefixes))
+
+        where_clauses = [
+            "precision_level = %s",
+            "(" + " OR ".join(["cell LIKE %s"] * len(prefixes)) + ")",
+        ]
+        params = [precision] + [prefix + "%" for prefix in prefixes]
+
+        if status:
+            where_clauses.append("status = %s")
+            params.append(status.value)
+
+        if category_id:
+            where_clauses.append("category_id = %s")
+            params.append(category_id)
+
+        query = f"""
+            SELECT cell, SUM(opinion_count) AS count,
+                   SUM(sum_lat) / SUM(opinion_count) AS latitude,
+                   SUM(sum_lng) / SUM(opinion_count) AS longitude,
+                   GROUP_CONCAT(latest_opinion_id ORDER BY latest_opinion_id DESC) AS opinion_ids
+            FROM opinion_geo_cells
+            WHERE {" AND ".join(where_clauses)}
+            GROUP BY cell
+            HAVING SUM(opinion_count) > 0
+        """
+
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+
+        clusters = []
+        for row in rows:
+            latitude, longitude = float(row['latitude']), float(row['longitude'])
+            # Cells of the covering prefixes can reach past the box
+            if not (min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng):
+                continue
+            ids = row['opinion_ids'].split(",") if row['opinion_ids'] else []
+            clusters.append(OpinionCluster(
+                cell=row['cell'],
+                count=int(row['count']),
+                latitude=latitude,
+                longitude=longitude,
+                opinion_ids=[int(opinion_id) for opinion_id in ids]
+            ))
+
+        return OpinionClusterList(
+            zoom=zoom,
+            precision=precision,
+            total=sum(cluster.count for cluster in clusters),
+            clusters=clusters
+        )
+
+    @staticmethod
+    async def rebuild_clusters() -> int:
+        """
+        Recompute opinion_geo_cells from opinions
+
+        Repairs drift of the incremental updates and refills cleared
+        latest_opinion_id values. Works in 32 slices (first geohash
+        character), one short transaction each: INSERT ... SELECT takes
+        shared locks on the opinions it reads (idx_public_geohash range),
+        so writes to opinions in a slice wait only while that slice is
+        rebuilt, and the slice stays exact against them. Returns the
+        number of buckets written.
+        """
+        rebuilt = 0
+        for first_char in GEOHASH_FIRST_CHARS:
+            async with get_async_db_cursor(track_writes=False) as cursor:
+                await cursor.execute(DELETE_CELLS, (first_char + "%",))
+                await cursor.execute(REBUILD_CELLS, (first_char + "%",))
+                rebuilt += max(cursor.rowcount, 0)
+        print(f"[Map] Rebuilt {rebuilt} opinion cluster cells")
+        return rebuilt
@@ -7,32 +7,35 @@ from datetime import datetime
 from ..models.opinion import OpinionStatus
 from ..models.notification import NotificationCreate, NotificationType
 from ..models.opinion_history import OpinionHistoryList, OpinionHistoryItem
-from ..utils.database import get_db_cursor
+from ..utils.database import get_async_db_cursor, get_async_db_read_cursor, unit_of_work, after_commit
+from ..utils.totals import TOTAL_EXACT, fetch_total, invalidate_totals
+from ..utils.opinion_cache import invalidate_opinion
 from ..services.notification_service import NotificationService
+from ..services.map_service import MapService
 
 
 class ModerationService:
     """Service for content moderation"""
 
     @staticmethod
-    def approve_opinion(opinion_id: int, moderator_id: int) -> bool:
+    async def approve_opinion(opinion_id: int, moderator_id: int) -> bool:
         """Approve an opinion"""
-        return ModerationService._change_status(
+        return await ModerationService._change_status(
             opinion_id, moderator_id, OpinionStatus.APPROVED,
             "Opinion approved", "Your opinion has been approved and is now public"
         )
 
     @staticmethod
-    def reject_opinion(opinion_id: int, moderator_id: int, reason: str = "") -> bool:
+    async def reject_opinion(opinion_id: int, moderator_id: int, reason: str = "") -> bool:
         """Reject an opinion"""
         content = f"Your opinion has been rejected. Reason: {reason}" if reason else "Your opinion has been rejected"
-        return ModerationService._change_status(
+        return await ModerationService._change_status(
             opinion_id, moderator_id, OpinionStatus.REJECTED,
             "Opinion rejected", content
         )
 
     @staticmethod
-    def merge_opinions(source_id: int, target_id: int, moderator_id: int) -> bool:
+    async def merge_opinions(source_id: int, target_id: int, moderator_id: int) -> bool:
         """Merge source opinion into target opinion"""
         query = """
             UPDATE opinions
@@ -41,23 +44,29 @@ class ModerationService:
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (target_id, source_id))
+            async with get_async_db_cursor() as cursor:
+                before = await MapService.cell_state(cursor, source_id)
+                await cursor.execute(query, (target_id, source_id))
+                await MapService.move_opinion(cursor, source_id, before, None)
 
                 # Log history
-                cursor.execute(
+                await cursor.execute(
                     """INSERT INTO opinion_history (opinion_id, user_id, action, changes)
                        VALUES (%s, %s, 'merged', JSON_OBJECT('merged_to', %s))""",
                     (source_id, moderator_id, target_id)
                 )
+                after_commit(ModerationService._invalidate_list_totals)
+                after_commit(lambda: invalidate_opinion(
+                    source_id, enters=[("merged", None)]
+                ))
 
                 # Notify opinion owner (non-blocking)
-                cursor.execute("SELECT user_id FROM opinions WHERE id = %s", (source_id,))
-                owner = cursor.fetchone()
+                await cursor.execute("SELECT user_id FROM opinions WHERE id = %s", (source_id,))
+                owner = await cursor.fetchone()
 
                 if owner:
                     try:
-                        NotificationService.create_notification(
+                        await NotificationService.create_notification(
                             NotificationCreate(
                                 user_id=owner['user_id'],
                                 opinion_id=source_id,
@@ -76,37 +85,58 @@ class ModerationService:
             return False
 
     @staticmethod
-    def delete_comment(comment_id: int, moderator_id: int) -> bool:
+    async def delete_comment(comment_id: int, moderator_id: int) -> bool:
         """Soft delete a comment"""
         query = """
             UPDATE comments
             SET is_deleted = TRUE, deleted_by = %s, deleted_at = NOW()
-            WHERE id = %s
+            WHERE id = %s AND is_deleted = FALSE
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (moderator_id, comment_id))
-                return cursor.rowcount > 0
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(query, (moderator_id, comment_id))
+                if cursor.rowcount == 0:
+                    return False
+
+                await cursor.execute("SELECT opinion_id FROM comments WHERE id = %s", (comment_id,))
+                opinion_id = (await cursor.fetchone())['opinion_id']
+
+                await cursor.execute(
+                    """UPDATE opinions
+                       SET comment_count = GREATEST(comment_count - 1, 0),
+                           updated_at = updated_at
+                       WHERE id = %s""",
+                    (opinion_id,)
+                )
+                after_commit(lambda: invalidate_opinion(opinion_id, sorts=["comment_count"]))
+                return True
         except Exception as e:
             print(f"Error deleting comment: {e}")
             return False
 
     @staticmethod
-    def update_opinion_category(opinion_id: int, category_id: int, moderator_id: int) -> bool:
+    async def update_opinion_category(opinion_id: int, category_id: int, moderator_id: int) -> bool:
         """Update opinion category"""
         query = "UPDATE opinions SET category_id = %s WHERE id = %s"
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (category_id, opinion_id))
+            async with get_async_db_cursor() as cursor:
+                before = await MapService.cell_state(cursor, opinion_id)
+                await cursor.execute(query, (category_id, opinion_id))
+                if before:
+                    await MapService.move_opinion(
+                        cursor, opinion_id, before, {**before, 'category_id': category_id}
+                    )
 
                 # Log history
-                cursor.execute(
+                await cursor.execute(
                     """INSERT INTO opinion_history (opinion_id, user_id, action, changes)
                        VALUES (%s, %s, 'updated', JSON_OBJECT('category_id', %s))""",
                     (opinion_id, moderator_id, category_id)
                 )
+                after_commit(ModerationService._invalidate_list_totals)
+                after_commit(lambda: invalidate_opinion(opinion_id, enters=[(None, category_id)]))
 
                 return True
         except Exception as e:
@@ -114,64 +144,83 @@ class ModerationService:
             return False
 
     @staticmethod
-    def _change_status(opinion_id: int, moderator_id: int, new_status: OpinionStatus,
+    def _invalidate_list_totals():
+        """Status/category changes move opinions between list filters"""
+        invalidate_totals("opinions")
+        invalidate_totals("history")
+
+    @staticmethod
+    async def _change_status(opinion_id: int, moderator_id: int, new_status: OpinionStatus,
                       notification_title: str, notification_content: str) -> bool:
         """Helper to change opinion status and notify owner"""
         query = "UPDATE opinions SET status = %s WHERE id = %s"
 
         try:
-            with get_db_cursor() as cursor:
-                # Get old status
-                cursor.execute("SELECT status, user_id FROM opinions WHERE id = %s", (opinion_id,))
-                opinion = cursor.fetchone()
-
-                if not opinion:
-                    return False
+            # Status change, history and notification commit together
+            async with unit_of_work():
+                async with get_async_db_cursor() as cursor:
+                    # Get old status
+                    await cursor.execute(
+                        """SELECT status, user_id, category_id, latitude, longitude, geohash, is_public
+                           FROM opinions WHERE id = %s FOR UPDATE""",
+                        (opinion_id,)
+                    )
+                    opinion = await cursor.fetchone()
 
-                old_status = opinion['status']
+                    if not opinion:
+                        return False
 
-                # Update status
-                cursor.execute(query, (new_status.value, opinion_id))
+                    old_status = opinion['status']
 
-                # Log history
-                cursor.execute(
-                    """INSERT INTO opinion_history (opinion_id, user_id, action, old_status, new_status)
-                       VALUES (%s, %s, 'status_changed', %s, %s)""",
-                    (opinion_id, moderator_id, old_status, new_status.value)
-                )
+                    # Update status
+                    await cursor.execute(query, (new_status.value, opinion_id))
+                    await MapService.move_opinion(
+                        cursor, opinion_id, opinion, {**opinion, 'status': new_status.value}
+                    )
 
-            # Notify owner (non-blocking, don't fail if notification fails)
-            if new_status == NotificationType.APPROVED :
-                noti_type = NotificationType.APPROVED
-            elif new_status == OpinionStatus.REJECTED:
-                noti_type = NotificationType.REJECTED
-            else :
-                noti_type = NotificationType.STATUS_CHANGE
+                    # Log history
+                    await cursor.execute(
+                        """INSERT INTO opinion_history (opinion_id, user_id, action, old_status, new_status)
+                           VALUES (%s, %s, 'status_changed', %s, %s)""",
+                        (opinion_id, moderator_id, old_status, new_status.value)
+                    )
+                    after_commit(ModerationService._invalidate_list_totals)
+                    after_commit(lambda: invalidate_opinion(
+                        opinion_id, enters=[(new_status.value, None)]
+                    ))
+
+                # Notify owner (non-blocking, don't fail if notification fails)
+                if new_status == NotificationType.APPROVED :
+                    noti_type = NotificationType.APPROVED
+                elif new_status == OpinionStatus.REJECTED:
+                    noti_type = NotificationType.REJECTED
+                else :
+                    noti_type = NotificationType.STATUS_CHANGE
                 
-            try:
-                NotificationService.create_notification(
-                    NotificationCreate(
-                        user_id=opinion['user_id'],
-                        opinion_id=opinion_id,
-                        type=noti_type,
-                        title=notification_title,
-                        content=notification_content
+                try:
+                    await NotificationService.create_notification(
+                        NotificationCreate(
+                            user_id=opinion['user_id'],
+                            opinion_id=opinion_id,
+                            type=noti_type,
+                            title=notification_title,
+                            content=notification_content
+                        )
                     )
-                )
-            except Exception as notif_error:
-                print(f"Error creating notification: {notif_error}")
-                # Continue anyway - notification failure should not fail the moderation
-            return True
+                except Exception as notif_error:
+                    print(f"Error creating notification: {notif_error}")
+                    # Continue anyway - notification failure should not fail the moderation
+                return True
         except Exception as e:
             print(f"Error changing status: {e}")
             return False
 
 
     @staticmethod
-    def get_dashboard_stats() -> dict:
-        with get_db_cursor() as cursor:
+    async def get_dashboard_stats() -> dict:
+        async with get_async_db_read_cursor() as cursor:
             # overall
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT 
                 COUNT(*) total,
                 SUM(status='approved') approved,
@@ -179,10 +228,10 @@ class ModerationService:
                 SUM(status='rejected') rejected
                 FROM opinions
             """)
-            overall = cursor.fetchone()
+            overall = await cursor.fetchone()
 
             # today
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT 
                 COUNT(*) total,
                 SUM(status='approved') approved,
@@ -191,10 +240,10 @@ class ModerationService:
                 FROM opinions
                 WHERE DATE(created_at) = CURDATE()
             """)
-            today = cursor.fetchone()
+            today = await cursor.fetchone()
 
             # top categories
-            cursor.execute("""
+            await cursor.execute("""
                 SELECT 
                 o.category_id,
                 c.name AS category_name,
@@ -205,7 +254,7 @@ class ModerationService:
                 ORDER BY count DESC
                 LIMIT 5
             """)
-            top_categories = cursor.fetchall()
+            top_categories = await cursor.fetchall()
 
             return {
                 "overall": overall,
@@ -214,12 +263,13 @@ class ModerationService:
             }
         
     @staticmethod
-    def get_moderation_history(
+    async def get_moderation_history(
         page: int,
         page_size: int,
         opinion_id: Optional[int] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        total_mode: str = TOTAL_EXACT,
     ) -> OpinionHistoryList:
         offset = (page - 1) * page_size
         
@@ -256,17 +306,23 @@ class ModerationService:
             LIMIT %s OFFSET %s
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(count_sql, params)
-            total = cursor.fetchone()["total"]
+        async with get_async_db_read_cursor() as cursor:
+            total, estimated = await fetch_total(
+                cursor, ("history", opinion_id, start_time, end_time), count_sql, params, total_mode
+            )
 
-            cursor.execute(data_sql, params + [page_size, offset])
-            rows = cursor.fetchall()
+            # One extra row tells whether there is a next page
+            await cursor.execute(data_sql, params + [page_size + 1, offset])
+            rows = await cursor.fetchall()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
 
         items = [OpinionHistoryItem(**r) for r in rows]
 
         return OpinionHistoryList(
             total=total,
+            total_estimated=estimated,
+            has_more=has_more,
             page=page,
             page_size=page_size,
             items=items
@@ -4,14 +4,15 @@ Notification service
 
 from typing import List, Optional
 from ..models.notification import Notification, NotificationCreate
-from ..utils.database import get_db_cursor
+from ..utils.database import get_async_db_cursor
+from ..utils.serialization import trusted
 
 
 class NotificationService:
     """Service for notification management"""
 
     @staticmethod
-    def create_notification(notification_data: NotificationCreate) -> Optional[Notification]:
+    async def create_notification(notification_data: NotificationCreate) -> Optional[Notification]:
         """Create a new notification"""
         query = """
             INSERT INTO notifications (user_id, opinion_id, type, title, content)
@@ -19,8 +20,8 @@ class NotificationService:
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(
                     query,
                     (notification_data.user_id, notification_data.opinion_id,
                      notification_data.type.value, notification_data.title,
@@ -29,18 +30,18 @@ class NotificationService:
 
                 notification_id = cursor.lastrowid
 
-                cursor.execute(
+                await cursor.execute(
                     "SELECT * FROM notifications WHERE id = %s",
                     (notification_id,)
                 )
 
-                return Notification(**cursor.fetchone())
+                return trusted(Notification, await cursor.fetchone())
         except Exception as e:
             print(f"Error creating notification: {e}")
             return None
 
     @staticmethod
-    def get_user_notifications(user_id: int, unread_only: bool = False) -> List[Notification]:
+    async def get_user_notifications(user_id: int, unread_only: bool = False) -> List[Notification]:
         """Get user's notifications"""
         query = "SELECT * FROM notifications WHERE user_id = %s"
 
@@ -49,12 +50,12 @@ class NotificationService:
 
         query += " ORDER BY created_at DESC LIMIT 50"
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (user_id,))
-            return [Notification(**row) for row in cursor.fetchall()]
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (user_id,))
+            return [trusted(Notification, row) for row in await cursor.fetchall()]
 
     @staticmethod
-    def mark_as_read(notification_id: int, user_id: int) -> bool:
+    async def mark_as_read(notification_id: int, user_id: int) -> bool:
         """Mark notification as read (idempotent)"""
         print("mark_as_read: id =", notification_id, "user_id =", user_id)
 
@@ -64,16 +65,16 @@ class NotificationService:
             WHERE id = %s AND user_id = %s
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (notification_id, user_id))
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (notification_id, user_id))
 
             # 如果 rowcount = 0，不代表不存在，可能是 is_read 已經是 TRUE
             # ➜ 改成檢查資料是否存在
-            cursor.execute(
+            await cursor.execute(
                 "SELECT 1 FROM notifications WHERE id = %s AND user_id = %s",
                 (notification_id, user_id)
             )
-            exists = cursor.fetchone() is not None
+            exists = await cursor.fetchone() is not None
 
             print("exists =", exists, "rowcount =", cursor.rowcount)
             return exists
@@ -107,7 +108,7 @@ class MilestoneNotificationService:
     """Service for managing milestone-based notifications"""
 
     @staticmethod
-    def check_and_notify_milestone(opinion_id: int, milestone_type: str,
+    async def check_and_notify_milestone(opinion_id: int, milestone_type: str,
                                    current_count: int, opinion_owner_id: int) -> bool:
         """
         Check if current count reaches a milestone and send notification
@@ -121,23 +122,22 @@ class MilestoneNotificationService:
         Returns:
             True if notification was sent, False otherwise
         """
-        from ..utils.database import get_db_cursor
 
         try:
-            with get_db_cursor() as cursor:
+            async with get_async_db_cursor() as cursor:
                 # Get or create milestone record
-                cursor.execute(
+                await cursor.execute(
                     """SELECT last_notified_count, next_milestone
                        FROM notification_milestones
                        WHERE opinion_id = %s AND milestone_type = %s""",
                     (opinion_id, milestone_type)
                 )
 
-                milestone_record = cursor.fetchone()
+                milestone_record = await cursor.fetchone()
 
                 if not milestone_record:
                     # Create initial milestone record
-                    cursor.execute(
+                    await cursor.execute(
                         """INSERT INTO notification_milestones
                            (opinion_id, milestone_type, last_notified_count, next_milestone)
                            VALUES (%s, %s, 0, 1)""",
@@ -161,7 +161,7 @@ class MilestoneNotificationService:
                         title = f"你的貼文收到了 {current_count} 則留言！"
                         content = f"你的貼文已經收到 {current_count} 則留言"
 
-                    NotificationService.create_notification(
+                    await NotificationService.create_notification(
                         NotificationCreate(
                             user_id=opinion_owner_id,
                             opinion_id=opinion_id,
@@ -173,7 +173,7 @@ class MilestoneNotificationService:
 
                     # Update milestone record
                     new_next_milestone = calculate_next_milestone(current_count)
-                    cursor.execute(
+                    await cursor.execute(
                         """UPDATE notification_milestones
                            SET last_notified_count = %s, next_milestone = %s
                            WHERE opinion_id = %s AND milestone_type = %s""",
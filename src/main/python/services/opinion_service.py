@@ -2,79 +2,265 @@
 Opinion service for managing citizen submissions
 """
 
-from typing import List, Optional
+import json
+from datetime import date, timedelta
+from functools import partial
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
 from ..models.opinion import (
     Opinion, OpinionCreate, OpinionUpdate, OpinionWithUser,
-    OpinionList, OpinionStatus
+    OpinionList, OpinionStatus, NearbyOpinion, NearbyOpinionList,
+    OpinionCard, OpinionCardList
 )
 from ..models.comment import Comment, CommentCreate
 from ..models.vote import Vote, VoteCreate, VoteType
 from ..models.notification import NotificationCreate, NotificationType
-from ..utils.database import get_db_cursor, get_db_connection
+from ..utils.database import (
+    get_async_db_cursor, get_async_db_read_cursor, get_async_db_stream_cursor,
+    unit_of_work, after_commit, pending_writes
+)
+from ..utils.pagination import decode_cursor, encode_cursor, keyset_condition
+from ..utils.totals import TOTAL_EXACT, fetch_total, invalidate_totals
+from ..utils import page_cache
+from ..utils.opinion_cache import detail_cache, probe_cache, tag_id_cache, invalidate_opinion
+from ..utils import view_buffer
+from ..utils.geo import bounding_box, covering_cells, encode_geohash
+from ..utils.serialization import dump_json, trusted
 from ..services.notification_service import NotificationService
+from ..services.map_service import MapService
+from ..services.trending_service import HOT_COMMENT_POINTS, HOT_VOTE_POINTS, TrendingService
+
+
+# sort_by -> (column, direction) of the public opinion feed
+OPINION_SORT_MAP = {
+    "created_at": ("o.created_at", "DESC"),
+    "comment_count": ("o.comment_count", "ASC"),
+    "upvotes": ("o.upvotes", "DESC"),
+    "hot": ("o.hot_score", "DESC"),
+}
+
+# Most ids accepted by one batch fetch (GET /opinions/batch)
+BATCH_MAX_IDS = 100
+
+# Fields of the default list card (fields=card)
+CARD_FIELDS = (
+    "id", "title", "snippet", "category_id", "category_name", "region",
+    "username", "status", "created_at", "tags", "view_count",
+    "upvotes", "downvotes", "comment_count",
+)
+# Characters of content kept in a card's snippet
+SNIPPET_LENGTH = 140
+
+# Select expression of list fields that are not plain opinions columns;
+# tags and media are attached by separate queries
+LIST_FIELD_COLUMNS = {
+    # One extra character tells whether the content was cut
+    "snippet": f"LEFT(o.content, {SNIPPET_LENGTH + 1}) AS snippet",
+    "category_name": "c.name AS category_name",
+    "username": "u.username",
+    "user_full_name": "u.full_name AS user_full_name",
+    "tags": None,
+    "media": None,
+}
+
+
+def parse_list_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Normalize the `fields` parameter of the opinion list
+
+    None or "full" gives None (complete OpinionWithUser items), "card"
+    gives CARD_FIELDS, otherwise a comma-separated list of OpinionCard
+    fields. `id` is always included. Raises ValueError for unknown
+    field names.
+    """
+    if fields is None or fields.strip() == "full":
+        return None
+    if fields.strip() == "card":
+        return CARD_FIELDS
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - OpinionCard.model_fields.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    # Model order, so equal selections share a page cache entry
+    return tuple(name for name in OpinionCard.model_fields if name in requested)
+
+
+def _add_views(opinion: OpinionWithUser, count: int) -> OpinionWithUser:
+    """Copy of a cached detail with `count` more views"""
+    return opinion.model_copy(update={"view_count": opinion.view_count + count})
+
+
+def _snippet(content: Optional[str]) -> Optional[str]:
+    """Cut content to SNIPPET_LENGTH characters, marking the cut"""
+    if content is None or len(content) <= SNIPPET_LENGTH:
+        return content
+    return content[:SNIPPET_LENGTH].rstrip() + "…"
+
+
+# Columns of a bulk export (GET /admin/opinions/export), in CSV order
+EXPORT_COLUMNS = (
+    "id", "title", "content", "status", "category_id", "category_name",
+    "region", "latitude", "longitude", "is_public", "user_id", "username",
+    "tags", "upvotes", "downvotes", "comment_count", "view_count",
+    "auto_moderation_status", "auto_moderation_score", "moderation_reason",
+    "needs_manual_review", "reviewed_by", "reviewed_at", "merged_to_id",
+    "created_at", "updated_at",
+)
+# Rows read from the server per chunk of an export
+EXPORT_CHUNK_SIZE = 500
+
+# Relevance of an opinion to the search text (one %s), served by the
+# FULLTEXT idx_content index
+SEARCH_MATCH = "MATCH(o.title, o.content) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+
+# Great-circle distance in meters from a point (two %s: longitude,
+# latitude) to the opinion
+DISTANCE_FROM = "ST_Distance_Sphere(POINT(o.longitude, o.latitude), POINT(%s, %s))"
+
+# Counter column for each vote type, and the one for the other type
+VOTE_COUNTER_COLUMNS = {
+    VoteType.LIKE: ("upvotes", "downvotes"),
+    VoteType.DISLIKE: ("downvotes", "upvotes"),
+}
+
+
+
+class OpinionProbe(NamedTuple):
+    """Owner and visibility of an opinion, enough for write-route checks"""
+    user_id: int
+    is_public: bool
+
+    def visible_to(self, user_id: Optional[int]) -> bool:
+        """Public opinions are visible to everyone, private ones to their owner"""
+        return bool(self.is_public) or self.user_id == user_id
+
+
+# Opinions of an id range joined with their counters recomputed from
+# votes/comments (params: the range three times), and the rows that drifted
+_RECOMPUTED_COUNTERS = """
+    opinions o
+    LEFT JOIN (
+        SELECT opinion_id,
+               SUM(vote_type = 'like') AS up,
+               SUM(vote_type = 'support') AS down
+        FROM votes
+        WHERE opinion_id BETWEEN %s AND %s
+        GROUP BY opinion_id
+    ) v ON v.opinion_id = o.id
+    LEFT JOIN (
+        SELECT opinion_id, COUNT(*) AS cnt
+        FROM comments
+        WHERE opinion_id BETWEEN %s AND %s AND is_deleted = FALSE
+        GROUP BY opinion_id
+    ) c ON c.opinion_id = o.id
+"""
+_COUNTERS_DRIFTED = """
+    o.id BETWEEN %s AND %s
+      AND (o.upvotes <> COALESCE(v.up, 0)
+           OR o.downvotes <> COALESCE(v.down, 0)
+           OR o.comment_count <> COALESCE(c.cnt, 0))
+"""
+
+# Ids whose counters drifted
+RECONCILE_DRIFT_QUERY = f"SELECT o.id FROM {_RECOMPUTED_COUNTERS} WHERE {_COUNTERS_DRIFTED}"
+
+# Repairs the counters of drifted opinions among the ids in {ids}
+RECONCILE_COUNTERS_QUERY = f"""
+    UPDATE {_RECOMPUTED_COUNTERS}
+    SET o.upvotes = COALESCE(v.up, 0),
+        o.downvotes = COALESCE(v.down, 0),
+        o.comment_count = COALESCE(c.cnt, 0),
+        o.updated_at = o.updated_at
+    WHERE {_COUNTERS_DRIFTED}
+      AND o.id IN ({{ids}})
+"""
 
 
 class OpinionService:
     """Service for opinion management"""
 
     @staticmethod
-    def create_opinion(user_id: int, opinion_data: OpinionCreate) -> Optional[Opinion]:
+    async def create_opinion(user_id: int, opinion_data: OpinionCreate) -> Optional[Opinion]:
         """Create a new opinion"""
         query = """
             INSERT INTO opinions (user_id, title, content, category_id, status,
-                                 region, latitude, longitude, is_public)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                 region, latitude, longitude, geohash, is_public)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
+        geohash = None
+        if opinion_data.latitude is not None and opinion_data.longitude is not None:
+            # Rounded like the DECIMAL(10, 8) columns, so it matches ST_GeoHash of the row
+            latitude = round(float(opinion_data.latitude), 8)
+            longitude = round(float(opinion_data.longitude), 8)
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                geohash = encode_geohash(latitude, longitude)
+
         try:
             current_step = "insert_opinion"
-            with get_db_cursor() as cursor:
-                cursor.execute(
-                    query,
-                    (user_id, opinion_data.title, opinion_data.content,
-                     opinion_data.category_id, opinion_data.status,
-                    opinion_data.region, opinion_data.latitude,
-                    opinion_data.longitude, opinion_data.is_public)
-                )
+            # One connection for the insert and the read-back
+            async with unit_of_work():
+                async with get_async_db_cursor() as cursor:
+                    await cursor.execute(
+                        query,
+                        (user_id, opinion_data.title, opinion_data.content,
+                         opinion_data.category_id, opinion_data.status,
+                        opinion_data.region, opinion_data.latitude,
+                        opinion_data.longitude, geohash, opinion_data.is_public)
+                    )
+
+                    opinion_id = cursor.lastrowid
+                    await MapService.move_opinion(cursor, opinion_id, None, {
+                        'status': opinion_data.status,
+                        'category_id': opinion_data.category_id,
+                        'latitude': opinion_data.latitude,
+                        'longitude': opinion_data.longitude,
+                        'geohash': geohash,
+                        'is_public': opinion_data.is_public,
+                    })
 
-                opinion_id = cursor.lastrowid
-
-                # Add tags if provided
-                if opinion_data.tags:
-                    current_step = "insert_tags"
-                    OpinionService._add_tags(cursor, opinion_id, opinion_data.tags)
-
-                # Add media if provided
-                if opinion_data.media:
-                    current_step = "insert_media"
-                    media_query = """
-                        INSERT INTO opinion_media (opinion_id, media_type, file_path, file_size, mime_type)
-                        VALUES (%s, %s, %s, %s, %s)
-                    """
-                    media_values = []
-                    for m in opinion_data.media:
-                        media_values.append(
-                            (
-                                opinion_id,
-                                m.media_type.value,  # Enum -> 'image' / 'video' / 'audio'
-                                m.file_path,
-                                m.file_size,
-                                m.mime_type,
+                    # Add tags if provided
+                    if opinion_data.tags:
+                        current_step = "insert_tags"
+                        await OpinionService._add_tags(cursor, opinion_id, opinion_data.tags)
+
+                    # Add media if provided
+                    if opinion_data.media:
+                        current_step = "insert_media"
+                        media_query = """
+                            INSERT INTO opinion_media (opinion_id, media_type, file_path, file_size, mime_type)
+                            VALUES (%s, %s, %s, %s, %s)
+                        """
+                        media_values = []
+                        for m in opinion_data.media:
+                            media_values.append(
+                                (
+                                    opinion_id,
+                                    m.media_type.value,  # Enum -> 'image' / 'video' / 'audio'
+                                    m.file_path,
+                                    m.file_size,
+                                    m.mime_type,
+                                )
                             )
-                        )
-                    cursor.executemany(media_query, media_values)
-
-                # Log history
-                current_step = "insert_history"
-                cursor.execute(
-                    """INSERT INTO opinion_history (opinion_id, user_id, action, new_status)
-                    VALUES (%s, %s, 'created', %s)""",
-                    (opinion_id, user_id, opinion_data.status)
-                )
+                        await cursor.executemany(media_query, media_values)
 
-            current_step = "get_opinion_by_id"
-            opinion = OpinionService.get_opinion_by_id(opinion_id)
+                    # Log history
+                    current_step = "insert_history"
+                    await cursor.execute(
+                        """INSERT INTO opinion_history (opinion_id, user_id, action, new_status)
+                        VALUES (%s, %s, 'created', %s)""",
+                        (opinion_id, user_id, opinion_data.status)
+                    )
+                    after_commit(lambda: invalidate_totals("opinions"))
+                    after_commit(lambda: invalidate_totals("history"))
+                    after_commit(lambda: page_cache.invalidate_pages(
+                        enters=[(opinion_data.status, opinion_data.category_id)]
+                    ))
+
+                current_step = "get_opinion_by_id"
+                opinion = await OpinionService.get_opinion_by_id(opinion_id)
 
-            return opinion
+                return opinion
         
         except Exception as e:
             # 這裡你可以先 print / log，再丟出給 FastAPI
@@ -82,86 +268,202 @@ class OpinionService:
             return None
 
     @staticmethod
-    def get_opinion_by_id(opinion_id: int, increment_view: bool = False) -> Optional[OpinionWithUser]:
-        """Get opinion by ID with user information"""
+    async def get_opinion_by_id(opinion_id: int, increment_view: bool = False) -> Optional[OpinionWithUser]:
+        """
+        Get opinion by ID with user information
+
+        Served from the detail cache when possible (see
+        utils.opinion_cache); writes to the opinion invalidate it.
+        Views are buffered (see utils.view_buffer) and the returned
+        view_count includes the ones not flushed yet.
+        """
+        loaded_at = detail_cache.generation
+        opinion = detail_cache.get(opinion_id)
+        if opinion is None:
+            opinion = await OpinionService._load_opinion(opinion_id, loaded_at)
+            if opinion is None:
+                return None
+
         if increment_view:
-            with get_db_cursor() as cursor:
-                cursor.execute(
-                    "UPDATE opinions SET view_count = view_count + 1 WHERE id = %s",
-                    (opinion_id,)
-                )
+            pending = view_buffer.record_view(opinion_id)
+        else:
+            pending = view_buffer.pending_views(opinion_id)
+        if pending:
+            opinion = opinion.model_copy(update={"view_count": opinion.view_count + pending})
+        return opinion
 
-        query = """
-            SELECT o.*, c.name as category_name, u.username, u.full_name as user_full_name,
-                   (SELECT COUNT(*) FROM votes v WHERE v.opinion_id = o.id AND v.vote_type='like') as upvotes,
-                   (SELECT COUNT(*) FROM votes v WHERE v.opinion_id = o.id AND v.vote_type='support') as downvotes,
-                   (SELECT COUNT(*) FROM comments WHERE opinion_id = o.id AND is_deleted = FALSE) as comment_count
+    @staticmethod
+    async def get_opinions_by_ids(opinion_ids: List[int]) -> List[OpinionWithUser]:
+        """
+        Get several opinions at once, in the order of `opinion_ids`
+
+        Cached details are reused; the rest are read with one opinions
+        query plus one tags and one media query, whatever the number of
+        ids. Unknown ids are left out and views are not counted.
+        """
+        opinion_ids = list(dict.fromkeys(opinion_ids))
+        loaded_at = detail_cache.generation
+        found = {}
+        for opinion_id in opinion_ids:
+            opinion = detail_cache.get(opinion_id)
+            if opinion is not None:
+                found[opinion_id] = opinion
+
+        missing = [opinion_id for opinion_id in opinion_ids if opinion_id not in found]
+        if missing:
+            found.update(await OpinionService._load_opinions(missing, loaded_at))
+
+        opinions = []
+        for opinion_id in opinion_ids:
+            opinion = found.get(opinion_id)
+            if opinion is None:
+                continue
+            pending = view_buffer.pending_views(opinion_id)
+            if pending:
+                opinion = opinion.model_copy(update={"view_count": opinion.view_count + pending})
+            opinions.append(opinion)
+        return opinions
+
+    @staticmethod
+    async def _load_opinion(opinion_id: int, loaded_at: int) -> Optional[OpinionWithUser]:
+        """Read an opinion with tags and media and put it in the detail cache"""
+        return (await OpinionService._load_opinions([opinion_id], loaded_at)).get(opinion_id)
+
+    @staticmethod
+    async def _load_opinions(opinion_ids: List[int], loaded_at: int) -> Dict[int, OpinionWithUser]:
+        """Read opinions with tags and media and put them in the detail cache"""
+        flushed_at = view_buffer.flush_sequence()
+        placeholders = ", ".join(["%s"] * len(opinion_ids))
+        query = f"""
+            SELECT o.*, c.name as category_name, u.username, u.full_name as user_full_name
             FROM opinions o
             JOIN users u ON o.user_id = u.id
             LEFT JOIN categories c ON o.category_id = c.id
-            WHERE o.id = %s
+            WHERE o.id IN ({placeholders})
         """
 
-        with get_db_cursor() as cursor:
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute(query, opinion_ids)
+            rows = await cursor.fetchall()
+
+            await OpinionService._attach_tags_and_media(cursor, rows)
 
-            
-            cursor.execute(query, (opinion_id,))
-            opinion_row = cursor.fetchone()
+            opinions = {row['id']: trusted(OpinionWithUser, row) for row in rows}
+            # Uncommitted rows of the current unit of work must not be shared
+            if not pending_writes():
+                for opinion_id, opinion in opinions.items():
+                    # A view flush that committed meanwhile may be missing
+                    # from view_count and is no longer added as pending
+                    if not view_buffer.flushed_since(flushed_at, opinion_id):
+                        detail_cache.set(opinion_id, opinion, generation=loaded_at)
+            return opinions
 
-            if not opinion_row:
+    @staticmethod
+    async def probe_opinion(opinion_id: int) -> Optional[OpinionProbe]:
+        """
+        Cheap existence/visibility check for write routes
+
+        Uses the cached detail or probe when available, otherwise a single
+        primary-key lookup. Returns None when the opinion does not exist.
+        """
+        probe = probe_cache.get(opinion_id)
+        if probe is not None:
+            return probe
+
+        opinion = detail_cache.get(opinion_id)
+        if opinion is not None:
+            probe = OpinionProbe(opinion.user_id, opinion.is_public)
+        else:
+            async with get_async_db_read_cursor() as cursor:
+                await cursor.execute(
+                    "SELECT user_id, is_public FROM opinions WHERE id = %s", (opinion_id,)
+                )
+                row = await cursor.fetchone()
+            if not row:
                 return None
+            probe = OpinionProbe(row['user_id'], bool(row['is_public']))
 
-            # Get tags
-            cursor.execute(
-                """SELECT t.name FROM tags t
-                   JOIN opinion_tags ot ON t.id = ot.tag_id
-                   WHERE ot.opinion_id = %s""",
-                (opinion_id,)
-            )
-            tags = [row['name'] for row in cursor.fetchall()]
-            opinion_row['tags'] = tags
-
-            cursor.execute(
-                """
-                SELECT 
-                    id,
-                    opinion_id,
-                    media_type,
-                    file_path,
-                    file_size,
-                    mime_type,
-                    created_at
-                FROM opinion_media
-                WHERE opinion_id = %s
-                ORDER BY created_at ASC
-                """,
-                (opinion_id,)
-            )
-            media_rows = cursor.fetchall()  # list[dict]
+        if not pending_writes():
+            probe_cache.set(opinion_id, probe)
+        return probe
 
-            # Process media filename/url/thumbnail_url
-            for m in media_rows:
-                filename = m["file_path"].split("/")[-1]
-                m["filename"] = filename
-                m["url"] = f"uploads/{m['media_type']}/{filename}"
-                if m["media_type"] == "image":
-                    m["thumbnail_url"] = f"uploads/thumbnails/{filename}"
-                else:
-                    m["thumbnail_url"] = None
+    @staticmethod
+    async def get_opinions_page(page: int = 1, page_size: int = 20,
+                    status: Optional[OpinionStatus] = None,
+                    category_id: Optional[int] = None,
+                    sort_by: Optional[str] = None,
+                    cursor: Optional[str] = None,
+                    total_mode: str = TOTAL_EXACT,
+                    fields: Optional[Tuple[str, ...]] = None) -> Tuple[page_cache.CachedPage, bool]:
+        """
+        Serialized get_opinions page, served from the page cache
 
-            # 這裡可以直接給 Pydantic 處理 nested model
-            opinion_row['media'] = media_rows
+        Returns (cached page with body and ETag, cache hit). Writes
+        invalidate the affected pages after commit (see utils.page_cache).
+        """
+        sort_key = sort_by if sort_by in OPINION_SORT_MAP else "created_at"
+        key = page_cache.page_key(
+            status.value if status else None, category_id, sort_key,
+            page, page_size, cursor, total_mode, fields
+        )
+        entry = page_cache.get_entry(key)
+        if entry is not None:
+            return entry, True
 
-            return OpinionWithUser(**opinion_row)
+        rendered_at = page_cache.generation()
+        result = await OpinionService.get_opinions(
+            page, page_size, status, category_id, sort_key, cursor, total_mode, fields
+        )
+        # Cards only carry the fields that were selected
+        body = dump_json(result, exclude_unset=fields is not None)
+        entry = page_cache.store_page(key, body, (item.id for item in result.items), rendered_at)
+        return entry, False
 
     @staticmethod
-    def get_opinions(page: int = 1, page_size: int = 20,
+    async def get_opinions(page: int = 1, page_size: int = 20,
                     status: Optional[OpinionStatus] = None,
                     category_id: Optional[int] = None,
-                    sort_by: Optional[str] = None) -> OpinionList:
-        """Get paginated list of opinions"""
+                    sort_by: Optional[str] = None,
+                    cursor: Optional[str] = None,
+                    total_mode: str = TOTAL_EXACT,
+                    fields: Optional[Sequence[str]] = None) -> OpinionList:
+        """
+        Get paginated list of opinions
+
+        With `cursor` (the `next_cursor` of the previous page) the page
+        starts right after that page's last row and `page` is ignored;
+        otherwise LIMIT/OFFSET paging is used. Raises InvalidCursorError
+        for a malformed cursor or one from another sort order.
+
+        `total` comes from the count cache (see utils.totals); total_mode
+        "estimate" or "none" skips the COUNT(*) entirely.
+
+        With `fields` (see parse_list_fields) only those columns are read
+        and an OpinionCardList is returned; tags, media and the users /
+        categories joins are skipped unless selected.
+        """
+        sort_key = sort_by if sort_by in OPINION_SORT_MAP else "created_at"
+        sort_column, sort_order = OPINION_SORT_MAP[sort_key]
         offset = (page - 1) * page_size
 
+        if fields is None:
+            select_sql = "o.*, c.name as category_name, u.username, u.full_name as user_full_name"
+            join_users = join_categories = True
+        else:
+            columns = [LIST_FIELD_COLUMNS.get(name, f"o.{name}") for name in fields]
+            columns = [column for column in columns if column]
+            if sort_column not in columns:
+                # Needed for next_cursor
+                columns.append(sort_column)
+            select_sql = ", ".join(columns)
+            join_users = "username" in fields or "user_full_name" in fields
+            join_categories = "category_name" in fields
+        joins = []
+        if join_users:
+            joins.append("JOIN users u ON o.user_id = u.id")
+        if join_categories:
+            joins.append("LEFT JOIN categories c ON o.category_id = c.id")
+
         # Build query
         where_clauses = ["o.is_public = TRUE"]
         params = []
@@ -175,75 +477,360 @@ class OpinionService:
             params.append(category_id)
 
         where_sql = " AND ".join(where_clauses)
+        count_query = f"SELECT COUNT(*) as total FROM opinions o WHERE {where_sql}"
 
-        SORT_MAP = {
-            "created_at": ("o.created_at", "DESC"),
-            "comment_count": ("o.comment_count", "ASC"),
-            "upvotes": ("upvotes", "DESC"),
-        }
-        sort_column, sort_order = SORT_MAP.get(sort_by, ("o.created_at", "DESC"))
+        # Keyset: continue after the last row of the previous page
+        page_where = where_clauses
+        page_params = list(params)
+        if cursor:
+            after_value, after_id = decode_cursor(cursor, sort_key)
+            page_where = where_clauses + [keyset_condition(sort_column, sort_order, "o.id")]
+            page_params += [after_value, after_value, after_id]
+            offset = 0
 
+        # id breaks ties so the order (and the cursor) is total
+        data_query = f"""
+            SELECT {select_sql}
+            FROM opinions o
+            {" ".join(joins)}
+            WHERE {" AND ".join(page_where)}
+            ORDER BY {sort_column} {sort_order}, o.id {sort_order}
+            LIMIT %s OFFSET %s
+        """
+
+        async with get_async_db_read_cursor() as db_cursor:
+            # Get total count (cached per filter)
+            total, estimated = await fetch_total(
+                db_cursor, ("opinions", status, category_id), count_query, params, total_mode
+            )
+
+            # Get data (one extra row tells whether there is a next page)
+            await db_cursor.execute(data_query, page_params + [page_size + 1, offset])
+            opinions = await db_cursor.fetchall()
+            has_more = len(opinions) > page_size
+            opinions = opinions[:page_size]
+
+            # Tags and media for the whole page (at most two queries)
+            await OpinionService._attach_tags_and_media(
+                db_cursor, opinions,
+                tags=fields is None or "tags" in fields,
+                media=fields is None or "media" in fields
+            )
+
+            next_cursor = None
+            if has_more:
+                last = opinions[-1]
+                next_cursor = encode_cursor(sort_key, last[sort_column.split('.')[-1]], last['id'])
+
+            if fields is not None:
+                if "snippet" in fields:
+                    for opinion in opinions:
+                        opinion['snippet'] = _snippet(opinion['snippet'])
+                return OpinionCardList(
+                    total=total,
+                    total_estimated=estimated,
+                    has_more=has_more,
+                    page=1 if cursor else page,
+                    page_size=page_size,
+                    items=[
+                        trusted(OpinionCard, {name: opinion[name] for name in fields})
+                        for opinion in opinions
+                    ],
+                    next_cursor=next_cursor
+                )
+
+            items = [trusted(OpinionWithUser, opinion) for opinion in opinions]
+
+            return OpinionList(
+                total=total,
+                total_estimated=estimated,
+                has_more=has_more,
+                page=1 if cursor else page,
+                page_size=page_size,
+                items=items,
+                next_cursor=next_cursor
+            )
+
+    @staticmethod
+    async def search_opinions(q: str, page: int = 1, page_size: int = 20,
+                    status: Optional[OpinionStatus] = None,
+                    category_id: Optional[int] = None,
+                    region: Optional[str] = None,
+                    date_from: Optional[date] = None,
+                    date_to: Optional[date] = None,
+                    cursor: Optional[str] = None,
+                    total_mode: str = TOTAL_EXACT) -> OpinionList:
+        """
+        Full-text search over public opinions, most relevant first
+
+        Uses the FULLTEXT idx_content index (ngram parser, so Chinese
+        text is searchable without spaces). Filters narrow the matches;
+        `cursor` continues after the last row of the previous page like
+        in get_opinions. date_to is inclusive.
+        """
+        where_clauses = [SEARCH_MATCH, "o.is_public = TRUE"]
+        params = [q]
+
+        if status:
+            where_clauses.append("o.status = %s")
+            params.append(status.value)
+
+        if category_id:
+            where_clauses.append("o.category_id = %s")
+            params.append(category_id)
+
+        if region:
+            where_clauses.append("o.region = %s")
+            params.append(region)
+
+        if date_from:
+            where_clauses.append("o.created_at >= %s")
+            params.append(date_from)
+
+        if date_to:
+            where_clauses.append("o.created_at < %s")
+            params.append(date_to + timedelta(days=1))
+
+        where_sql = " AND ".join(where_clauses)
         count_query = f"SELECT COUNT(*) as total FROM opinions o WHERE {where_sql}"
 
+        offset = (page - 1) * page_size
+        page_where = where_clauses
+        page_params = list(params)
+        if cursor:
+            after_score, after_id = decode_cursor(cursor, "relevance")
+            page_where = where_clauses + [keyset_condition(SEARCH_MATCH, "DESC", "o.id")]
+            page_params += [q, after_score, q, after_score, after_id]
+            offset = 0
+
         data_query = f"""
             SELECT o.*, c.name as category_name, u.username, u.full_name as user_full_name,
-                   (SELECT COUNT(*) FROM votes v WHERE v.opinion_id = o.id AND v.vote_type='like') as upvotes,
-                   (SELECT COUNT(*) FROM votes v WHERE v.opinion_id = o.id AND v.vote_type='support') as downvotes,
-                   (SELECT COUNT(*) FROM comments WHERE opinion_id = o.id AND is_deleted = FALSE) as comment_count
+                   {SEARCH_MATCH} AS relevance
             FROM opinions o
             JOIN users u ON o.user_id = u.id
             LEFT JOIN categories c ON o.category_id = c.id
-            WHERE {where_sql}
-            ORDER BY {sort_column} {sort_order}
+            WHERE {" AND ".join(page_where)}
+            ORDER BY relevance DESC, o.id DESC
             LIMIT %s OFFSET %s
         """
 
-        with get_db_cursor() as cursor:
-            # Get total count
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()['total']
+        async with get_async_db_read_cursor() as db_cursor:
+            # Under "opinions" so opinion writes drop search totals too
+            total, estimated = await fetch_total(
+                db_cursor,
+                ("opinions", "search", q, status, category_id, region, date_from, date_to),
+                count_query, params, total_mode
+            )
 
-            # Get data
-            cursor.execute(data_query, params + [page_size, offset])
-            opinions = cursor.fetchall()
+            await db_cursor.execute(data_query, [q] + page_params + [page_size + 1, offset])
+            opinions = await db_cursor.fetchall()
+            has_more = len(opinions) > page_size
+            opinions = opinions[:page_size]
 
-            # Get tags for each opinion
-            for opinion in opinions:
-                cursor.execute(
-                    """SELECT t.name FROM tags t
-                       JOIN opinion_tags ot ON t.id = ot.tag_id
-                       WHERE ot.opinion_id = %s""",
-                    (opinion['id'],)
-                )
-                opinion['tags'] = [row['name'] for row in cursor.fetchall()]
+            await OpinionService._attach_tags_and_media(db_cursor, opinions)
 
-            items = [OpinionWithUser(**opinion) for opinion in opinions]
+            items = [trusted(OpinionWithUser, opinion) for opinion in opinions]
+
+            next_cursor = None
+            if has_more:
+                last = opinions[-1]
+                next_cursor = encode_cursor("relevance", float(last['relevance']), last['id'])
 
             return OpinionList(
                 total=total,
-                page=page,
+                total_estimated=estimated,
+                has_more=has_more,
+                page=1 if cursor else page,
                 page_size=page_size,
-                items=items
+                items=items,
+                next_cursor=next_cursor
             )
 
     @staticmethod
-    def add_comment(opinion_id: int, user_id: int, comment_data: CommentCreate) -> Optional[Comment]:
+    async def get_nearby_opinions(latitude: float, longitude: float,
+                    radius_m: float = 1000,
+                    bbox: Optional[Tuple[float, float, float, float]] = None,
+                    page: int = 1, page_size: int = 20,
+                    status: Optional[OpinionStatus] = None,
+                    category_id: Optional[int] = None,
+                    cursor: Optional[str] = None,
+                    total_mode: str = TOTAL_EXACT) -> NearbyOpinionList:
+        """
+        Public opinions near a point, closest first
+
+        The area is the circle of `radius_m` around the point, or `bbox`
+        (min_lat, min_lng, max_lat, max_lng) when given, e.g. the visible
+        map. Rows are found through the geohash index (a few prefix range
+        scans over the cells covering the area) before exact distances
+        are computed. `cursor` continues after the last row of the
+        previous page for the same point.
+        """
+        area = bbox or bounding_box(latitude, longitude, radius_m)
+        min_lat, min_lng, max_lat, max_lng = area
+        cells = covering_cells(min_lat, min_lng, max_lat, max_lng)
+
+        where_clauses = [
+            "o.is_public = TRUE",
+            "(" + " OR ".join(["o.geohash LIKE %s"] * len(cells)) + ")",
+            "o.latitude BETWEEN %s AND %s",
+            "o.longitude BETWEEN %s AND %s",
+        ]
+        params = [cell + "%" for cell in cells] + [min_lat, max_lat, min_lng, max_lng]
+
+        if not bbox:
+            where_clauses.append(f"{DISTANCE_FROM} <= %s")
+            params += [longitude, latitude, radius_m]
+
+        if status:
+            where_clauses.append("o.status = %s")
+            params.append(status.value)
+
+        if category_id:
+            where_clauses.append("o.category_id = %s")
+            params.append(category_id)
+
+        where_sql = " AND ".join(where_clauses)
+        count_query = f"SELECT COUNT(*) as total FROM opinions o WHERE {where_sql}"
+
+        # The cursor is only valid for the same point
+        sort_key = f"distance:{latitude},{longitude}"
+        offset = (page - 1) * page_size
+        page_where = where_clauses
+        page_params = list(params)
+        if cursor:
+            after_distance, after_id = decode_cursor(cursor, sort_key)
+            page_where = where_clauses + [keyset_condition(DISTANCE_FROM, "ASC", "o.id")]
+            page_params += [longitude, latitude, after_distance,
+                            longitude, latitude, after_distance, after_id]
+            offset = 0
+
+        data_query = f"""
+            SELECT o.*, c.name as category_name, u.username, u.full_name as user_full_name,
+                   {DISTANCE_FROM} AS distance_m
+            FROM opinions o
+            JOIN users u ON o.user_id = u.id
+            LEFT JOIN categories c ON o.category_id = c.id
+            WHERE {" AND ".join(page_where)}
+            ORDER BY distance_m ASC, o.id ASC
+            LIMIT %s OFFSET %s
+        """
+
+        async with get_async_db_read_cursor() as db_cursor:
+            total, estimated = await fetch_total(
+                db_cursor,
+                ("opinions", "nearby", latitude, longitude, radius_m, bbox, status, category_id),
+                count_query, params, total_mode
+            )
+
+            await db_cursor.execute(
+                data_query, [longitude, latitude] + page_params + [page_size + 1, offset]
+            )
+            opinions = await db_cursor.fetchall()
+            has_more = len(opinions) > page_size
+            opinions = opinions[:page_size]
+
+            await OpinionService._attach_tags_and_media(db_cursor, opinions)
+
+            items = [trusted(NearbyOpinion, opinion) for opinion in opinions]
+
+            next_cursor = None
+            if has_more:
+                last = opinions[-1]
+                next_cursor = encode_cursor(sort_key, float(last['distance_m']), last['id'])
+
+            return NearbyOpinionList(
+                total=total,
+                total_estimated=estimated,
+                has_more=has_more,
+                page=1 if cursor else page,
+                page_size=page_size,
+                items=items,
+                next_cursor=next_cursor
+            )
+
+    @staticmethod
+    async def export_opinions(status: Optional[OpinionStatus] = None,
+                              category_id: Optional[int] = None,
+                              include_private: bool = False) -> AsyncIterator[List[dict]]:
+        """
+        Stream opinions for a bulk export, in chunks of EXPORT_CHUNK_SIZE rows
+
+        Filters mirror get_opinions (public only unless include_private).
+        Rows come from a server-side cursor in id order, so memory stays
+        constant whatever the table size. Each row holds EXPORT_COLUMNS;
+        `tags` is a sorted list (one correlated lookup per row on the
+        opinion_tags primary key, as a second query cannot run while the
+        result is still streaming; aggregated as JSON so tag names may
+        contain commas and long lists are not cut at group_concat_max_len).
+        """
+        where_clauses = [] if include_private else ["o.is_public = TRUE"]
+        params = []
+
+        if status:
+            where_clauses.append("o.status = %s")
+            params.append(status.value)
+
+        if category_id:
+            where_clauses.append("o.category_id = %s")
+            params.append(category_id)
+
+        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+        query = f"""
+            SELECT o.*, c.name AS category_name, u.username,
+                   (SELECT JSON_ARRAYAGG(t.name)
+                    FROM opinion_tags ot JOIN tags t ON t.id = ot.tag_id
+                    WHERE ot.opinion_id = o.id) AS tags
+            FROM opinions o
+            JOIN users u ON o.user_id = u.id
+            LEFT JOIN categories c ON o.category_id = c.id
+            {where_sql}
+            ORDER BY o.id
+        """
+
+        async with get_async_db_stream_cursor() as cursor:
+            await cursor.execute(query, params)
+            while True:
+                rows = await cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    break
+                chunk = []
+                for row in rows:
+                    # AI moderation columns are absent without their migration
+                    item = {column: row.get(column) for column in EXPORT_COLUMNS}
+                    item['tags'] = sorted(json.loads(row['tags'])) if row['tags'] else []
+                    item['is_public'] = bool(row['is_public'])
+                    item['needs_manual_review'] = bool(row.get('needs_manual_review'))
+                    chunk.append(item)
+                yield chunk
+
+    @staticmethod
+    async def add_comment(opinion_id: int, user_id: int, comment_data: CommentCreate) -> Optional[Comment]:
         """Add comment to opinion"""
         query = """
             INSERT INTO comments (opinion_id, user_id, content)
             VALUES (%s, %s, %s)
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (opinion_id, user_id, comment_data.content))
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (opinion_id, user_id, comment_data.content))
             comment_id = cursor.lastrowid
 
+            await cursor.execute(
+                """UPDATE opinions
+                   SET comment_count = comment_count + 1, hot_score = hot_score + %s,
+                       updated_at = updated_at
+                   WHERE id = %s""",
+                (HOT_COMMENT_POINTS, opinion_id)
+            )
+            await TrendingService.record_activity(cursor, opinion_id, HOT_COMMENT_POINTS)
+            after_commit(lambda: invalidate_opinion(opinion_id, sorts=["comment_count", "hot"]))
+
             # Get opinion owner and notify
-            cursor.execute("SELECT user_id FROM opinions WHERE id = %s", (opinion_id,))
-            opinion_owner = cursor.fetchone()
+            await cursor.execute("SELECT user_id FROM opinions WHERE id = %s", (opinion_id,))
+            opinion_owner = await cursor.fetchone()
 
             if opinion_owner and opinion_owner['user_id'] != user_id:
-                NotificationService.create_notification(
+                await NotificationService.create_notification(
                     NotificationCreate(
                         user_id=opinion_owner['user_id'],
                         opinion_id=opinion_id,
@@ -254,16 +841,16 @@ class OpinionService:
                 )
 
             # Fetch created comment
-            cursor.execute(
+            await cursor.execute(
                 """SELECT c.*, u.username FROM comments c
                    JOIN users u ON c.user_id = u.id
                    WHERE c.id = %s""",
                 (comment_id,)
             )
-            return Comment(**cursor.fetchone())
+            return trusted(Comment, await cursor.fetchone())
 
     @staticmethod
-    def get_comment_by_id(comment_id: int) -> Optional[Comment]:
+    async def get_comment_by_id(comment_id: int) -> Optional[Comment]:
         """Get comment by ID"""
         query = """
             SELECT c.*, u.username
@@ -272,15 +859,15 @@ class OpinionService:
             WHERE c.id = %s AND c.is_deleted = FALSE
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (comment_id,))
-            row = cursor.fetchone()
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (comment_id,))
+            row = await cursor.fetchone()
             if row:
-                return Comment(**row)
+                return trusted(Comment, row)
             return None    
 
     @staticmethod
-    def get_comments_by_opinion_id(opinion_id: int, limit: int = 50) -> List[Comment]:
+    async def get_comments_by_opinion_id(opinion_id: int, limit: int = 50) -> List[Comment]:
         """Get list of comments for an opinion"""
         query = """
             SELECT c.*, u.username
@@ -291,14 +878,14 @@ class OpinionService:
             LIMIT %s
         """
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (opinion_id, limit))
-            rows = cursor.fetchall()
-            return [Comment(**row) for row in rows]
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute(query, (opinion_id, limit))
+            rows = await cursor.fetchall()
+            return [trusted(Comment, row) for row in rows]
     
     
     @staticmethod
-    def vote_opinion(opinion_id: int, user_id: int, vote_data: VoteCreate) -> bool:
+    async def vote_opinion(opinion_id: int, user_id: int, vote_data: VoteCreate) -> bool:
         """Vote on an opinion"""
         query = """
             INSERT INTO votes (opinion_id, user_id, vote_type)
@@ -307,8 +894,32 @@ class OpinionService:
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (opinion_id, user_id, vote_data.vote_type.value))
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(query, (opinion_id, user_id, vote_data.vote_type.value))
+
+                # Keep opinions.upvotes/downvotes in step. Affected rows of
+                # INSERT ... ON DUPLICATE KEY UPDATE: 1 = new vote,
+                # 2 = vote type changed, 0 = same vote again
+                column, other = VOTE_COUNTER_COLUMNS[vote_data.vote_type]
+                if cursor.rowcount == 1:
+                    await cursor.execute(
+                        f"""UPDATE opinions
+                            SET {column} = {column} + 1, hot_score = hot_score + %s,
+                                updated_at = updated_at
+                            WHERE id = %s""",
+                        (HOT_VOTE_POINTS, opinion_id)
+                    )
+                    await TrendingService.record_activity(cursor, opinion_id, HOT_VOTE_POINTS)
+                elif cursor.rowcount == 2:
+                    await cursor.execute(
+                        f"""UPDATE opinions
+                            SET {column} = {column} + 1, {other} = GREATEST({other} - 1, 0),
+                                updated_at = updated_at
+                            WHERE id = %s""",
+                        (opinion_id,)
+                    )
+                if cursor.rowcount > 0:
+                    after_commit(lambda: invalidate_opinion(opinion_id, sorts=["upvotes", "hot"]))
                 return True
         except Exception as e:
             print(f"Error voting: {e}")
@@ -316,7 +927,7 @@ class OpinionService:
 
     
     @staticmethod
-    def collect_opinion(opinion_id: int, user_id: int) -> bool:
+    async def collect_opinion(opinion_id: int, user_id: int) -> bool:
         """Add opinion to user's collection"""
         query = """
             INSERT INTO collections (opinion_id, user_id)
@@ -324,39 +935,42 @@ class OpinionService:
         """
 
         try:
-            with get_db_cursor() as cursor:
-                cursor.execute(query, (opinion_id, user_id))
+            async with get_async_db_cursor() as cursor:
+                await cursor.execute(query, (opinion_id, user_id))
+                after_commit(lambda: invalidate_totals("bookmarks", user_id))
                 return True
         except Exception:
             return False
 
     @staticmethod
-    def uncollect_opinion(opinion_id: int, user_id: int) -> bool:
+    async def uncollect_opinion(opinion_id: int, user_id: int) -> bool:
         """Remove opinion from user's collection"""
         query = "DELETE FROM collections WHERE opinion_id = %s AND user_id = %s"
 
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (opinion_id, user_id))
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (opinion_id, user_id))
+            after_commit(lambda: invalidate_totals("bookmarks", user_id))
             return cursor.rowcount > 0
 
     @staticmethod
-    def is_collected(opinion_id: int, user_id: int) -> bool:
+    async def is_collected(opinion_id: int, user_id: int) -> bool:
         """Check if user has collected the opinion"""
         query = """
             SELECT 1 FROM collections
             WHERE opinion_id = %s AND user_id = %s
             LIMIT 1
         """
-        with get_db_cursor() as cursor:
-            cursor.execute(query, (opinion_id, user_id))
-            row = cursor.fetchone()
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute(query, (opinion_id, user_id))
+            row = await cursor.fetchone()
             return row is not None
     
     @staticmethod
-    def get_bookmarked_opinions(
+    async def get_bookmarked_opinions(
         user_id: int,
         page: int = 1,
-        page_size: int = 5
+        page_size: int = 5,
+        total_mode: str = TOTAL_EXACT
     ) -> OpinionList:
         """Get paginated list of opinions bookmarked by user"""
         offset = (page - 1) * page_size
@@ -372,30 +986,9 @@ class OpinionService:
         # 2) 再拿實際資料
         data_query = """
             SELECT 
-                o.*, 
+                o.*,    -- 含 upvotes / downvotes / comment_count 計數欄位
                 u.username,
-                u.full_name AS user_full_name,
-                -- like 數量
-                (
-                    SELECT COUNT(*) 
-                    FROM votes v 
-                    WHERE v.opinion_id = o.id 
-                      AND v.vote_type = %s
-                ) AS upvotes,
-                -- support 數量
-                (
-                    SELECT COUNT(*) 
-                    FROM votes v 
-                    WHERE v.opinion_id = o.id 
-                      AND v.vote_type = %s
-                ) AS downvotes,
-                -- 留言數
-                (
-                    SELECT COUNT(*) 
-                    FROM comments cmt
-                    WHERE cmt.opinion_id = o.id
-                      AND cmt.is_deleted = FALSE
-                ) AS comment_count
+                u.full_name AS user_full_name
             FROM collections c
             JOIN opinions o ON c.opinion_id = o.id
             JOIN users u ON o.user_id = u.id
@@ -404,41 +997,34 @@ class OpinionService:
             LIMIT %s OFFSET %s
         """
 
-        with get_db_cursor() as cursor:
-            # total
-            cursor.execute(count_query, (user_id,))
-            total = cursor.fetchone()['total']
+        async with get_async_db_read_cursor() as cursor:
+            # total (快取，收藏/取消收藏時失效)
+            total, estimated = await fetch_total(
+                cursor, ("bookmarks", user_id), count_query, (user_id,), total_mode
+            )
 
-            # data
-            cursor.execute(
+            # data (多取一筆判斷是否還有下一頁)
+            await cursor.execute(
                 data_query,
                 (
-                    VoteType.LIKE.value,      # 'like'
-                    VoteType.DISLIKE.value,    # 'support'
                     user_id,
-                    page_size,
+                    page_size + 1,
                     offset,
                 )
             )
-            rows = cursor.fetchall()
-
-            # 補 tags
-            for row in rows:
-                cursor.execute(
-                    """
-                    SELECT t.name 
-                    FROM tags t
-                    JOIN opinion_tags ot ON t.id = ot.tag_id
-                    WHERE ot.opinion_id = %s
-                    """,
-                    (row['id'],)
-                )
-                row['tags'] = [r['name'] for r in cursor.fetchall()]
+            rows = await cursor.fetchall()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+
+            # 補 tags / media (整頁各一次查詢)
+            await OpinionService._attach_tags_and_media(cursor, rows)
 
-            items = [OpinionWithUser(**row) for row in rows]
+            items = [trusted(OpinionWithUser, row) for row in rows]
 
             return OpinionList(
                 total=total,
+                total_estimated=estimated,
+                has_more=has_more,
                 page=page,
                 page_size=page_size,
                 items=items
@@ -446,21 +1032,182 @@ class OpinionService:
 
 
     @staticmethod
-    def _add_tags(cursor, opinion_id: int, tag_names: List[str]):
-        """Helper to add tags to opinion"""
-        for tag_name in tag_names:
-            # Insert tag if not exists
-            cursor.execute(
-                "INSERT IGNORE INTO tags (name) VALUES (%s)",
-                (tag_name,)
+    async def _attach_tags_and_media(cursor, rows: List[dict],
+                                     tags: bool = True, media: bool = True):
+        """
+        Fill `tags` and `media` of opinion rows in place
+
+        One query for the tags and one for the media of all rows,
+        whatever the page size; either can be skipped.
+        """
+        if not rows:
+            return
+
+        ids = [row['id'] for row in rows]
+        placeholders = ", ".join(["%s"] * len(ids))
+        by_id = {row['id']: row for row in rows}
+        for row in rows:
+            if tags:
+                row['tags'] = []
+            if media:
+                row['media'] = []
+
+        if tags:
+            await cursor.execute(
+                f"""SELECT ot.opinion_id, t.name FROM tags t
+                    JOIN opinion_tags ot ON t.id = ot.tag_id
+                    WHERE ot.opinion_id IN ({placeholders})""",
+                ids
             )
+            for tag in await cursor.fetchall():
+                by_id[tag['opinion_id']]['tags'].append(tag['name'])
+
+        if not media:
+            return
 
-            # Get tag ID
-            cursor.execute("SELECT id FROM tags WHERE name = %s", (tag_name,))
-            tag_id = cursor.fetchone()['id']
+        await cursor.execute(
+            f"""
+            SELECT 
+                id,
+                opinion_id,
+                media_type,
+                file_path,
+                file_size,
+                mime_type,
+                created_at
+            FROM opinion_media
+            WHERE opinion_id IN ({placeholders})
+            ORDER BY created_at ASC
+            """,
+            ids
+        )
+        for m in await cursor.fetchall():
+            # Process media filename/url/thumbnail_url
+            filename = m["file_path"].split("/")[-1]
+            m["filename"] = filename
+            m["url"] = f"uploads/{m['media_type']}/{filename}"
+            if m["media_type"] == "image":
+                m["thumbnail_url"] = f"uploads/thumbnails/{filename}"
+            else:
+                m["thumbnail_url"] = None
+            by_id[m['opinion_id']]['media'].append(m)
+
+    @staticmethod
+    async def reconcile_counters(batch_size: int = 1000) -> int:
+        """
+        Repair drift in the upvotes/downvotes/comment_count columns
+
+        Walks opinions in id ranges of `batch_size`, one short transaction
+        per range. Cached details and list pages of corrected opinions
+        are dropped after each commit. Returns the number of opinions
+        that were corrected.
+        """
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM opinions")
+            max_id = (await cursor.fetchone())['max_id']
+
+        repaired = 0
+        for start in range(1, max_id + 1, batch_size):
+            end = start + batch_size - 1
+            async with get_async_db_cursor(track_writes=False) as cursor:
+                await cursor.execute(RECONCILE_DRIFT_QUERY, (start, end) * 3)
+                drifted = [row['id'] for row in await cursor.fetchall()]
+                if not drifted:
+                    continue
+                await cursor.execute(
+                    RECONCILE_COUNTERS_QUERY.format(ids=", ".join(["%s"] * len(drifted))),
+                    (start, end) * 3 + tuple(drifted)
+                )
+                repaired += max(cursor.rowcount, 0)
+                # Cached details, pages and their ETags still show the drifted values
+                for opinion_id in drifted:
+                    after_commit(partial(
+                        invalidate_opinion, opinion_id, sorts=["upvotes", "comment_count"]
+                    ))
+
+        if repaired:
+            print(f"[Counters] Reconciled counters of {repaired} opinions")
+        return repaired
+
+    @staticmethod
+    async def flush_view_counts() -> int:
+        """
+        Write buffered views to opinions.view_count
+
+        One UPDATE ... CASE per chunk of opinions, in a single
+        transaction. Counts are put back into the buffer if the write
+        fails. Responses keep adding them until the commit, and cached
+        details are then updated in place (not invalidated, which would
+        drop every detail load in flight). Returns the number of views
+        written.
+        """
+        counts = view_buffer.take_pending()
+        if not counts:
+            return 0
+
+        try:
+            async with get_async_db_cursor(track_writes=False) as cursor:
+                for query, params in view_buffer.build_flush_queries(counts):
+                    await cursor.execute(query, params)
+        except Exception as e:
+            view_buffer.restore(counts)
+            print(f"[Views] Flushing view counts failed: {e}")
+            raise
+
+        # Cached details hold the old view_count (the flushed views were
+        # added on top of it until now)
+        for opinion_id, count in counts.items():
+            detail_cache.update(opinion_id, partial(_add_views, count=count))
+        view_buffer.finish_flush(counts)
+        return sum(counts.values())
+
+    @staticmethod
+    async def _add_tags(cursor, opinion_id: int, tag_names: List[str]):
+        """
+        Helper to add tags to opinion
+
+        Ids of known tags come from tag_id_cache; the other names are
+        inserted and looked up with one statement each, and all links are
+        written with one multi-row insert.
+        """
+        # Names compare case-insensitively (utf8mb4_unicode_ci)
+        names = {}
+        for tag_name in tag_names:
+            tag_name = (tag_name or "").strip()
+            if tag_name:
+                names.setdefault(tag_name.lower(), tag_name)
+        if not names:
+            return
+
+        tag_ids = {}
+        missing = []
+        for key in names:
+            tag_id = tag_id_cache.get(key)
+            if tag_id is None:
+                missing.append(names[key])
+            else:
+                tag_ids[key] = tag_id
+
+        if missing:
+            await cursor.execute(
+                f"INSERT IGNORE INTO tags (name) VALUES {', '.join(['(%s)'] * len(missing))}",
+                missing
+            )
+            await cursor.execute(
+                f"SELECT id, name FROM tags WHERE name IN ({', '.join(['%s'] * len(missing))})",
+                missing
+            )
+            found = {row['name'].lower(): row['id'] for row in await cursor.fetchall()}
+            tag_ids.update(found)
+            # Ids of tags inserted here only exist once the opinion commits
+            after_commit(lambda: [tag_id_cache.set(key, tag_id) for key, tag_id in found.items()])
 
-            # Link tag to opinion
-            cursor.execute(
-                "INSERT IGNORE INTO opinion_tags (opinion_id, tag_id) VALUES (%s, %s)",
-                (opinion_id, tag_id)
-            )
\ No newline at end of file
+        links = [(opinion_id, tag_ids[key]) for key in names if key in tag_ids]
+        if len(links) < len(names):
+            print(f"[Tags] Could not resolve some tags of opinion {opinion_id}: {list(names.values())}")
+        if not links:
+            return
+        await cursor.execute(
+            f"INSERT IGNORE INTO opinion_tags (opinion_id, tag_id) VALUES {', '.join(['(%s, %s)'] * len(links))}",
+            [value for link in links for value in link]
+        )
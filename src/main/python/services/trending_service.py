@@ -0,0 +1,91 @@
+"""
+Trending service: time-decayed hot score behind sort_by=hot
+"""
+
+import os
+from ..utils.database import get_async_db_cursor
+from ..utils import page_cache
+
+
+# Points an interaction adds to an opinion's hot score
+HOT_VOTE_POINTS = 1
+HOT_COMMENT_POINTS = 2
+# Hours after which an interaction counts half
+HOT_HALF_LIFE_HOURS = float(os.getenv("HOT_HALF_LIFE_HOURS", "12"))
+# Interactions older than this no longer count (their buckets are dropped)
+HOT_WINDOW_HOURS = int(os.getenv("HOT_WINDOW_HOURS", "72"))
+
+# Adds points to the opinion's bucket for the current hour
+RECORD_ACTIVITY = """
+    INSERT INTO opinion_activity (opinion_id, bucket_start, points)
+    VALUES (%s, TIMESTAMP(CURDATE(), MAKETIME(HOUR(NOW()), 0, 0)), %s)
+    ON DUPLICATE KEY UPDATE points = points + VALUES(points)
+"""
+
+# Re-decays the score of every opinion with buckets inside the window
+REFRESH_SCORES = """
+    UPDATE opinions o
+    JOIN (
+        SELECT opinion_id,
+               SUM(points * POW(0.5, TIMESTAMPDIFF(MINUTE, bucket_start, NOW()) / %s)) AS score
+        FROM opinion_activity
+        WHERE bucket_start >= NOW() - INTERVAL %s HOUR
+        GROUP BY opinion_id
+    ) a ON a.opinion_id = o.id
+    SET o.hot_score = a.score, o.updated_at = o.updated_at
+"""
+
+# Zeroes opinions whose last buckets are about to leave the window
+EXPIRE_SCORES = """
+    UPDATE opinions o
+    JOIN (
+        SELECT DISTINCT opinion_id
+        FROM opinion_activity
+        WHERE bucket_start < NOW() - INTERVAL %s HOUR
+    ) old ON old.opinion_id = o.id
+    SET o.hot_score = 0, o.updated_at = o.updated_at
+    WHERE NOT EXISTS (
+        SELECT 1 FROM opinion_activity a
+        WHERE a.opinion_id = o.id AND a.bucket_start >= NOW() - INTERVAL %s HOUR
+    )
+"""
+
+
+class TrendingService:
+    """Service for the hot ranking"""
+
+    @staticmethod
+    async def record_activity(cursor, opinion_id: int, points: int):
+        """
+        Count an interaction in the caller's transaction
+
+        Only the hourly bucket is written here; the caller adds `points`
+        to opinions.hot_score in its own counter UPDATE, so the feed
+        reacts at once and refresh_scores() applies the decay later.
+        """
+        await cursor.execute(RECORD_ACTIVITY, (opinion_id, points))
+
+    @staticmethod
+    async def refresh_scores() -> int:
+        """
+        Recompute hot_score from the activity buckets
+
+        Applies the time decay to every opinion active within
+        HOT_WINDOW_HOURS, zeroes the ones that went quiet and drops
+        expired buckets. Runs in the leader worker only; the other
+        workers' cached hot pages catch up within PAGE_CACHE_TTL.
+        Returns the number of scores updated.
+        """
+        async with get_async_db_cursor(track_writes=False) as cursor:
+            await cursor.execute(REFRESH_SCORES, (HOT_HALF_LIFE_HOURS * 60, HOT_WINDOW_HOURS))
+            refreshed = max(cursor.rowcount, 0)
+            await cursor.execute(EXPIRE_SCORES, (HOT_WINDOW_HOURS, HOT_WINDOW_HOURS))
+            refreshed += max(cursor.rowcount, 0)
+            await cursor.execute(
+                "DELETE FROM opinion_activity WHERE bucket_start < NOW() - INTERVAL %s HOUR",
+                (HOT_WINDOW_HOURS,)
+            )
+
+        # Every score moved, so every cached hot page is out of order
+        page_cache.invalidate_pages(sorts=["hot"])
+        return refreshed
@@ -1,6 +1,12 @@
 """Utility functions and helpers"""
 
-from .database import get_db_connection, get_db_cursor, init_database
+from .database import (
+    get_db_connection,
+    get_db_cursor,
+    get_async_db_connection,
+    get_async_db_cursor,
+    init_database
+)
 from .security import (
     hash_password,
     verify_password,
@@ -12,6 +18,8 @@ from .security import (
 __all__ = [
     'get_db_connection',
     'get_db_cursor',
+    'get_async_db_connection',
+    'get_async_db_cursor',
     'init_database',
     'hash_password',
     'verify_password',
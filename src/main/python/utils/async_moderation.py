@@ -51,7 +51,7 @@ async def process_opinion_moderation(
 
         # 如果文本審核就被拒絕，直接更新狀態並返回
         if text_result['decision'] == ModerationDecision.REJECT:
-            AIContentModerationService.update_opinion_moderation_status(
+            await AIContentModerationService.update_opinion_moderation_status(
                 opinion_id=opinion_id,
                 auto_moderation_status='rejected',
                 auto_moderation_score=text_result['confidence'],
@@ -75,7 +75,7 @@ async def process_opinion_moderation(
 
             # 如果多媒體審核被拒絕
             if media_result['overall_decision'] == ModerationDecision.REJECT:
-                AIContentModerationService.update_opinion_moderation_status(
+                await AIContentModerationService.update_opinion_moderation_status(
                     opinion_id=opinion_id,
                     auto_moderation_status='rejected',
                     auto_moderation_score=media_result['overall_confidence'],
@@ -109,7 +109,7 @@ async def process_opinion_moderation(
         auto_moderation_status = status_mapping.get(final_decision, 'pending')
 
         # 4. 更新意見的審核狀態
-        AIContentModerationService.update_opinion_moderation_status(
+        await AIContentModerationService.update_opinion_moderation_status(
             opinion_id=opinion_id,
             auto_moderation_status=auto_moderation_status,
             auto_moderation_score=text_result['confidence'],
@@ -125,7 +125,7 @@ async def process_opinion_moderation(
         print(f"[AI Moderation] Error processing opinion {opinion_id}: {e}")
         # 發生錯誤時，標記需要人工審核
         try:
-            AIContentModerationService.update_opinion_moderation_status(
+            await AIContentModerationService.update_opinion_moderation_status(
                 opinion_id=opinion_id,
                 auto_moderation_status='reviewing',
                 auto_moderation_score=0.0,
@@ -0,0 +1,18 @@
+"""
+Rendered category responses
+
+Categories change only through SQL maintenance, never through the API,
+and every client fetches them on start-up. The rendered GET /categories
+bodies are kept with their ETag for CATEGORY_CACHE_TTL seconds, so a
+revalidation costs neither a query nor serialization.
+"""
+
+import os
+
+from .cache import TTLCache
+
+
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "300"))
+
+# "all" or category id -> utils.etag.RenderedBody
+category_cache = TTLCache("categories", maxsize=256, ttl=CATEGORY_CACHE_TTL)
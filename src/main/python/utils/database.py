@@ -3,12 +3,20 @@ Database connection and utilities
 """
 
 import os
-from contextlib import contextmanager
-from typing import Generator, Optional
+import re
+import time
+import asyncio
+import itertools
+import threading
+from contextvars import ContextVar
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Sequence, Tuple, Union
 import mysql.connector
 from mysql.connector import pooling
 from mysql.connector.pooling import PooledMySQLConnection
 from dotenv import load_dotenv
+from .db_pool import ElasticConnectionPool, RESET_DIRTY
+from . import query_stats
 
 # Load environment variables from .env file
 load_dotenv()
@@ -23,21 +31,44 @@ class DatabaseConfig:
     DATABASE = os.getenv("DB_NAME", "citizen_app")
     POOL_NAME = "citizen_app_pool"
     POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+    POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
+    # "dirty": reset sessions only when a connection changed session state
+    # or failed; "always": reset on every return (extra round trip)
+    POOL_RESET_MODE = os.getenv("DB_POOL_RESET_MODE", RESET_DIRTY)
+    POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
 
+    # Read replicas: comma separated "host[:port]" list (empty = primary only)
+    REPLICA_HOSTS = [h.strip() for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h.strip()]
+    REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", os.getenv("DB_POOL_SIZE", "5")))
+    # Seconds a user's reads stay on the primary after they wrote
+    REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+    # Seconds a replica is skipped after a failed checkout
+    REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
 
-# Create connection pool
-connection_pool = pooling.MySQLConnectionPool(
-    pool_name=DatabaseConfig.POOL_NAME,
-    pool_size=DatabaseConfig.POOL_SIZE,
-    pool_reset_session=True,
-    host=DatabaseConfig.HOST,
-    port=DatabaseConfig.PORT,
-    user=DatabaseConfig.USER,
-    password=DatabaseConfig.PASSWORD,
-    database=DatabaseConfig.DATABASE,
-    charset='utf8mb4',
-    collation='utf8mb4_unicode_ci'
-)
+    # Statements slower than this (ms) are logged (0 = off)
+    SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+    # Same statement this many times in one request is flagged as N+1 (0 = off)
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+
+
+# Primary connection pool, created on first use (see get_connection_pool)
+_connection_pool: Optional[ElasticConnectionPool] = None
+_connection_pool_lock = threading.Lock()
+
+# Replica pools, created on first read (see _get_replica_pools)
+_replica_pools: Optional[List[ElasticConnectionPool]] = None
+_replica_down_until: Dict[int, float] = {}
+_replica_cycle = itertools.count()
+
+# Read-your-writes bookkeeping
+_request_user_id: ContextVar[Optional[int]] = ContextVar("db_request_user_id", default=None)
+_request_wrote: ContextVar[bool] = ContextVar("db_request_wrote", default=False)
+_recent_writers: Dict[int, float] = {}
+_recent_writers_lock = threading.Lock()
+
+_WRITE_STATEMENT = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
 
 # 測試用連接池 (用於測試時覆蓋)
 _test_connection_pool: Optional[pooling.MySQLConnectionPool] = None
@@ -49,9 +80,216 @@ def set_test_connection_pool(pool: Optional[pooling.MySQLConnectionPool]):
     _test_connection_pool = pool
 
 
-def _get_connection_pool() -> pooling.MySQLConnectionPool:
+def get_connection_pool() -> ElasticConnectionPool:
+    """
+    Get the primary connection pool, creating it on first use
+
+    Importing this module never touches the network; nothing connects
+    until the first checkout (or init_connection_pool at startup).
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        with _connection_pool_lock:
+            if _connection_pool is None:
+                _connection_pool = _build_pool(
+                    DatabaseConfig.POOL_NAME, DatabaseConfig.HOST, DatabaseConfig.PORT,
+                    DatabaseConfig.POOL_SIZE
+                )
+    return _connection_pool
+
+
+def _build_pool(name: str, host: str, port: int, size: int, **extra) -> ElasticConnectionPool:
+    return ElasticConnectionPool(
+        pool_name=name,
+        pool_size=size,
+        max_overflow=DatabaseConfig.POOL_MAX_OVERFLOW,
+        timeout=DatabaseConfig.POOL_TIMEOUT,
+        reset_mode=DatabaseConfig.POOL_RESET_MODE,
+        ping_interval=DatabaseConfig.POOL_PING_INTERVAL,
+        host=host,
+        port=port,
+        user=DatabaseConfig.USER,
+        password=DatabaseConfig.PASSWORD,
+        database=DatabaseConfig.DATABASE,
+        charset='utf8mb4',
+        collation='utf8mb4_unicode_ci',
+        **extra
+    )
+
+
+def _get_replica_pools() -> List[ElasticConnectionPool]:
+    """Create one pool per DB_REPLICA_HOSTS entry on first use"""
+    global _replica_pools
+    if _replica_pools is None:
+        with _connection_pool_lock:
+            if _replica_pools is None:
+                pools = []
+                for i, entry in enumerate(DatabaseConfig.REPLICA_HOSTS):
+                    host, _, port = entry.partition(":")
+                    pools.append(_build_pool(
+                        f"{DatabaseConfig.POOL_NAME}_replica{i}", host,
+                        int(port or DatabaseConfig.PORT), DatabaseConfig.REPLICA_POOL_SIZE,
+                        # Reads never need a transaction; avoids COMMIT/reset round trips
+                        autocommit=True
+                    ))
+                _replica_pools = pools
+    return _replica_pools
+
+
+def init_connection_pool(warmup: Optional[int] = None) -> int:
+    """
+    Create the primary pool and open `warmup` connections up front
+
+    Meant for the application startup hook. Returns the number of
+    connections opened (DB_POOL_WARMUP when warmup is None).
+    """
+    if _test_connection_pool is not None:
+        return 0
+    count = DatabaseConfig.POOL_WARMUP if warmup is None else warmup
+    return get_connection_pool().warmup(count)
+
+
+def ping_idle_connections() -> int:
+    """Ping idle pooled connections and drop dead ones (periodic task)"""
+    if _test_connection_pool is not None:
+        return 0
+    pools = ([_connection_pool] if _connection_pool is not None else []) + (_replica_pools or [])
+    return sum(pool.ping_idle() for pool in pools)
+
+
+def bind_request_user(user_id: Optional[int]):
+    """
+    Remember which user the current request acts for
+
+    Used for read-your-writes: after a user writes, their reads are
+    routed to the primary for DB_REPLICA_STICKY_SECONDS.
+    """
+    _request_user_id.set(user_id)
+
+
+def _note_primary_write():
+    """Record that the current request (and its user) wrote to the primary"""
+    _request_wrote.set(True)
+    user_id = _request_user_id.get()
+    if user_id is not None and DatabaseConfig.REPLICA_HOSTS:
+        now = time.monotonic()
+        with _recent_writers_lock:
+            _recent_writers[user_id] = now + DatabaseConfig.REPLICA_STICKY_SECONDS
+            # Keep the map small: drop expired entries now and then
+            if len(_recent_writers) > 10000:
+                for uid, expires in list(_recent_writers.items()):
+                    if expires <= now:
+                        del _recent_writers[uid]
+
+
+def _reads_pinned_to_primary() -> bool:
+    if _request_wrote.get():
+        return True
+    user_id = _request_user_id.get()
+    if user_id is None:
+        return False
+    with _recent_writers_lock:
+        expires = _recent_writers.get(user_id)
+    return expires is not None and expires > time.monotonic()
+
+
+def _read_replicas() -> List[Tuple[int, ElasticConnectionPool]]:
+    """Replicas to try for a read, in round-robin order (empty: use the primary)"""
+    if _test_connection_pool is not None or _reads_pinned_to_primary():
+        return []
+    replicas = _get_replica_pools()
+    if not replicas:
+        return []
+    start = next(_replica_cycle)
+    now = time.monotonic()
+    candidates = []
+    for offset in range(len(replicas)):
+        index = (start + offset) % len(replicas)
+        if _replica_down_until.get(index, 0) <= now:
+            candidates.append((index, replicas[index]))
+    return candidates
+
+
+def _replica_failed(index: int, error: Exception):
+    print(f"[DB] Replica {index} unavailable, falling back: {error}")
+    _replica_down_until[index] = time.monotonic() + DatabaseConfig.REPLICA_RETRY_SECONDS
+
+
+def _checkout_read_connection() -> Tuple[Any, bool]:
+    """
+    Check out a connection for a read-only query (blocking)
+
+    Returns (connection, from_replica). Replicas are used round robin;
+    a replica whose checkout fails is skipped for DB_REPLICA_RETRY_SECONDS
+    and the primary is the final fallback.
+    """
+    for index, replica in _read_replicas():
+        try:
+            return replica.get_connection(), True
+        except Exception as e:
+            _replica_failed(index, e)
+
+    return _get_connection_pool().get_connection(), False
+
+
+async def _checkout_async(pool) -> Any:
+    """Check a connection out of `pool` without tying up an executor thread while waiting"""
+    if isinstance(pool, ElasticConnectionPool):
+        return await pool.get_connection_async()
+    # mysql.connector's pool (tests) fails at once instead of waiting
+    return await asyncio.to_thread(pool.get_connection)
+
+
+async def _checkout_read_connection_async() -> Tuple[Any, bool]:
+    """Async counterpart of _checkout_read_connection"""
+    for index, replica in _read_replicas():
+        try:
+            return await replica.get_connection_async(), True
+        except Exception as e:
+            _replica_failed(index, e)
+
+    return await _checkout_async(_get_connection_pool()), False
+
+
+def _mark_dirty(connection):
+    """Ask the pool to reset this connection's session when it is returned"""
+    mark_dirty = getattr(connection, "mark_dirty", None)
+    if mark_dirty is not None:
+        mark_dirty()
+
+
+def close_connection_pool():
+    """Close idle connections of the primary and replica pools (shutdown hook)"""
+    if _connection_pool is not None:
+        _connection_pool.close_idle()
+    for pool in _replica_pools or []:
+        pool.close_idle()
+
+
+def _get_connection_pool() -> Union[ElasticConnectionPool, pooling.MySQLConnectionPool]:
     """獲取當前連接池 (測試模式下返回測試連接池)"""
-    return _test_connection_pool if _test_connection_pool is not None else connection_pool
+    if _test_connection_pool is not None:
+        return _test_connection_pool
+    return get_connection_pool()
+
+
+def get_pool_stats() -> dict:
+    """
+    Live statistics of the active connection pool
+
+    Returns in-use/idle/waiting counts, checkout failures and the
+    checkout wait-time histogram (see ElasticConnectionPool.stats).
+    """
+    pool = _get_connection_pool()
+    if not isinstance(pool, ElasticConnectionPool):
+        return {"pool_name": pool.pool_name, "pool_size": pool.pool_size}
+
+    stats = pool.stats()
+    stats["replicas"] = [
+        dict(replica.stats(), down=_replica_down_until.get(i, 0) > time.monotonic())
+        for i, replica in enumerate(_replica_pools or [])
+    ]
+    return stats
 
 
 @contextmanager 
@@ -86,17 +324,415 @@ def get_db_cursor(dictionary=True):
             users = cursor.fetchall()
     """
     with get_db_connection() as conn:
-        cursor = conn.cursor(dictionary=dictionary)
+        cursor = InstrumentedCursor(conn.cursor(dictionary=dictionary))
         try:
             yield cursor
             conn.commit()
         except Exception:
+            _mark_dirty(conn)
             conn.rollback()
             raise
         finally:
             cursor.close()
 
 
+class InstrumentedCursor:
+    """
+    Cursor proxy that times every statement
+
+    Timing, row count and fingerprint go to utils.query_stats, which keeps
+    per-fingerprint aggregates, the slow-query log and N+1 detection.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._record(operation, started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._record(operation, started)
+
+    def _record(self, operation, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        try:
+            rowcount = self._cursor.rowcount
+        except Exception:
+            rowcount = None
+        query_stats.record(operation, elapsed_ms, rowcount, DatabaseConfig.SLOW_QUERY_MS)
+
+
+class AsyncCursor:
+    """
+    Awaitable wrapper around a buffered MySQL cursor
+
+    Statements run in a worker thread so the event loop is never blocked
+    by a MySQL round trip. The wrapped cursor is buffered, so fetch calls
+    only read rows that are already in memory.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.wrote = False
+
+    async def execute(self, operation: str, params: Optional[Sequence[Any]] = None):
+        if not self.wrote and _WRITE_STATEMENT.match(operation):
+            self.wrote = True
+        await asyncio.to_thread(self._cursor.execute, operation, params)
+
+    async def executemany(self, operation: str, seq_params: Sequence[Sequence[Any]]):
+        if not self.wrote and _WRITE_STATEMENT.match(operation):
+            self.wrote = True
+        await asyncio.to_thread(self._cursor.executemany, operation, seq_params)
+
+    async def fetchone(self) -> Optional[Any]:
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size: int = 1) -> List[Any]:
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self) -> List[Any]:
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class AsyncStreamingCursor(AsyncCursor):
+    """
+    AsyncCursor over an unbuffered (server-side) cursor
+
+    Rows stay on the server until they are fetched, so a large result
+    can be read in chunks with constant memory. Every fetch is a network
+    read and runs in a worker thread.
+    """
+
+    async def fetchone(self) -> Optional[Any]:
+        return await asyncio.to_thread(self._cursor.fetchone)
+
+    async def fetchmany(self, size: int = 1) -> List[Any]:
+        return await asyncio.to_thread(self._cursor.fetchmany, size)
+
+    async def fetchall(self) -> List[Any]:
+        return await asyncio.to_thread(self._cursor.fetchall)
+
+
+@asynccontextmanager
+async def get_async_db_connection() -> AsyncGenerator[PooledMySQLConnection, None]:
+    """
+    Get database connection from pool without blocking the event loop
+
+    Usage:
+        async with get_async_db_connection() as conn:
+            ...
+    """
+    connection = await _checkout_async(_get_connection_pool())
+    try:
+        yield connection
+    finally:
+        await asyncio.to_thread(connection.close)
+
+
+class UnitOfWork:
+    """
+    One connection and one transaction shared by everything that runs
+    inside `async with unit_of_work()`
+
+    Cursors opened with get_async_db_cursor / get_async_db_read_cursor
+    while a unit of work is active join it instead of checking out their
+    own connection, so nested service calls reuse the caller's connection
+    and transaction. Statements of a joined unit of work run one at a
+    time: do not issue queries concurrently (asyncio.gather) inside it.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.wrote = False
+        self.pin_reads = False
+        self._savepoints = 0
+        # Cursors still open on this connection (their writes are pending)
+        self._open_cursors: List[AsyncCursor] = []
+        self._after_commit: List[Callable[[], Any]] = []
+
+    def has_writes(self) -> bool:
+        return self.wrote or any(cursor.wrote for cursor in self._open_cursors)
+
+    def _execute(self, operation: str):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(operation)
+        finally:
+            cursor.close()
+
+    @asynccontextmanager
+    async def cursor(self, dictionary=True, track_writes=True,
+                     joined=True, read_only=False) -> AsyncGenerator[AsyncCursor, None]:
+        """
+        Cursor on the unit-of-work connection
+
+        A joined block that fails is undone on its own (to a savepoint
+        when earlier blocks already wrote), so a caller that catches the
+        error keeps its own writes. The savepoint round trip is only paid
+        when there is something to protect.
+        """
+        savepoint = None
+        if joined and not read_only and self.has_writes():
+            self._savepoints += 1
+            savepoint = f"uow_{self._savepoints}"
+            await asyncio.to_thread(self._execute, f"SAVEPOINT {savepoint}")
+
+        cursor = AsyncCursor(InstrumentedCursor(
+            self.connection.cursor(dictionary=dictionary, buffered=True)
+        ))
+        self._open_cursors.append(cursor)
+        try:
+            yield cursor
+        except Exception:
+            if savepoint:
+                await asyncio.to_thread(self._execute, f"ROLLBACK TO SAVEPOINT {savepoint}")
+            elif joined and not read_only:
+                _mark_dirty(self.connection)
+                await asyncio.to_thread(self.connection.rollback)
+            raise
+        finally:
+            self._open_cursors.remove(cursor)
+            cursor.close()
+
+        if cursor.wrote:
+            self.wrote = True
+            if track_writes:
+                self.pin_reads = True
+
+
+_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar("db_unit_of_work", default=None)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    """
+    Run a block on a single connection and transaction
+
+    The outermost block checks out the connection and commits (or rolls
+    back on error) when it exits; nested blocks, and every async cursor
+    opened inside, join it.
+
+    Usage:
+        async with unit_of_work():
+            opinion_id = await create(...)
+            return await OpinionService.get_opinion_by_id(opinion_id)
+    """
+    current = _unit_of_work.get()
+    if current is not None:
+        yield current
+        return
+
+    async with get_async_db_connection() as conn:
+        uow = UnitOfWork(conn)
+        token = _unit_of_work.set(uow)
+        try:
+            yield uow
+            await asyncio.to_thread(conn.commit)
+            if uow.pin_reads:
+                _note_primary_write()
+        except Exception:
+            _mark_dirty(conn)
+            await asyncio.to_thread(conn.rollback)
+            raise
+        finally:
+            _unit_of_work.reset(token)
+
+    for callback in uow._after_commit:
+        try:
+            callback()
+        except Exception as e:
+            print(f"[DB] after-commit callback failed: {e}")
+
+
+def after_commit(callback: Callable[[], Any]):
+    """
+    Run `callback` once the current unit of work has committed
+
+    Runs immediately outside a unit of work; dropped if the unit of work
+    rolls back. Used for cache invalidation, so readers cannot re-cache
+    data that is not committed yet. A callback registered in a joined
+    block that rolled back to its savepoint still runs (harmless for
+    invalidation).
+    """
+    uow = _unit_of_work.get()
+    if uow is None:
+        callback()
+    else:
+        uow._after_commit.append(callback)
+
+
+def pending_writes() -> bool:
+    """True inside a unit of work that has written but not committed yet"""
+    uow = _unit_of_work.get()
+    return uow is not None and uow.has_writes()
+
+
+async def db_unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    """
+    FastAPI dependency: run the whole request in one unit of work
+
+    Usage:
+        @router.post("/...", dependencies=[Depends(db_unit_of_work)])
+    """
+    async with unit_of_work() as uow:
+        yield uow
+
+
+@asynccontextmanager
+async def get_async_db_cursor(dictionary=True, track_writes=True) -> AsyncGenerator[AsyncCursor, None]:
+    """
+    Async counterpart of get_db_cursor
+
+    Joins the active unit of work if there is one; otherwise the cursor
+    gets its own, so service calls made while it is open share its
+    connection instead of checking out another one.
+
+    Args:
+        dictionary: Return rows as dictionaries (default: True)
+        track_writes: Pin the request's/user's later reads to the primary
+            after a write (set False for bookkeeping writes such as view
+            counters that readers need not see immediately)
+
+    Usage:
+        async with get_async_db_cursor() as cursor:
+            await cursor.execute("SELECT * FROM users")
+            users = await cursor.fetchall()
+    """
+    current = _unit_of_work.get()
+    if current is not None:
+        async with current.cursor(dictionary, track_writes) as cursor:
+            yield cursor
+        return
+
+    async with unit_of_work() as uow:
+        async with uow.cursor(dictionary, track_writes, joined=False) as cursor:
+            yield cursor
+
+
+@contextmanager
+def get_db_read_cursor(dictionary=True):
+    """
+    Get a read-only cursor, served by a replica when one is configured
+
+    Falls back to the primary when no replica is configured or reachable,
+    and after the current request or user wrote (read-your-writes).
+
+    Usage:
+        with get_db_read_cursor() as cursor:
+            cursor.execute("SELECT * FROM categories")
+    """
+    conn, _ = _checkout_read_connection()
+    try:
+        cursor = InstrumentedCursor(conn.cursor(dictionary=dictionary))
+        try:
+            yield cursor
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            _mark_dirty(conn)
+            raise
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+@asynccontextmanager
+async def get_async_db_read_cursor(dictionary=True) -> AsyncGenerator[AsyncCursor, None]:
+    """
+    Async counterpart of get_db_read_cursor
+
+    Inside a unit of work it joins the unit-of-work connection, so reads
+    see the block's own uncommitted writes.
+
+    Usage:
+        async with get_async_db_read_cursor() as cursor:
+            await cursor.execute("SELECT * FROM opinions WHERE id = %s", (1,))
+            row = await cursor.fetchone()
+    """
+    current = _unit_of_work.get()
+    if current is not None:
+        async with current.cursor(dictionary, read_only=True) as cursor:
+            yield cursor
+        return
+
+    conn, _ = await _checkout_read_connection_async()
+    try:
+        cursor = AsyncCursor(InstrumentedCursor(conn.cursor(dictionary=dictionary, buffered=True)))
+        try:
+            yield cursor
+            if conn.in_transaction:
+                await asyncio.to_thread(conn.commit)
+        except Exception:
+            _mark_dirty(conn)
+            raise
+        finally:
+            cursor.close()
+    finally:
+        await asyncio.to_thread(conn.close)
+
+
+@asynccontextmanager
+async def get_async_db_stream_cursor(dictionary=True) -> AsyncGenerator[AsyncStreamingCursor, None]:
+    """
+    Read-only cursor that streams its result from the server
+
+    Served by a replica when one is configured. The connection is held
+    until the block exits, so keep the block to one long read (exports).
+    A block left before every row was read (error, cancelled request)
+    discards the connection instead of draining the rest of the result.
+
+    Usage:
+        async with get_async_db_stream_cursor() as cursor:
+            await cursor.execute("SELECT * FROM opinions")
+            while rows := await cursor.fetchmany(500):
+                ...
+    """
+    conn, _ = await _checkout_read_connection_async()
+    cursor = AsyncStreamingCursor(InstrumentedCursor(conn.cursor(dictionary=dictionary, buffered=False)))
+    try:
+        yield cursor
+        if conn.in_transaction:
+            await asyncio.to_thread(conn.commit)
+    except BaseException:
+        _mark_dirty(conn)
+        raise
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            # Unread rows left; the pool drops the connection
+            _mark_dirty(conn)
+        # Not awaited, so a cancelled request still returns the connection
+        conn.close()
+
+
 def init_database():
     """Initialize database with schema"""
     schema_file = os.path.join(
@@ -0,0 +1,475 @@
+"""
+Elastic MySQL connection pool
+
+Drop-in replacement for mysql.connector's MySQLConnectionPool. Callers
+that find the pool exhausted wait (up to a configurable timeout) for a
+connection to be returned instead of failing immediately, a bounded
+number of overflow connections can be opened under bursts, and live
+statistics are kept so the pool can be sized from real data.
+"""
+
+import asyncio
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import mysql.connector
+from mysql.connector.errors import PoolError
+
+
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Session reset policies
+RESET_ALWAYS = "always"  # reset on every return (pool_reset_session=True)
+RESET_DIRTY = "dirty"    # reset only connections that changed session state
+
+# Statements that leave state behind on the server session
+_SESSION_STATEMENT = re.compile(
+    r"^\s*(SET\b|USE\b|LOCK\s+TABLES?\b|CREATE\s+TEMPORARY\b|START\s+TRANSACTION\b|BEGIN\b)"
+    r"|GET_LOCK\s*\(",
+    re.IGNORECASE
+)
+
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection became available within the wait timeout"""
+
+
+def is_session_statement(operation: str) -> bool:
+    """True when a statement changes session state (SET, USE, locks...)"""
+    return bool(_SESSION_STATEMENT.search(operation))
+
+
+class _SessionTrackingCursor:
+    """Cursor proxy that flags its connection when session state changes"""
+
+    def __init__(self, connection: "PooledConnection", cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        if is_session_statement(operation):
+            self._connection.mark_dirty()
+        return self._cursor.execute(operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        if is_session_statement(operation):
+            self._connection.mark_dirty()
+        return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+
+    def callproc(self, procname, *args, **kwargs):
+        # The procedure body is not visible here and may SET session state
+        self._connection.mark_dirty()
+        return self._cursor.callproc(procname, *args, **kwargs)
+
+
+class PooledConnection:
+    """
+    Connection checked out of an ElasticConnectionPool
+
+    Behaves like the wrapped MySQL connection; close() hands it back to
+    the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool: "ElasticConnectionPool", cnx):
+        self._pool = pool
+        self._cnx = cnx
+        self._dirty = False
+        # Frees the async checkout slot (see get_connection_async)
+        self._release_slot: Optional[Callable[[], None]] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._cnx is None:
+            raise PoolError("Connection has been returned to the pool")
+        return getattr(self._cnx, name)
+
+    def cursor(self, *args, **kwargs):
+        if self._cnx is None:
+            raise PoolError("Connection has been returned to the pool")
+        return _SessionTrackingCursor(self, self._cnx.cursor(*args, **kwargs))
+
+    def mark_dirty(self):
+        """Force a session reset when this connection is returned"""
+        self._dirty = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Return the connection to the pool"""
+        cnx, self._cnx = self._cnx, None
+        if cnx is not None:
+            try:
+                self._pool._release(cnx, self._dirty)
+            finally:
+                if self._release_slot is not None:
+                    self._release_slot()
+
+
+class ElasticConnectionPool:
+    """
+    Thread-safe connection pool with waiting, overflow and statistics
+
+    Args:
+        pool_name: Name used in stats and error messages
+        pool_size: Connections kept open and reused
+        max_overflow: Extra connections that may be opened when all
+            pooled connections are busy; they are closed on return
+        timeout: Seconds a caller waits for a connection before
+            PoolTimeoutError is raised
+        reset_mode: RESET_ALWAYS resets the session on every return
+            (same as pool_reset_session=True); RESET_DIRTY only resets
+            connections that ran session statements, failed or were
+            returned mid-transaction, saving a round trip per checkout
+        ping_interval: Idle seconds after which a connection is pinged
+            before reuse; fresher connections are handed out unchecked
+        **connect_kwargs: Passed to mysql.connector.connect()
+    """
+
+    def __init__(self, pool_name: str = "elastic_pool", pool_size: int = 5,
+                 max_overflow: int = 10, timeout: float = 10.0,
+                 reset_mode: str = RESET_ALWAYS, ping_interval: float = 30.0,
+                 **connect_kwargs):
+        if pool_size < 1:
+            raise AttributeError("pool_size should be greater than 0")
+
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max(0, max_overflow)
+        self.timeout = timeout
+        if reset_mode not in (RESET_ALWAYS, RESET_DIRTY):
+            raise AttributeError(f"Unknown reset_mode: {reset_mode}")
+        self.reset_mode = reset_mode
+        self.ping_interval = ping_interval
+        self._connect_kwargs = connect_kwargs
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        # (connection, monotonic time it was returned)
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._size = 0
+        # Async checkout slots, one semaphore per event loop
+        self._async_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # Statistics (guarded by _lock)
+        self._in_use = 0
+        self._waiters = 0
+        self._async_waiters = 0
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._timeouts = 0
+        self._overflow_opened = 0
+        self._peak_in_use = 0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._session_resets = 0
+        self._resets_skipped = 0
+        self._pings = 0
+        self._dead_connections = 0
+
+    @property
+    def max_size(self) -> int:
+        return self.pool_size + self.max_overflow
+
+    def _open_connection(self):
+        return mysql.connector.connect(**self._connect_kwargs)
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check a connection out of the pool
+
+        Waits up to `timeout` seconds (default: the pool timeout) when
+        every connection is in use and no overflow slot is left.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        cnx = None
+        idle_since = None
+        must_open = False
+
+        with self._available:
+            while True:
+                if self._idle:
+                    cnx, idle_since = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot now, connect outside the lock
+                    self._size += 1
+                    if self._size > self.pool_size:
+                        self._overflow_opened += 1
+                    must_open = True
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError(
+                        f"Pool '{self.pool_name}' exhausted: no connection "
+                        f"available after {timeout:.1f}s"
+                    )
+                # Only callers actually blocked count as waiters
+                self._waiters += 1
+                try:
+                    self._available.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+        if must_open:
+            try:
+                cnx = self._open_connection()
+            except Exception:
+                with self._available:
+                    self._size -= 1
+                    self._checkout_failures += 1
+                    self._available.notify()
+                raise
+        elif time.monotonic() - idle_since >= self.ping_interval and not self._is_usable(cnx):
+            try:
+                cnx.reconnect()
+            except Exception:
+                self._discard(cnx)
+                with self._available:
+                    self._checkout_failures += 1
+                raise
+
+        self._record_checkout((time.monotonic() - started) * 1000)
+        return PooledConnection(self, cnx)
+
+    async def get_connection_async(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check a connection out from a coroutine
+
+        Waiting inside get_connection() would park an executor thread,
+        and the coroutines holding connections need those same threads
+        to run their queries and return them: with more waiters than
+        executor threads nothing is released until the timeout. Async
+        callers therefore wait on the event loop for one of max_size
+        slots and only then check out in a thread, where the wait is
+        bounded by connections held by synchronous callers. The slot is
+        freed when the connection is returned.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_size)
+
+        if slots.locked():
+            with self._lock:
+                self._async_waiters += 1
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self._timeouts += 1
+                    self._checkout_failures += 1
+                raise PoolTimeoutError(
+                    f"Pool '{self.pool_name}' exhausted: no connection "
+                    f"available after {timeout:.1f}s"
+                ) from None
+            finally:
+                with self._lock:
+                    self._async_waiters -= 1
+        else:
+            await slots.acquire()
+
+        def release_slot():
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                pass  # loop already closed, and its semaphore with it
+
+        try:
+            connection = await asyncio.to_thread(
+                self.get_connection, max(0.0, timeout - (time.monotonic() - started))
+            )
+        except BaseException:
+            slots.release()
+            raise
+        connection._release_slot = release_slot
+        return connection
+
+    def _is_usable(self, cnx) -> bool:
+        """Ping the server (one round trip)"""
+        with self._lock:
+            self._pings += 1
+        try:
+            return cnx.is_connected()
+        except Exception:
+            return False
+
+    def _record_checkout(self, waited_ms: float):
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_total_ms += waited_ms
+            self._wait_max_ms = max(self._wait_max_ms, waited_ms)
+            for i, upper in enumerate(WAIT_BUCKETS_MS):
+                if waited_ms <= upper:
+                    self._wait_buckets[i] += 1
+                    break
+            else:
+                self._wait_buckets[-1] += 1
+
+    def _release(self, cnx, dirty: bool = False):
+        """Take a connection back from a caller"""
+        with self._lock:
+            self._in_use -= 1
+            keep = self._size <= self.pool_size
+
+        if keep:
+            try:
+                needs_reset = (
+                    self.reset_mode == RESET_ALWAYS
+                    or dirty
+                    or cnx.in_transaction
+                )
+                if needs_reset:
+                    cnx.reset_session()
+                with self._lock:
+                    if needs_reset:
+                        self._session_resets += 1
+                    else:
+                        self._resets_skipped += 1
+            except Exception:
+                keep = False
+
+        if not keep:
+            self._discard(cnx)
+            return
+
+        with self._available:
+            self._idle.append((cnx, time.monotonic()))
+            self._available.notify()
+
+    def _discard(self, cnx):
+        """Close a connection and free its slot"""
+        try:
+            cnx.close()
+        except Exception:
+            pass
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def warmup(self, count: int) -> int:
+        """
+        Open up to `count` connections ahead of the first request
+
+        Returns the number of connections actually opened. Never grows
+        the pool beyond pool_size.
+        """
+        opened = 0
+        for _ in range(max(0, count)):
+            with self._lock:
+                if self._size >= self.pool_size:
+                    break
+                self._size += 1
+            try:
+                cnx = self._open_connection()
+            except Exception:
+                with self._available:
+                    self._size -= 1
+                    self._available.notify()
+                raise
+            with self._available:
+                self._idle.append((cnx, time.monotonic()))
+                self._available.notify()
+            opened += 1
+        return opened
+
+    def ping_idle(self) -> int:
+        """
+        Liveness check for connections idle longer than ping_interval
+
+        Dead connections are closed so callers never receive them.
+        Intended to run periodically in the background. Returns the
+        number of connections discarded.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [item for item in self._idle if now - item[1] >= self.ping_interval]
+            for item in stale:
+                self._idle.remove(item)
+
+        discarded = 0
+        for cnx, _ in stale:
+            if self._is_usable(cnx):
+                with self._available:
+                    self._idle.appendleft((cnx, time.monotonic()))
+                    self._available.notify()
+            else:
+                discarded += 1
+                with self._lock:
+                    self._dead_connections += 1
+                self._discard(cnx)
+        return discarded
+
+    def close_idle(self):
+        """Close every idle connection (e.g. on shutdown)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for cnx, _ in idle:
+            self._discard(cnx)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the pool state and checkout statistics"""
+        with self._lock:
+            histogram: List[Dict[str, Any]] = [
+                {"le_ms": upper, "count": count}
+                for upper, count in zip(WAIT_BUCKETS_MS, self._wait_buckets)
+            ]
+            histogram.append({"le_ms": None, "count": self._wait_buckets[-1]})
+            return {
+                "pool_name": self.pool_name,
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "timeout_seconds": self.timeout,
+                "open": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiters": self._waiters + self._async_waiters,
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "checkout_failures": self._checkout_failures,
+                "timeouts": self._timeouts,
+                "overflow_opened": self._overflow_opened,
+                "reset_mode": self.reset_mode,
+                "session_resets": self._session_resets,
+                "session_resets_skipped": self._resets_skipped,
+                "pings": self._pings,
+                "dead_connections": self._dead_connections,
+                "wait_ms": {
+                    "total": round(self._wait_total_ms, 3),
+                    "max": round(self._wait_max_ms, 3),
+                    "avg": round(self._wait_total_ms / self._checkouts, 3) if self._checkouts else 0.0,
+                    "histogram": histogram,
+                },
+            }
@@ -0,0 +1,70 @@
+"""
+HTTP validators (ETag / If-None-Match)
+
+A client that sends back the ETag of the payload it already has gets an
+empty 304 response while the resource is unchanged. Rendered bodies get
+a strong ETag from their bytes; resources whose rendering is not cached
+get a weak ETag from the values that identify their version, so the
+check needs no serialization.
+"""
+
+import hashlib
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+
+class RenderedBody(NamedTuple):
+    """Serialized JSON response with its ETag"""
+    body: bytes
+    etag: str
+
+
+def body_etag(body: Union[str, bytes]) -> str:
+    """Strong ETag of a rendered response body"""
+    if isinstance(body, str):
+        body = body.encode()
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Weak ETag from the values that identify a resource version"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def render_json(payload: Any) -> RenderedBody:
+    """Serialize a payload like a FastAPI JSON response and tag it"""
+    body = JSONResponse(jsonable_encoder(payload)).body
+    return RenderedBody(body, body_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with `etag` (RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+
+
+def conditional_json(rendered: RenderedBody, if_none_match: Optional[str]) -> Response:
+    """304 when the client has this body already, otherwise the body itself"""
+    if etag_matches(if_none_match, rendered.etag):
+        return not_modified(rendered.etag)
+    return Response(
+        content=rendered.body, media_type="application/json", headers={"ETag": rendered.etag}
+    )
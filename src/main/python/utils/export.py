@@ -0,0 +1,67 @@
+"""
+Bulk export formatting
+
+Turns chunks of exported rows into NDJSON or CSV text, one chunk at a
+time, so an export can be streamed without holding the whole table.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+
+EXPORT_NDJSON = "ndjson"
+EXPORT_CSV = "csv"
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+EXPORT_MEDIA_TYPES = {
+    EXPORT_NDJSON: "application/x-ndjson",
+    EXPORT_CSV: "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def to_ndjson(rows: Sequence[Dict[str, Any]]) -> str:
+    """One JSON object per line"""
+    return "".join(
+        json.dumps(row, ensure_ascii=False, default=_json_default) + "\n" for row in rows
+    )
+
+
+def csv_header(columns: Sequence[str]) -> str:
+    """Header line of a CSV export, with a BOM so Excel reads it as UTF-8"""
+    return "﻿" + to_csv([dict(zip(columns, columns))], columns)
+
+
+def to_csv(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> str:
+    """
+    CSV lines for `rows` in `columns` order
+
+    Lists are written as JSON arrays (tag names may contain commas),
+    datetimes as ISO 8601 and None as an empty field.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        line: List[Any] = []
+        for column in columns:
+            value = row.get(column)
+            if value is None:
+                value = ""
+            elif isinstance(value, list):
+                value = json.dumps(value, ensure_ascii=False, default=_json_default)
+            elif isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            line.append(value)
+        writer.writerow(line)
+    return buffer.getvalue()
@@ -0,0 +1,124 @@
+"""
+Geohash helpers for location queries
+
+Opinions store a geohash of their coordinates (opinions.geohash, same
+encoding as MySQL's ST_GeoHash). Every point inside a geohash cell has
+a hash starting with the cell's hash, so "opinions inside these cells"
+is a handful of index range scans (geohash LIKE 'prefix%'), and exact
+distances only have to be computed for the rows in those cells.
+"""
+
+import math
+from typing import List, Tuple
+
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells
+EARTH_RADIUS_M = 6371008.8
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Possible first characters of a geohash (one per 45° x 45° top-level cell)
+GEOHASH_FIRST_CHARS = _BASE32
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Geohash of a point
+
+    >>> encode_geohash(42.605, -5.603, 5)
+    'ezs42'
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits alternate longitude, latitude
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                value = value * 2 + 1
+                lng_lo = mid
+            else:
+                value = value * 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                value = value * 2 + 1
+                lat_lo = mid
+            else:
+                value = value * 2
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(latitude, longitude) span in degrees of a cell of this precision"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle"""
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = min(math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)), 180.0)
+    return (max(latitude - lat_delta, -90.0), max(longitude - lng_delta, -180.0),
+            min(latitude + lat_delta, 90.0), min(longitude + lng_delta, 180.0))
+
+
+def covering_cells(min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                   max_cells: int = 16) -> List[str]:
+    """
+    Geohash cells that together cover a bounding box
+
+    Uses the finest precision that needs at most `max_cells` cells, so
+    the prefix scans stay few and tight.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if cell_count(min_lat, min_lng, max_lat, max_lng, precision) <= max_cells:
+            break
+    lat_step, lng_step = cell_size(precision)
+    rows = int(max_lat // lat_step - min_lat // lat_step) + 1
+    cols = int(max_lng // lng_step - min_lng // lng_step) + 1
+
+    cells = []
+    for row in range(rows):
+        lat = min(min_lat + row * lat_step, max_lat)
+        for col in range(cols):
+            lng = min(min_lng + col * lng_step, max_lng)
+            cell = encode_geohash(lat, lng, precision)
+            if cell not in cells:
+                cells.append(cell)
+    # The last row/column may start inside a cell whose corner lies past the box
+    for lat, lng in ((max_lat, max_lng), (max_lat, min_lng), (min_lat, max_lng)):
+        cell = encode_geohash(lat, lng, precision)
+        if cell not in cells:
+            cells.append(cell)
+    return cells
+
+
+def precision_for_zoom(zoom: int, max_precision: int) -> int:
+    """
+    Geohash precision for a web map zoom level
+
+    Chosen so a map tile spans roughly four cells, e.g. zoom 10 -> 5
+    (~4.9km cells), zoom 15 -> 7 (~150m).
+    """
+    return max(1, min(max_precision, round(2 * (zoom + 2) / 5)))
+
+
+def cell_count(min_lat: float, min_lng: float, max_lat: float, max_lng: float, precision: int) -> int:
+    """Number of cells of this precision a bounding box touches"""
+    lat_step, lng_step = cell_size(precision)
+    rows = int(max_lat // lat_step - min_lat // lat_step) + 1
+    cols = int(max_lng // lng_step - min_lng // lng_step) + 1
+    return rows * cols
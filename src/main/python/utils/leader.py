@@ -0,0 +1,96 @@
+"""
+Single runner for cluster-wide background jobs
+
+Every worker process starts the same periodic tasks, but jobs that
+rewrite shared rows (counter reconciliation, map cluster rebuild, hot
+score decay) must run in one process only. That process is the one
+holding the MySQL named lock LEADER_LOCK_NAME, taken on a dedicated
+connection outside the pool. The server releases the lock when that
+connection dies, so another worker takes over at its next check.
+
+BACKGROUND_JOBS_LEADER selects the mode:
+    lock   - elect a leader with GET_LOCK (default)
+    always - this process always runs the jobs (single worker, tests)
+    never  - never run them here (e.g. jobs run from cron scripts)
+"""
+
+import os
+import threading
+from typing import Optional
+
+import mysql.connector
+
+from .database import DatabaseConfig
+
+
+LEADER_MODE = os.getenv("BACKGROUND_JOBS_LEADER", "lock").lower()
+LEADER_LOCK_NAME = f"{DatabaseConfig.DATABASE}.background_jobs"
+
+_connection: Optional[mysql.connector.MySQLConnection] = None
+_connection_lock = threading.Lock()
+
+
+def is_leader() -> bool:
+    """
+    True when this process should run the cluster-wide jobs (blocking)
+
+    Keeps the lock once taken; a follower retries on every call.
+    """
+    if LEADER_MODE == "always":
+        return True
+    if LEADER_MODE == "never":
+        return False
+
+    global _connection
+    with _connection_lock:
+        if _connection is not None:
+            try:
+                if _connection.is_connected():
+                    return True
+            except Exception:
+                pass
+            # Session gone, and the lock with it
+            _close()
+
+        cnx = None
+        try:
+            cnx = mysql.connector.connect(
+                host=DatabaseConfig.HOST,
+                port=DatabaseConfig.PORT,
+                user=DatabaseConfig.USER,
+                password=DatabaseConfig.PASSWORD,
+                database=DatabaseConfig.DATABASE,
+                autocommit=True
+            )
+            cursor = cnx.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (LEADER_LOCK_NAME,))
+            (acquired,) = cursor.fetchone()
+            cursor.close()
+        except Exception as e:
+            print(f"[Leader] Could not check the background job lock: {e}")
+            if cnx is not None:
+                cnx.close()
+            return False
+
+        if acquired == 1:
+            _connection = cnx
+            print(f"[Leader] This process (pid {os.getpid()}) runs the background jobs")
+            return True
+        cnx.close()
+        return False
+
+
+def release_leadership():
+    """Give the lock up (shutdown hook) so another worker can take over"""
+    with _connection_lock:
+        _close()
+
+
+def _close():
+    global _connection
+    cnx, _connection = _connection, None
+    if cnx is not None:
+        try:
+            cnx.close()
+        except Exception:
+            pass
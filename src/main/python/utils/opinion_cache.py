@@ -0,0 +1,63 @@
+"""
+Assembled opinion details
+
+get_opinion_by_id (opinion row, tags, media) is called by the detail
+route and by every write route to check that the opinion exists, so the
+assembled OpinionWithUser is cached per id. Writes to an opinion call
+invalidate_opinion after commit, which also drops the list pages that
+show it (see utils.page_cache).
+
+Write routes only need to know that an opinion exists and who may see
+it; that (owner, is_public) pair never changes after creation and is
+kept in a separate, longer-lived cache. Tag ids never change either, so
+common tags are resolved from memory when opinions are created.
+"""
+
+import os
+from typing import Iterable, Optional, Tuple
+
+from .cache import TTLCache
+from .etag import version_etag
+from . import page_cache
+
+
+DETAIL_CACHE_TTL = float(os.getenv("DETAIL_CACHE_TTL", "60"))
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", "2048"))
+
+PROBE_CACHE_TTL = float(os.getenv("PROBE_CACHE_TTL", "600"))
+PROBE_CACHE_SIZE = int(os.getenv("PROBE_CACHE_SIZE", "20000"))
+TAG_CACHE_TTL = float(os.getenv("TAG_CACHE_TTL", "3600"))
+TAG_CACHE_SIZE = int(os.getenv("TAG_CACHE_SIZE", "2048"))
+
+detail_cache = TTLCache("opinion_details", maxsize=DETAIL_CACHE_SIZE, ttl=DETAIL_CACHE_TTL)
+# opinion id -> OpinionProbe
+probe_cache = TTLCache("opinion_probes", maxsize=PROBE_CACHE_SIZE, ttl=PROBE_CACHE_TTL)
+# lower-cased tag name -> tags.id (names compare case-insensitively)
+tag_id_cache = TTLCache("tag_ids", maxsize=TAG_CACHE_SIZE, ttl=TAG_CACHE_TTL)
+
+
+def invalidate_opinion(opinion_id: int,
+                       enters: Iterable[Tuple[Optional[str], Optional[int]]] = (),
+                       sorts: Iterable[str] = ()):
+    """
+    Drop the cached detail of an opinion and the list pages it affects
+
+    `enters` and `sorts` are passed to page_cache.invalidate_pages.
+    """
+    detail_cache.delete(opinion_id)
+    page_cache.invalidate_pages(opinion_id, enters=enters, sorts=sorts)
+
+
+def detail_etag(opinion) -> str:
+    """
+    Weak ETag of an opinion detail
+
+    Built from updated_at and the counters and relations that change
+    without touching updated_at. view_count is left out: it grows on
+    every read, and a client may keep a slightly older count.
+    """
+    return version_etag(
+        opinion.id, opinion.updated_at, opinion.status, opinion.category_id,
+        opinion.merged_to_id, opinion.upvotes, opinion.downvotes, opinion.comment_count,
+        tuple(opinion.tags), tuple(media.id for media in opinion.media)
+    )
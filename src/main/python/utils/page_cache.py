@@ -0,0 +1,109 @@
+"""
+Rendered opinion list pages
+
+The public opinion list (GET /opinions) is the same for every caller, so
+a rendered page is kept as its serialized JSON body and served as-is
+until it expires or a write invalidates it. Each entry remembers the ids
+on the page, which lets a write drop only the pages it can affect:
+
+- pages showing the changed opinion,
+- pages whose filter the opinion now belongs to (it may enter them),
+- pages ordered by a counter the write changed (rows may move).
+"""
+
+import os
+from typing import FrozenSet, Hashable, Iterable, NamedTuple, Optional, Tuple, Union
+
+from .cache import TTLCache
+from .etag import body_etag
+
+
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "15"))
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "512"))
+
+page_cache = TTLCache("opinion_pages", maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
+
+
+class CachedPage(NamedTuple):
+    body: Union[str, bytes]
+    ids: FrozenSet[int]
+    etag: str
+
+
+class PageKey(NamedTuple):
+    status: Optional[str]
+    category_id: Optional[int]
+    sort_by: str
+    page: int
+    page_size: int
+    cursor: Optional[str]
+    total_mode: str
+    fields: Optional[Tuple[str, ...]]
+
+
+def page_key(status: Optional[str], category_id: Optional[int], sort_by: str,
+             page: int, page_size: int, cursor: Optional[str], total_mode: str,
+             fields: Optional[Tuple[str, ...]] = None) -> PageKey:
+    """
+    Cache key of one list request; `sort_by` and `fields` must already
+    be normalized
+    """
+    # A cursor page ignores `page`
+    return PageKey(status, category_id or None, sort_by, 1 if cursor else page,
+                   page_size, cursor, total_mode, fields)
+
+
+def generation() -> int:
+    """Current invalidation generation, taken before rendering a page"""
+    return page_cache.generation
+
+
+def get_page(key: PageKey) -> Optional[Union[str, bytes]]:
+    """Serialized page body, or None on a miss"""
+    entry = page_cache.get(key)
+    return entry.body if entry is not None else None
+
+
+def get_entry(key: PageKey) -> Optional[CachedPage]:
+    """Cached page with its ETag, or None on a miss"""
+    return page_cache.get(key)
+
+
+def store_page(key: PageKey, body: Union[str, bytes], ids: Iterable[int], rendered_at: int) -> CachedPage:
+    """
+    Keep a rendered page unless a write was invalidated while rendering it
+
+    Returns the entry (with the body's ETag) whether or not it was kept.
+    """
+    entry = CachedPage(body, frozenset(ids), body_etag(body))
+    page_cache.set(key, entry, generation=rendered_at)
+    return entry
+
+
+def invalidate_pages(opinion_id: Optional[int] = None,
+                     enters: Iterable[Tuple[Optional[str], Optional[int]]] = (),
+                     sorts: Iterable[str] = ()) -> int:
+    """
+    Drop the cached pages a write can affect
+
+    Args:
+        opinion_id: Opinion whose row changed; pages showing it are dropped
+        enters: (status, category_id) the opinion now has; pages whose
+            filter matches it are dropped. None means unknown/any.
+        sorts: sort_by values whose order the write may change
+    """
+    enters = [(status, category_id) for status, category_id in enters]
+    sorts = frozenset(sorts)
+
+    def affected(key: Hashable, entry: CachedPage) -> bool:
+        if opinion_id is not None and opinion_id in entry.ids:
+            return True
+        if key.sort_by in sorts:
+            return True
+        for status, category_id in enters:
+            if (key.status is None or status is None or key.status == status) and \
+               (key.category_id is None or category_id is None or key.category_id == category_id):
+                return True
+        return False
+
+    return page_cache.invalidate_items(affected)
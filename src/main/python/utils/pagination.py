@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort key and id of the
+last row of a page. The next page continues strictly after that row, so
+fetching page N costs the same as fetching page 1, unlike LIMIT/OFFSET
+which scans and discards every row before the page.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or belongs to another ordering"""
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    """Build the cursor pointing after the row with (value, row_id)"""
+    if isinstance(value, datetime):
+        value = {"dt": value.isoformat()}
+    payload = json.dumps({"s": sort, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor made by encode_cursor for the given ordering
+
+    Returns (sort value, id) of the last row of the previous page.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["dt"])
+        row_id = int(payload["id"])
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if cursor_sort != sort:
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return value, row_id
+
+
+def keyset_condition(column: str, order: str, id_column: str = "id") -> str:
+    """
+    WHERE fragment selecting rows after (value, id) in the given order
+
+    Takes three parameters: value, value, id. Written out instead of a
+    row comparison so MySQL can use a range scan on the sort index.
+    """
+    op = "<" if order.upper() == "DESC" else ">"
+    return f"({column} {op} %s OR ({column} = %s AND {id_column} {op} %s))"
@@ -0,0 +1,168 @@
+"""
+Per-query instrumentation
+
+Every statement executed through the database helpers is timed and
+aggregated under a normalized fingerprint (literals and placeholders
+replaced by "?"), so the statements that dominate latency can be found
+without a profiler. Statements slower than a threshold are logged, and a
+request that issues the same fingerprint many times is flagged as a
+likely N+1 query pattern.
+"""
+
+import re
+import threading
+import time
+from collections import deque, Counter
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional
+
+
+# Fingerprints kept in the aggregate table; least used ones are dropped
+MAX_FINGERPRINTS = 500
+# Recent slow queries / N+1 detections kept for the diagnostics endpoint
+MAX_RECENT = 50
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(operation: str) -> str:
+    """
+    Normalize a statement so executions that differ only in their
+    parameters share one fingerprint
+
+    >>> fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND a = 'x'")
+    'SELECT * FROM t WHERE id IN (?+) AND a = ?'
+    """
+    sql = _COMMENT.sub(" ", operation)
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class _FingerprintStats:
+    __slots__ = ("count", "total_ms", "max_ms", "rows")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+
+class RequestQueries:
+    """Statements issued while serving one request"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.total_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+
+_lock = threading.Lock()
+_stats: Dict[str, _FingerprintStats] = {}
+_slow_queries: Deque[Dict[str, Any]] = deque(maxlen=MAX_RECENT)
+_n_plus_one: Deque[Dict[str, Any]] = deque(maxlen=MAX_RECENT)
+_current_request: ContextVar[Optional[RequestQueries]] = ContextVar("db_request_queries", default=None)
+
+
+def record(operation: str, elapsed_ms: float, rowcount: Optional[int], slow_ms: float):
+    """Account one executed statement (called by the database helpers)"""
+    fp = fingerprint(operation)
+    rows = rowcount if rowcount and rowcount > 0 else 0
+
+    with _lock:
+        entry = _stats.get(fp)
+        if entry is None:
+            if len(_stats) >= MAX_FINGERPRINTS:
+                del _stats[min(_stats, key=lambda k: _stats[k].count)]
+            entry = _stats[fp] = _FingerprintStats()
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.rows += rows
+
+    request = _current_request.get()
+    if request is not None:
+        request.count += 1
+        request.total_ms += elapsed_ms
+        request.fingerprints[fp] += 1
+
+    if slow_ms > 0 and elapsed_ms >= slow_ms:
+        print(f"[SLOW QUERY] {elapsed_ms:.1f}ms rows={rows} "
+              f"request={request.label if request else '-'} sql={fp}")
+        with _lock:
+            _slow_queries.append({
+                "fingerprint": fp,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "rows": rows,
+                "request": request.label if request else None,
+                "at": time.time(),
+            })
+
+
+def begin_request(label: str):
+    """Start collecting statements for the current request; returns a reset token"""
+    return _current_request.set(RequestQueries(label))
+
+
+def end_request(token, threshold: int) -> Optional[RequestQueries]:
+    """
+    Stop collecting for the current request
+
+    Flags fingerprints executed at least `threshold` times as N+1
+    candidates and returns the collected RequestQueries.
+    """
+    request = _current_request.get()
+    _current_request.reset(token)
+    if request is None or threshold <= 0:
+        return request
+
+    for fp, count in request.fingerprints.items():
+        if count >= threshold:
+            print(f"[N+1] {request.label}: {count}x {fp}")
+            with _lock:
+                _n_plus_one.append({
+                    "request": request.label,
+                    "fingerprint": fp,
+                    "count": count,
+                    "at": time.time(),
+                })
+    return request
+
+
+def snapshot(limit: int = 20) -> Dict[str, Any]:
+    """Top fingerprints by total time plus recent slow queries and N+1 hits"""
+    with _lock:
+        top: List[Dict[str, Any]] = [
+            {
+                "fingerprint": fp,
+                "count": s.count,
+                "total_ms": round(s.total_ms, 3),
+                "avg_ms": round(s.total_ms / s.count, 3),
+                "max_ms": round(s.max_ms, 3),
+                "rows": s.rows,
+            }
+            for fp, s in sorted(_stats.items(), key=lambda item: item[1].total_ms, reverse=True)[:limit]
+        ]
+        return {
+            "fingerprints": len(_stats),
+            "top": top,
+            "slow_queries": list(_slow_queries),
+            "n_plus_one": list(_n_plus_one),
+        }
+
+
+def reset():
+    """Clear all collected statistics"""
+    with _lock:
+        _stats.clear()
+        _slow_queries.clear()
+        _n_plus_one.clear()
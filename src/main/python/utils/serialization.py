@@ -0,0 +1,163 @@
+"""
+Fast path for models built from trusted database rows
+
+Rows read by the services already have the column types the models
+declare, so validating them through Pydantic again only costs CPU, and
+so does FastAPI validating and serializing the returned model a second
+time. trusted() builds models without validation (only MySQL's 0/1
+BOOLEANs, numbers of float fields and ENUM strings are converted), and
+dump_json() / FastJSONResponse serialize them with orjson.
+
+The output is the same JSON that Pydantic produces: datetimes in ISO
+8601, Decimal (latitude/longitude, scores) as strings and enums as
+their values. Set FAST_SERIALIZATION=0 to go back to validating every
+row and serializing with Pydantic.
+"""
+
+import os
+import typing
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Tuple, Type, TypeVar
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "1").lower() not in ("0", "false", "no")
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class _Plan(NamedTuple):
+    """How trusted() fills one model class"""
+    defaults: Dict[str, Any]                 # every field, in declaration order
+    fields: frozenset
+    factories: Dict[str, Callable[[], Any]]  # default_factory fields (fresh lists)
+    converters: Tuple[Tuple[str, type, Callable[[Any], Any]], ...]  # bool, float, Enum
+    nested: Tuple[Tuple[str, type], ...]      # fields holding models (e.g. media)
+
+
+_plans: Dict[type, _Plan] = {}
+_set = object.__setattr__
+
+
+def _unwrap(annotation: Any) -> Any:
+    """Optional[X] / List[X] -> X"""
+    while typing.get_origin(annotation) in (typing.Union, list, List):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            break
+        annotation = args[0]
+    return annotation
+
+
+def _plan(model: type) -> _Plan:
+    plan = _plans.get(model)
+    if plan is None:
+        defaults, factories, converters, nested = {}, {}, [], []
+        for name, field in model.model_fields.items():
+            if field.default_factory is not None:
+                factories[name] = field.default_factory
+            defaults[name] = field.default
+            inner = _unwrap(field.annotation)
+            if not isinstance(inner, type):
+                continue
+            if inner is bool or inner is float:
+                # MySQL 0/1 BOOLEANs, DECIMAL/int results of float fields
+                converters.append((name, inner, inner))
+            elif issubclass(inner, Enum):
+                # Member lookup by value, without Enum.__call__ overhead
+                converters.append((name, inner, inner._value2member_map_.__getitem__))
+            elif issubclass(inner, BaseModel):
+                nested.append((name, inner))
+        plan = _plans[model] = _Plan(
+            defaults, frozenset(model.model_fields), factories, tuple(converters), tuple(nested)
+        )
+    return plan
+
+
+def trusted(model: Type[ModelT], row: Mapping[str, Any]) -> ModelT:
+    """
+    Build `model` from a database row without validation
+
+    Keys that are not fields are dropped, missing fields get their
+    defaults and nested models (e.g. media) are built the same way. Only
+    use it for rows read from our own tables.
+    """
+    if not FAST_SERIALIZATION:
+        return model(**row)
+
+    plan = _plan(model)
+    # Keys already in `defaults` keep their place, so the fields stay in
+    # declaration order (the order they are written out in)
+    values = plan.defaults.copy()
+    values.update(row)
+    for name in row.keys() - plan.fields:
+        del values[name]
+    fields_set = row.keys() & plan.fields
+    for name, factory in plan.factories.items():
+        if name not in fields_set:
+            values[name] = factory()
+    for name, field_type, convert in plan.converters:
+        value = values[name]
+        if value is not None and type(value) is not field_type:
+            values[name] = convert(value)
+    for name, nested_model in plan.nested:
+        value = values[name]
+        if isinstance(value, list):
+            values[name] = [
+                trusted(nested_model, item) if isinstance(item, dict) else item for item in value
+            ]
+        elif isinstance(value, dict):
+            values[name] = trusted(nested_model, value)
+
+    # What BaseModel.model_construct does, without its per-field Python loop
+    instance = model.__new__(model)
+    _set(instance, "__dict__", values)
+    _set(instance, "__pydantic_fields_set__", fields_set)
+    _set(instance, "__pydantic_extra__", None)
+    _set(instance, "__pydantic_private__", None)
+    return instance
+
+
+# Decimal is checked first: isinstance() against BaseModel goes through
+# Pydantic's metaclass and is several times slower
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    # Validated and trusted() models both keep their fields in declaration order
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _default_exclude_unset(value: Any) -> Any:
+    if not isinstance(value, Decimal) and isinstance(value, BaseModel):
+        fields_set = value.model_fields_set
+        return {name: item for name, item in value.__dict__.items() if name in fields_set}
+    return _default(value)
+
+
+def dump_json(value: Any, exclude_unset: bool = False) -> bytes:
+    """Serialize models (and plain data) to JSON bytes"""
+    if not FAST_SERIALIZATION and isinstance(value, BaseModel):
+        return value.model_dump_json(exclude_unset=exclude_unset).encode()
+    return orjson.dumps(value, default=_default_exclude_unset if exclude_unset else _default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with dump_json
+
+    Return it from a route (the route's response_model then only
+    documents the shape) to skip FastAPI's validation and serialization
+    of the returned models.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if not FAST_SERIALIZATION:
+            from fastapi.encoders import jsonable_encoder
+            return super().render(jsonable_encoder(content))
+        return dump_json(content)
@@ -0,0 +1,108 @@
+"""
+Totals for paginated lists
+
+Serves the `total` of list endpoints from a short-TTL cache keyed by the
+list filter, so the COUNT(*) over the filtered set runs once per TTL
+instead of on every page. Callers can also ask for an estimate (from the
+optimizer's row estimate, no scan) or for no total at all and rely on
+`has_more`. Plans without a usable estimate (tables optimized away,
+FULLTEXT lookups, NULL row counts) are counted exactly instead.
+"""
+
+import os
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .cache import TTLCache
+
+
+# total_mode values accepted by the list endpoints
+TOTAL_EXACT = "exact"        # real COUNT(*), cached for COUNT_CACHE_TTL
+TOTAL_ESTIMATE = "estimate"  # optimizer estimate (exact value if cached)
+TOTAL_NONE = "none"          # no total; use has_more
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_ESTIMATE, TOTAL_NONE)
+TOTAL_MODE_PATTERN = "^(exact|estimate|none)$"
+
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "30"))
+COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", "4096"))
+
+count_cache = TTLCache("list_totals", maxsize=COUNT_CACHE_SIZE, ttl=COUNT_CACHE_TTL)
+
+
+def estimate_from_plan(plan: List[Dict[str, Any]]) -> Optional[int]:
+    """
+    Row estimate of a COUNT query from its EXPLAIN rows
+
+    Multiplies rows * filtered / 100 over the tables of the outer query
+    (the rows sharing the first row's id; subqueries are left out).
+    Returns None when the plan has no usable estimate: "Select tables
+    optimized away" (e.g. an unfiltered COUNT), a FULLTEXT access (always
+    reports rows=1) or a table without a row estimate.
+    """
+    if not plan:
+        return None
+    outer_id = plan[0].get('id')
+    estimate = 1.0
+    for row in plan:
+        if row.get('id') != outer_id:
+            continue
+        extra = row.get('Extra') or ""
+        rows = row.get('rows')
+        if "optimized away" in extra or row.get('type') == "fulltext" or rows is None:
+            return None
+        filtered = row.get('filtered')
+        estimate *= rows * (100.0 if filtered is None else float(filtered)) / 100
+    return int(estimate)
+
+
+async def fetch_total(cursor, key: Tuple[Hashable, ...], count_sql: str,
+                      params: Sequence[Any], mode: str = TOTAL_EXACT) -> Tuple[Optional[int], bool]:
+    """
+    Total for a list filter
+
+    Args:
+        cursor: Async cursor (dictionary rows) used on a cache miss
+        key: Filter identity, e.g. ("opinions", status, category_id);
+            the first element is the list name used for invalidation
+        count_sql: Query returning the exact count in a `total` column
+        params: Parameters of count_sql
+        mode: One of TOTAL_MODES
+
+    Returns:
+        (total, estimated); total is None for TOTAL_NONE. An estimate
+        request falls back to the exact count (estimated False) when the
+        plan has no usable estimate (see estimate_from_plan).
+    """
+    if mode == TOTAL_NONE:
+        return None, False
+
+    # A write that invalidates totals while we count must win
+    counted_at = count_cache.generation
+    exact = count_cache.get((TOTAL_EXACT, key))
+    if exact is not None:
+        return exact, False
+
+    if mode == TOTAL_ESTIMATE:
+        estimate = count_cache.get((TOTAL_ESTIMATE, key))
+        if estimate is None:
+            await cursor.execute("EXPLAIN " + count_sql, params)
+            estimate = estimate_from_plan(await cursor.fetchall())
+            if estimate is not None:
+                count_cache.set((TOTAL_ESTIMATE, key), estimate, generation=counted_at)
+        if estimate is not None:
+            return estimate, True
+
+    await cursor.execute(count_sql, params)
+    total = (await cursor.fetchone())['total']
+    count_cache.set((TOTAL_EXACT, key), total, generation=counted_at)
+    return total, False
+
+
+def invalidate_totals(*prefix: Hashable) -> int:
+    """
+    Drop cached totals whose filter key starts with `prefix`
+
+    invalidate_totals("opinions") drops every opinion-list total;
+    invalidate_totals("bookmarks", user_id) only that user's.
+    """
+    size = len(prefix)
+    return count_cache.invalidate(lambda cache_key: cache_key[1][:size] == prefix)
@@ -0,0 +1,145 @@
+"""
+Buffered opinion view counts
+
+Viewing an opinion used to run `UPDATE opinions SET view_count =
+view_count + 1` inside the request, so every view of a popular opinion
+queued on the same row lock. Views are now added up in memory per
+opinion and written periodically (and on shutdown) with one batched
+UPDATE ... CASE per chunk of opinions. Counts not flushed yet are added
+to the view_count returned to clients.
+
+A flush takes the pending counts but keeps them "in flight" (still
+added to responses) until its UPDATE has committed and the cached
+details carry them, so the visible count never drops in between.
+Flushes that finished recently are remembered, so a detail read from
+the database before a flush committed is not cached afterwards.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, FrozenSet, List, Tuple
+
+
+# Seconds between flushes of buffered views
+VIEW_FLUSH_INTERVAL = float(os.getenv("VIEW_FLUSH_INTERVAL", "5"))
+# Opinions updated per UPDATE statement
+VIEW_FLUSH_BATCH = 500
+# Finished flushes remembered for flushed_since()
+FLUSH_HISTORY = 32
+
+_lock = threading.Lock()
+_pending: Dict[int, int] = {}
+# Taken by a flush that has not finished yet
+_in_flight: Dict[int, int] = {}
+_flush_sequence = 0
+# (sequence, flushed opinion ids) of the last FLUSH_HISTORY flushes
+_flushed: Deque[Tuple[int, FrozenSet[int]]] = deque(maxlen=FLUSH_HISTORY)
+
+
+def record_view(opinion_id: int) -> int:
+    """Count one view; returns the views of this opinion not flushed yet"""
+    with _lock:
+        count = _pending.get(opinion_id, 0) + 1
+        _pending[opinion_id] = count
+        return count + _in_flight.get(opinion_id, 0)
+
+
+def pending_views(opinion_id: int) -> int:
+    """Views of an opinion not flushed yet (buffered or in flight)"""
+    with _lock:
+        return _pending.get(opinion_id, 0) + _in_flight.get(opinion_id, 0)
+
+
+def take_pending() -> Dict[int, int]:
+    """
+    Take every buffered count (opinion id -> views) for a flush
+
+    The counts stay in flight until finish_flush() or restore().
+    """
+    global _pending
+    with _lock:
+        taken, _pending = _pending, {}
+        for opinion_id, count in taken.items():
+            _in_flight[opinion_id] = _in_flight.get(opinion_id, 0) + count
+        return taken
+
+
+def finish_flush(counts: Dict[int, int]):
+    """Drop counts taken by a flush whose UPDATE has committed"""
+    global _flush_sequence
+    with _lock:
+        _drop_in_flight(counts)
+        _flush_sequence += 1
+        _flushed.append((_flush_sequence, frozenset(counts)))
+
+
+def restore(counts: Dict[int, int]):
+    """Put counts back after a failed flush so they are retried"""
+    with _lock:
+        _drop_in_flight(counts)
+        for opinion_id, count in counts.items():
+            _pending[opinion_id] = _pending.get(opinion_id, 0) + count
+
+
+def flush_sequence() -> int:
+    """Number of finished flushes, taken before reading view_count"""
+    return _flush_sequence
+
+
+def flushed_since(sequence: int, opinion_id: int) -> bool:
+    """
+    True when a flush finished after `sequence` wrote this opinion's
+    views (or when that is no longer known)
+    """
+    with _lock:
+        if sequence == _flush_sequence:
+            return False
+        if not _flushed or _flushed[0][0] > sequence + 1:
+            return True
+        return any(seq > sequence and opinion_id in ids for seq, ids in _flushed)
+
+
+def clear():
+    """Forget buffered and in-flight counts (tests)"""
+    global _pending
+    with _lock:
+        _pending = {}
+        _in_flight.clear()
+
+
+def _drop_in_flight(counts: Dict[int, int]):
+    for opinion_id, count in counts.items():
+        left = _in_flight.get(opinion_id, 0) - count
+        if left > 0:
+            _in_flight[opinion_id] = left
+        else:
+            _in_flight.pop(opinion_id, None)
+
+
+def build_flush_queries(counts: Dict[int, int]) -> List[Tuple[str, List[int]]]:
+    """
+    UPDATE statements adding `counts` to opinions.view_count
+
+    One statement per VIEW_FLUSH_BATCH opinions, e.g.
+        UPDATE opinions
+        SET view_count = view_count + CASE id WHEN %s THEN %s ... END,
+            updated_at = updated_at
+        WHERE id IN (%s, ...)
+    """
+    items = sorted(counts.items())
+    queries = []
+    for start in range(0, len(items), VIEW_FLUSH_BATCH):
+        chunk = items[start:start + VIEW_FLUSH_BATCH]
+        cases = " ".join("WHEN %s THEN %s" for _ in chunk)
+        placeholders = ", ".join(["%s"] * len(chunk))
+        query = f"""
+            UPDATE opinions
+            SET view_count = view_count + CASE id {cases} ELSE 0 END,
+                updated_at = updated_at
+            WHERE id IN ({placeholders})
+        """
+        params = [value for pair in chunk for value in pair]
+        params += [opinion_id for opinion_id, _ in chunk]
+        queries.append((query, params))
+    return queries
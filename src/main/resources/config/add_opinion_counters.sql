@@ -0,0 +1,35 @@
+-- 在 opinions 上新增按讚/支持/留言計數欄位 (反正規化)
+-- 列表與詳情查詢不再需要每列執行 COUNT(*) 子查詢
+-- 計數由 OpinionService.vote_opinion / add_comment 與
+-- ModerationService.delete_comment 增量維護，並由定期校正工作修正偏差
+
+ALTER TABLE opinions
+ADD COLUMN upvotes INT NOT NULL DEFAULT 0 COMMENT 'like 票數 (由 votes 維護)' AFTER view_count,
+ADD COLUMN downvotes INT NOT NULL DEFAULT 0 COMMENT 'support 票數 (由 votes 維護)' AFTER upvotes,
+ADD COLUMN comment_count INT NOT NULL DEFAULT 0 COMMENT '未刪除留言數 (由 comments 維護)' AFTER downvotes;
+
+ALTER TABLE opinions
+ADD INDEX idx_public_upvotes (is_public, upvotes),
+ADD INDEX idx_public_comments (is_public, comment_count);
+
+-- 回填現有資料
+UPDATE opinions o
+LEFT JOIN (
+    SELECT opinion_id,
+           SUM(vote_type = 'like') AS up,
+           SUM(vote_type = 'support') AS down
+    FROM votes
+    GROUP BY opinion_id
+) v ON v.opinion_id = o.id
+LEFT JOIN (
+    SELECT opinion_id, COUNT(*) AS cnt
+    FROM comments
+    WHERE is_deleted = FALSE
+    GROUP BY opinion_id
+) c ON c.opinion_id = o.id
+SET o.upvotes = COALESCE(v.up, 0),
+    o.downvotes = COALESCE(v.down, 0),
+    o.comment_count = COALESCE(c.cnt, 0),
+    o.updated_at = o.updated_at;
+
+SELECT '✅ Opinion counters added successfully!' AS status;
@@ -0,0 +1,8 @@
+-- 公開意見列表 (依建立時間排序) 的 keyset 分頁索引
+-- 與 idx_public_upvotes / idx_public_comments 搭配，三種排序皆可依索引範圍掃描
+-- (InnoDB 二級索引隱含主鍵 id，可直接作為同值時的排序依據)
+
+ALTER TABLE opinions
+ADD INDEX idx_public_created (is_public, created_at);
+
+SELECT '✅ Opinion feed index added successfully!' AS status;
@@ -0,0 +1,29 @@
+-- 地圖聚合 (GET /opinions/clusters) 的預先計算表
+-- 需先執行 add_opinion_geohash.sql
+-- 之後由應用程式增量維護，並依 MAP_CLUSTER_REBUILD_INTERVAL 定期全量重建
+
+CREATE TABLE IF NOT EXISTS opinion_geo_cells (
+    precision_level TINYINT NOT NULL COMMENT 'geohash 長度 (1-8)',
+    cell VARCHAR(9) NOT NULL,
+    category_id INT NOT NULL DEFAULT 0 COMMENT '0 = 未分類',
+    status VARCHAR(20) NOT NULL,
+    opinion_count INT NOT NULL DEFAULT 0,
+    sum_lat DOUBLE NOT NULL DEFAULT 0 COMMENT '緯度總和 (計算中心點)',
+    sum_lng DOUBLE NOT NULL DEFAULT 0 COMMENT '經度總和 (計算中心點)',
+    latest_opinion_id INT NULL COMMENT '格子內最新的意見',
+    PRIMARY KEY (precision_level, cell, category_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 回填既有資料 (1-8 各層級)
+INSERT INTO opinion_geo_cells
+    (precision_level, cell, category_id, status,
+     opinion_count, sum_lat, sum_lng, latest_opinion_id)
+SELECT levels.p, LEFT(o.geohash, levels.p), COALESCE(o.category_id, 0), o.status,
+       COUNT(*), SUM(o.latitude), SUM(o.longitude), MAX(o.id)
+FROM opinions o
+JOIN (SELECT 1 AS p UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4
+      UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8) levels
+WHERE o.is_public = TRUE AND o.geohash IS NOT NULL AND o.status <> 'merged'
+GROUP BY levels.p, LEFT(o.geohash, levels.p), COALESCE(o.category_id, 0), o.status;
+
+SELECT '✅ Opinion map cluster cells added successfully!' AS status;
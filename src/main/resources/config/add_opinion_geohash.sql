@@ -0,0 +1,14 @@
+-- 附近意見查詢 (GET /opinions/nearby) 的 geohash 欄位與索引
+-- 同一 geohash 格內的座標前綴相同，附近查詢只需掃描少數幾段索引範圍
+-- 新意見於建立時由應用程式寫入 geohash，以下回填既有資料
+
+ALTER TABLE opinions
+ADD COLUMN geohash CHAR(9) NULL COMMENT '座標的 geohash (ST_GeoHash 相同編碼，供附近查詢)' AFTER longitude,
+ADD INDEX idx_public_geohash (is_public, geohash);
+
+UPDATE opinions
+SET geohash = ST_GeoHash(longitude, latitude, 9),
+    updated_at = updated_at
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+
+SELECT '✅ Opinion geohash column added successfully!' AS status;
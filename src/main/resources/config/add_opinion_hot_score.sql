@@ -0,0 +1,42 @@
+-- 熱門排序 (GET /opinions?sort_by=hot) 的預先計算分數
+-- 投票 / 留言時寫入每小時的互動時段並累加 hot_score
+-- 之後依 HOT_SCORE_REFRESH_INTERVAL 定期套用時間衰減 (半衰期 HOT_HALF_LIFE_HOURS)
+
+ALTER TABLE opinions
+ADD COLUMN hot_score DOUBLE NOT NULL DEFAULT 0 COMMENT '熱門分數 (近期互動依時間衰減，由 opinion_activity 維護)' AFTER comment_count,
+ADD INDEX idx_public_hot (is_public, hot_score);
+
+CREATE TABLE IF NOT EXISTS opinion_activity (
+    opinion_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL COMMENT '整點時段開始時間',
+    points INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (opinion_id, bucket_start),
+    FOREIGN KEY (opinion_id) REFERENCES opinions(id) ON DELETE CASCADE,
+    INDEX idx_bucket (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- 回填最近 72 小時的互動 (投票 1 分，留言 2 分)
+INSERT INTO opinion_activity (opinion_id, bucket_start, points)
+SELECT opinion_id, bucket_start, SUM(points)
+FROM (
+    SELECT opinion_id, TIMESTAMP(DATE(created_at), MAKETIME(HOUR(created_at), 0, 0)) AS bucket_start, 1 AS points
+    FROM votes
+    WHERE created_at >= NOW() - INTERVAL 72 HOUR
+    UNION ALL
+    SELECT opinion_id, TIMESTAMP(DATE(created_at), MAKETIME(HOUR(created_at), 0, 0)), 2
+    FROM comments
+    WHERE created_at >= NOW() - INTERVAL 72 HOUR AND is_deleted = FALSE
+) recent
+GROUP BY opinion_id, bucket_start;
+
+-- 依半衰期 12 小時計算初始分數
+UPDATE opinions o
+JOIN (
+    SELECT opinion_id,
+           SUM(points * POW(0.5, TIMESTAMPDIFF(MINUTE, bucket_start, NOW()) / 720)) AS score
+    FROM opinion_activity
+    GROUP BY opinion_id
+) a ON a.opinion_id = o.id
+SET o.hot_score = a.score, o.updated_at = o.updated_at;
+
+SELECT '✅ Opinion hot score added successfully!' AS status;
@@ -0,0 +1,10 @@
+-- 意見全文搜尋 (GET /opinions/search) 改用 ngram parser
+-- 預設 parser 以空白斷詞，中文整段會被視為單一詞而無法搜尋；
+-- ngram parser 以 ngram_token_size (預設 2) 個字切詞，中英文皆可命中
+-- 重建 FULLTEXT 索引需掃描整張表，請於離峰時段執行
+
+ALTER TABLE opinions
+DROP INDEX idx_content,
+ADD FULLTEXT INDEX idx_content (title, content) WITH PARSER ngram;
+
+SELECT '✅ Opinion search index rebuilt with ngram parser!' AS status;
@@ -39,7 +39,12 @@ CREATE TABLE IF NOT EXISTS opinions (
     region VARCHAR(100),
     latitude DECIMAL(10, 8),
     longitude DECIMAL(11, 8),
+    geohash CHAR(9) NULL COMMENT '座標的 geohash (ST_GeoHash 相同編碼，供附近查詢)',
     view_count INT DEFAULT 0,
+    upvotes INT NOT NULL DEFAULT 0 COMMENT 'like 票數 (由 votes 維護)',
+    downvotes INT NOT NULL DEFAULT 0 COMMENT 'support 票數 (由 votes 維護)',
+    comment_count INT NOT NULL DEFAULT 0 COMMENT '未刪除留言數 (由 comments 維護)',
+    hot_score DOUBLE NOT NULL DEFAULT 0 COMMENT '熱門分數 (近期互動依時間衰減，由 opinion_activity 維護)',
     is_public BOOLEAN DEFAULT TRUE,
     merged_to_id INT NULL COMMENT '合併到哪個意見',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -51,7 +56,12 @@ CREATE TABLE IF NOT EXISTS opinions (
     INDEX idx_category (category_id),
     INDEX idx_status (status),
     INDEX idx_created (created_at),
-    FULLTEXT idx_content (title, content)
+    INDEX idx_public_created (is_public, created_at),
+    INDEX idx_public_upvotes (is_public, upvotes),
+    INDEX idx_public_comments (is_public, comment_count),
+    INDEX idx_public_hot (is_public, hot_score),
+    INDEX idx_public_geohash (is_public, geohash),
+    FULLTEXT idx_content (title, content) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Opinion media attachments (多媒體附件)
@@ -112,6 +122,31 @@ CREATE TABLE IF NOT EXISTS collections (
     INDEX idx_opinion (opinion_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Opinion map clusters (地圖聚合：每個 geohash 格子、分類、狀態的意見數)
+-- 由應用程式在意見建立 / 狀態或分類變更時增量維護，定期全量重建
+CREATE TABLE IF NOT EXISTS opinion_geo_cells (
+    precision_level TINYINT NOT NULL COMMENT 'geohash 長度 (1-8)',
+    cell VARCHAR(9) NOT NULL,
+    category_id INT NOT NULL DEFAULT 0 COMMENT '0 = 未分類',
+    status VARCHAR(20) NOT NULL,
+    opinion_count INT NOT NULL DEFAULT 0,
+    sum_lat DOUBLE NOT NULL DEFAULT 0 COMMENT '緯度總和 (計算中心點)',
+    sum_lng DOUBLE NOT NULL DEFAULT 0 COMMENT '經度總和 (計算中心點)',
+    latest_opinion_id INT NULL COMMENT '格子內最新的意見',
+    PRIMARY KEY (precision_level, cell, category_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Opinion activity (熱門排序：每個意見每小時的互動分數)
+-- 投票與留言時增量累加，定期依時間衰減重算 opinions.hot_score，過期的時段會被刪除
+CREATE TABLE IF NOT EXISTS opinion_activity (
+    opinion_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL COMMENT '整點時段開始時間',
+    points INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (opinion_id, bucket_start),
+    FOREIGN KEY (opinion_id) REFERENCES opinions(id) ON DELETE CASCADE,
+    INDEX idx_bucket (bucket_start)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Tags table (標籤系統)
 CREATE TABLE IF NOT EXISTS tags (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -158,6 +158,8 @@ def cleanup_test_data(test_db_connection_pool):
                 'votes',
                 'comments',
                 'opinion_media',
+                'opinion_geo_cells',
+                'opinion_activity',
                 'opinions'
             ]
             for table in tables_to_clean:
@@ -182,6 +184,20 @@ def cleanup_test_data(test_db_connection_pool):
             cursor.close()
             connection.close()
 
+        # 清除行程內快取，避免沿用上一個測試的資料
+        from utils.totals import count_cache
+        from utils.page_cache import page_cache
+        from utils.opinion_cache import detail_cache, probe_cache, tag_id_cache
+        count_cache.clear()
+        page_cache.clear()
+        detail_cache.clear()
+        probe_cache.clear()
+        tag_id_cache.clear()
+        from utils.category_cache import category_cache
+        category_cache.clear()
+        from utils import view_buffer
+        view_buffer.clear()
+
     # 測試前清理
     clean_tables()
 
@@ -1,9 +1,13 @@
 """
 審核模組 API 整合測試
-測試案例對應: TC-MOD-001 ~ TC-MOD-010
+測試案例對應: TC-MOD-001 ~ TC-MOD-013
 需求對應: REQ-008 (管理審核功能), REQ-009 (權限控制系統)
 """
 
+import csv
+import io
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -510,6 +514,88 @@ class TestCategoryUpdate:
         assert response.status_code == 403
 
 
+# ==================== 意見匯出測試 ====================
+
+class TestOpinionExport:
+    """意見匯出測試類別"""
+
+    def test_export_ndjson_and_csv(
+        self,
+        test_client: TestClient,
+        auth_headers_admin,
+        create_multiple_opinions
+    ):
+        """
+        TC-MOD-011: 管理員以 NDJSON / CSV 串流匯出意見
+        測試目標: 驗證篩選條件、欄位與兩種格式
+        優先級: Medium
+        """
+        response = test_client.get("/admin/opinions/export", headers=auth_headers_admin)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == sorted(o.id for o in create_multiple_opinions)
+        assert {"content", "tags", "upvotes", "status", "moderation_reason"} <= rows[0].keys()
+
+        response = test_client.get(
+            "/admin/opinions/export",
+            params={"format": "csv", "status": "approved"},
+            headers=auth_headers_admin
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        records = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+        assert len(records) == 1
+        assert records[0]["status"] == "approved"
+
+    def test_export_requires_moderator(
+        self,
+        test_client: TestClient,
+        auth_headers_user
+    ):
+        """
+        TC-MOD-012: 普通用戶無權匯出意見
+        測試目標: 驗證匯出僅限審核員與管理員
+        優先級: High
+        """
+        response = test_client.get("/admin/opinions/export", headers=auth_headers_user)
+        assert response.status_code == 403
+
+    def test_export_keeps_tags_with_commas(
+        self,
+        test_client: TestClient,
+        auth_headers_admin,
+        test_db_connection,
+        create_test_opinion
+    ):
+        """
+        TC-MOD-013: 匯出時含逗號的標籤不被拆開
+        測試目標: 驗證 NDJSON 與 CSV 的 tags 欄位完整保留標籤名稱
+        優先級: Medium
+        """
+        cursor = test_db_connection.cursor()
+        for name in ("路燈, 照明", "安全"):
+            cursor.execute("INSERT INTO tags (name) VALUES (%s)", (name,))
+            cursor.execute(
+                "INSERT INTO opinion_tags (opinion_id, tag_id) VALUES (%s, %s)",
+                (create_test_opinion.id, cursor.lastrowid)
+            )
+        test_db_connection.commit()
+        cursor.close()
+
+        response = test_client.get("/admin/opinions/export", headers=auth_headers_admin)
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert rows[0]["tags"] == ["安全", "路燈, 照明"]
+
+        response = test_client.get(
+            "/admin/opinions/export", params={"format": "csv"}, headers=auth_headers_admin
+        )
+        records = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+        assert json.loads(records[0]["tags"]) == ["安全", "路燈, 照明"]
+
+
 # ==================== 權限與角色測試 ====================
 
 class TestModeratorPermissions:
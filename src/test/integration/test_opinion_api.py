@@ -39,6 +39,39 @@ class TestOpinionCreation:
         assert data["status"] in ["draft", "pending"]
         assert "created_at" in data
 
+    def test_create_opinion_with_tags(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-022: 建立意見時批次寫入標籤
+        測試目標: 驗證標籤去重、大小寫合併，且已知標籤不再查詢 tags 表
+        優先級: Medium
+        """
+        from utils import query_stats
+
+        first = test_client.post(
+            "/opinions",
+            json={**test_opinion_data, "tags": ["交通", "safety", "Safety"]},
+            headers=auth_headers_user
+        )
+        assert first.status_code == 201
+        assert sorted(first.json()["tags"]) == ["safety", "交通"]
+
+        query_stats.reset()
+        second = test_client.post(
+            "/opinions",
+            json={**test_opinion_data, "tags": ["safety", "交通"]},
+            headers=auth_headers_user
+        )
+        assert second.status_code == 201
+        assert sorted(second.json()["tags"]) == ["safety", "交通"]
+
+        fingerprints = [entry["fingerprint"] for entry in query_stats.snapshot(100)["top"]]
+        assert not any("INTO tags" in fp or "FROM tags WHERE name" in fp for fp in fingerprints)
+
     def test_create_opinion_without_auth(
         self,
         test_client: TestClient,
@@ -164,6 +197,313 @@ class TestOpinionRetrieval:
             if len(data_page2["items"]) > 0:
                 assert data_page1["items"][0]["id"] != data_page2["items"][0]["id"]
 
+    def test_get_opinions_with_cursor(
+        self,
+        test_client: TestClient,
+        create_multiple_opinions
+    ):
+        """
+        TC-OPIN-018: 以 cursor 連續翻頁
+        測試目標: 驗證 next_cursor 能不重複、不遺漏地走完整個列表
+        優先級: High
+        """
+        seen = []
+        cursor = None
+        while True:
+            params = {"page_size": 3}
+            if cursor:
+                params["cursor"] = cursor
+            response = test_client.get("/opinions", params=params)
+            assert response.status_code == 200
+
+            data = response.json()
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == len(set(seen)) == len(create_multiple_opinions)
+
+        # 無效或不同排序的 cursor
+        assert test_client.get("/opinions", params={"cursor": "not-a-cursor"}).status_code == 400
+
+    def test_get_opinions_query_count_is_constant(
+        self,
+        test_client: TestClient,
+        create_multiple_opinions
+    ):
+        """
+        TC-OPIN-017: 列表查詢次數不隨每頁筆數增加
+        測試目標: 驗證 tags / media 以整頁批次載入 (無 N+1 查詢)
+        優先級: High
+        """
+        from utils import query_stats
+
+        def statements_for(page_size):
+            query_stats.reset()
+            response = test_client.get(f"/opinions?page=1&page_size={page_size}")
+            assert response.status_code == 200
+            assert len(response.json()["items"]) == min(page_size, len(create_multiple_opinions))
+            return {entry["fingerprint"]: entry["count"] for entry in query_stats.snapshot(100)["top"]}
+
+        small = statements_for(1)
+        large = statements_for(len(create_multiple_opinions))
+
+        assert sum(large.values()) <= sum(small.values())
+        for fingerprint, count in large.items():
+            if "FROM tags" in fingerprint or "FROM opinion_media" in fingerprint:
+                assert count == 1
+
+    def test_search_opinions_chinese_text(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-023: 全文搜尋中文意見
+        測試目標: 驗證 ngram 全文索引可搜尋未斷詞的中文，並支援篩選與 cursor
+        優先級: High
+        """
+        for title in ("公園綠地不足需要改善", "捷運站周邊停車問題", "河濱公園夜間照明不足"):
+            response = test_client.post(
+                "/opinions",
+                json={**test_opinion_data, "title": title, "region": "台北市"},
+                headers=auth_headers_user
+            )
+            assert response.status_code == 201
+
+        response = test_client.get("/opinions/search", params={"q": "公園", "page_size": 1})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert data["has_more"] is True
+
+        second = test_client.get(
+            "/opinions/search", params={"q": "公園", "page_size": 1, "cursor": data["next_cursor"]}
+        ).json()
+        titles = {data["items"][0]["title"], second["items"][0]["title"]}
+        assert titles == {"公園綠地不足需要改善", "河濱公園夜間照明不足"}
+
+        filtered = test_client.get("/opinions/search", params={"q": "公園", "region": "高雄市"}).json()
+        assert filtered["items"] == []
+
+        assert test_client.get("/opinions/search", params={"q": "公"}).status_code == 422
+
+    def test_nearby_opinions_ordered_by_distance(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-024: 附近意見依距離排序並分頁
+        測試目標: 驗證建立時寫入 geohash，半徑外的意見不會出現
+        優先級: Medium
+        """
+        # 台北 101 附近兩筆，約 300m 與 800m；另一筆在高雄
+        for lat, lng in ((25.0367, 121.5654), (25.0410, 121.5654), (22.6273, 120.3014)):
+            response = test_client.post(
+                "/opinions",
+                json={**test_opinion_data, "latitude": lat, "longitude": lng},
+                headers=auth_headers_user
+            )
+            assert response.status_code == 201
+
+        params = {"lat": 25.0340, "lng": 121.5645, "radius_m": 2000, "page_size": 1}
+        first = test_client.get("/opinions/nearby", params=params).json()
+        assert first["total"] == 2
+        second = test_client.get(
+            "/opinions/nearby", params={**params, "cursor": first["next_cursor"]}
+        ).json()
+
+        distances = [first["items"][0]["distance_m"], second["items"][0]["distance_m"]]
+        assert distances == sorted(distances)
+        assert distances[1] < 2000
+        assert second["has_more"] is False
+
+    def test_map_clusters_follow_status_changes(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        auth_headers_admin,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-025: 地圖聚合隨建立與審核增量更新
+        測試目標: 驗證聚合數量、篩選與代表意見 id
+        優先級: Medium
+        """
+        ids = []
+        for lat, lng in ((25.0367, 121.5654), (25.0410, 121.5660), (25.0330, 121.5640)):
+            response = test_client.post(
+                "/opinions",
+                json={**test_opinion_data, "latitude": lat, "longitude": lng},
+                headers=auth_headers_user
+            )
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        box = {"min_lat": 24.9, "min_lng": 121.4, "max_lat": 25.2, "max_lng": 121.7}
+        data = test_client.get("/opinions/clusters", params={**box, "zoom": 8}).json()
+        assert data["total"] == 3
+        assert len(data["clusters"]) == 1
+        assert max(ids) in data["clusters"][0]["opinion_ids"]
+
+        response = test_client.post(f"/admin/opinions/{ids[0]}/approve", headers=auth_headers_admin)
+        assert response.status_code == 200
+
+        approved = test_client.get(
+            "/opinions/clusters", params={**box, "zoom": 8, "status": "approved"}
+        ).json()
+        assert approved["total"] == 1
+        assert approved["clusters"][0]["opinion_ids"] == [ids[0]]
+
+    def test_hot_sort_follows_recent_activity(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-026: 熱門排序依近期互動即時更新
+        測試目標: 驗證留言 / 投票後排序改變，且游標分頁沿用熱門分數
+        優先級: Medium
+        """
+        ids = []
+        for _ in range(3):
+            response = test_client.post("/opinions", json=test_opinion_data, headers=auth_headers_user)
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        def hot_ids(**params):
+            response = test_client.get("/opinions", params={"sort_by": "hot", **params})
+            assert response.status_code == 200
+            return response.json()
+
+        # No activity yet: ties fall back to the newest id
+        assert [i["id"] for i in hot_ids()["items"]] == ids[::-1]
+
+        response = test_client.post(
+            f"/opinions/{ids[0]}/comments", json={"content": "熱門留言"}, headers=auth_headers_user
+        )
+        assert response.status_code == 201
+        response = test_client.post(
+            f"/opinions/{ids[1]}/vote", json={"vote_type": "like"}, headers=auth_headers_user
+        )
+        assert response.status_code == 200
+
+        assert [i["id"] for i in hot_ids()["items"]] == [ids[0], ids[1], ids[2]]
+
+        first = hot_ids(page_size=2)
+        assert first["has_more"] is True
+        rest = hot_ids(page_size=2, cursor=first["next_cursor"])
+        assert [i["id"] for i in first["items"] + rest["items"]] == [ids[0], ids[1], ids[2]]
+
+    def test_list_fields_projection(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-027: 列表預設回傳完整意見，fields 可改為精簡卡片或指定欄位
+        測試目標: 驗證預設完整模式、摘要截斷、指定欄位、未知欄位與 OpenAPI 回應定義
+        優先級: Medium
+        """
+        content = "很長的意見內容" * 50
+        response = test_client.post(
+            "/opinions", json={**test_opinion_data, "content": content}, headers=auth_headers_user
+        )
+        assert response.status_code == 201
+        opinion_id = response.json()["id"]
+
+        full = test_client.get("/opinions").json()["items"][0]
+        assert full["id"] == opinion_id
+        assert full["content"] == content
+
+        card = test_client.get("/opinions", params={"fields": "card"}).json()["items"][0]
+        assert card["id"] == opinion_id
+        assert "content" not in card
+        assert card["snippet"] == content[:140] + "…"
+        assert card["title"] == test_opinion_data["title"]
+
+        sparse = test_client.get("/opinions", params={"fields": "title,upvotes"}).json()["items"][0]
+        assert sparse == {"id": opinion_id, "title": test_opinion_data["title"], "upvotes": 0}
+
+        response = test_client.get("/opinions", params={"fields": "title,password_hash"})
+        assert response.status_code == 400
+
+        schema = test_client.get("/openapi.json").json()
+        documented = schema["paths"]["/opinions"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert {ref["$ref"].rsplit("/", 1)[-1] for ref in documented["anyOf"]} == {"OpinionList", "OpinionCardList"}
+
+    def test_batch_get_preserves_order(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        test_opinion_data
+    ):
+        """
+        TC-OPIN-028: 依 id 批次取得意見
+        測試目標: 驗證回傳順序、略過不存在的 id、不增加瀏覽數
+        優先級: Medium
+        """
+        ids = []
+        for _ in range(3):
+            response = test_client.post("/opinions", json=test_opinion_data, headers=auth_headers_user)
+            assert response.status_code == 201
+            ids.append(response.json()["id"])
+
+        requested = [ids[2], 99999, ids[0], ids[1]]
+        response = test_client.get("/opinions/batch", params={"ids": requested})
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data] == [ids[2], ids[0], ids[1]]
+        assert all(item["view_count"] == 0 for item in data)
+
+        again = test_client.get("/opinions/batch", params={"ids": requested}).json()
+        assert [item["view_count"] for item in again] == [0, 0, 0]
+
+        assert test_client.get("/opinions/batch").status_code == 400
+        too_many = {"ids": list(range(1, 102))}
+        assert test_client.get("/opinions/batch", params=too_many).status_code == 400
+
+    def test_conditional_get_returns_304(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        create_test_opinion
+    ):
+        """
+        TC-OPIN-029: 詳情、列表與分類支援 ETag / If-None-Match
+        測試目標: 驗證內容未變時回傳 304，投票後 ETag 改變
+        優先級: Medium
+        """
+        opinion_id = create_test_opinion.id
+        paths = [f"/opinions/{opinion_id}", "/opinions", "/categories"]
+
+        etags = {}
+        for path in paths:
+            response = test_client.get(path)
+            assert response.status_code == 200
+            etags[path] = response.headers["ETag"]
+
+            again = test_client.get(path, headers={"If-None-Match": etags[path]})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["ETag"] == etags[path]
+
+        response = test_client.post(
+            f"/opinions/{opinion_id}/vote", json={"vote_type": "like"}, headers=auth_headers_user
+        )
+        assert response.status_code == 200
+
+        for path in paths[:2]:
+            response = test_client.get(path, headers={"If-None-Match": etags[path]})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etags[path]
+
     def test_get_opinions_with_status_filter(
         self,
         test_client: TestClient,
@@ -452,6 +792,131 @@ class TestOpinionVoting:
         # 驗證結果（根據業務邏輯，可能允許更新投票或返回錯誤）
         assert response2.status_code in [200, 400]
 
+    def test_vote_counters_follow_vote_changes(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        create_test_opinion
+    ):
+        """
+        TC-OPIN-016: 投票計數欄位隨投票與改票正確更新
+        測試目標: 驗證 upvotes / downvotes 在新投票、改票、重複投票時保持正確
+        優先級: High
+        """
+        opinion_id = create_test_opinion.id
+
+        def vote(vote_type):
+            response = test_client.post(
+                f"/opinions/{opinion_id}/vote",
+                json={"vote_type": vote_type},
+                headers=auth_headers_user
+            )
+            assert response.status_code == 200
+            data = test_client.get(f"/opinions/{opinion_id}").json()
+            return data["upvotes"], data["downvotes"]
+
+        assert vote("like") == (1, 0)
+        assert vote("support") == (0, 1)
+        assert vote("support") == (0, 1)
+
+    def test_private_opinion_hidden_from_other_users(
+        self,
+        test_client: TestClient,
+        test_db_connection,
+        auth_headers_user,
+        auth_headers_admin,
+        create_test_admin
+    ):
+        """
+        TC-OPIN-021: 非公開意見僅擁有者可互動與讀取留言
+        測試目標: 驗證寫入路由與留言列表的存在/可見性檢查，且只用一次主鍵查詢
+        優先級: Medium
+        """
+        from utils import query_stats
+
+        cursor = test_db_connection.cursor()
+        cursor.execute(
+            """INSERT INTO opinions (user_id, title, content, status, is_public)
+               VALUES (%s, %s, %s, 'approved', FALSE)""",
+            (create_test_admin.id, "私人意見標題", "只有擁有者可以投票的私人意見內容")
+        )
+        test_db_connection.commit()
+        opinion_id = cursor.lastrowid
+        cursor.close()
+
+        vote = {"vote_type": "like"}
+        response = test_client.post(f"/opinions/{opinion_id}/vote", json=vote, headers=auth_headers_user)
+        assert response.status_code == 404
+
+        query_stats.reset()
+        response = test_client.post(f"/opinions/{opinion_id}/vote", json=vote, headers=auth_headers_admin)
+        assert response.status_code == 200
+        fingerprints = [entry["fingerprint"] for entry in query_stats.snapshot(100)["top"]]
+        assert not any("FROM tags" in fp or "FROM opinion_media" in fp for fp in fingerprints)
+
+        comments_url = f"/opinions/{opinion_id}/comments"
+        assert test_client.get(comments_url).status_code == 404
+        assert test_client.get(comments_url, headers=auth_headers_user).status_code == 404
+        assert test_client.get(comments_url, headers=auth_headers_admin).status_code == 200
+
+    def test_cached_list_page_invalidated_by_vote(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        create_test_opinion
+    ):
+        """
+        TC-OPIN-019: 列表頁快取於投票後失效
+        測試目標: 驗證相同列表請求命中快取，投票後重新計算
+        優先級: Medium
+        """
+        opinion_id = create_test_opinion.id
+
+        def upvotes_in_list():
+            response = test_client.get("/opinions", params={"sort_by": "upvotes"})
+            assert response.status_code == 200
+            item = next(i for i in response.json()["items"] if i["id"] == opinion_id)
+            return response.headers["X-Cache"], item["upvotes"]
+
+        assert upvotes_in_list() == ("MISS", 0)
+        assert upvotes_in_list() == ("HIT", 0)
+
+        response = test_client.post(
+            f"/opinions/{opinion_id}/vote",
+            json={"vote_type": "like"},
+            headers=auth_headers_user
+        )
+        assert response.status_code == 200
+
+        assert upvotes_in_list() == ("MISS", 1)
+
+    def test_cached_detail_invalidated_by_comment(
+        self,
+        test_client: TestClient,
+        auth_headers_user,
+        create_test_opinion
+    ):
+        """
+        TC-OPIN-020: 意見詳情快取於新增留言後失效
+        測試目標: 驗證詳情快取不會回傳過期的留言數與瀏覽數
+        優先級: Medium
+        """
+        opinion_id = create_test_opinion.id
+
+        first = test_client.get(f"/opinions/{opinion_id}").json()
+        second = test_client.get(f"/opinions/{opinion_id}").json()
+        assert second["view_count"] == first["view_count"] + 1
+
+        response = test_client.post(
+            f"/opinions/{opinion_id}/comments",
+            json={"content": "Cache should be dropped after this comment"},
+            headers=auth_headers_user
+        )
+        assert response.status_code == 201
+
+        data = test_client.get(f"/opinions/{opinion_id}").json()
+        assert data["comment_count"] == first["comment_count"] + 1
+
 
 class TestOpinionCollection:
     """意見收藏測試類別"""
@@ -0,0 +1,189 @@
+"""
+行程內快取單元測試
+測試案例對應: TC-CACHE-001 ~ TC-CACHE-008
+用途: 驗證 TTLCache 的過期、LRU 淘汰與失效行為 (不需實際連線)
+"""
+
+import asyncio
+import time
+
+from utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """TTLCache 測試類別"""
+
+    def test_entries_expire_after_ttl(self):
+        """
+        TC-CACHE-001: 超過 TTL 的項目視為未命中
+        """
+        cache = TTLCache("test", ttl=0.05)
+        cache.set("key", 1)
+        assert cache.get("key") == 1
+
+        time.sleep(0.06)
+        assert cache.get("key") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """
+        TC-CACHE-002: 超過容量時淘汰最久未使用的項目
+        """
+        cache = TTLCache("test", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_by_predicate(self):
+        """
+        TC-CACHE-003: 依條件失效指定項目，停用時不快取
+        """
+        cache = TTLCache("test", ttl=60)
+        cache.set(("opinions", 1), "x")
+        cache.set(("opinions", 2), "y")
+        cache.set(("bookmarks", 1), "z")
+
+        assert cache.invalidate(lambda key: key[0] == "opinions") == 2
+        assert cache.get(("bookmarks", 1)) == "z"
+
+        disabled = TTLCache("off", ttl=0)
+        disabled.set("key", 1)
+        assert disabled.get("key") is None
+
+    def test_set_skipped_after_invalidation(self):
+        """
+        TC-CACHE-006: 讀取期間發生失效時不寫入可能過期的值
+        """
+        cache = TTLCache("test", ttl=60)
+        loaded_at = cache.generation
+        cache.delete("key")
+        cache.set("key", "stale", generation=loaded_at)
+        assert cache.get("key") is None
+
+        cache.set("key", "fresh", generation=cache.generation)
+        assert cache.get("key") == "fresh"
+
+
+class TestPageCache:
+    """列表頁快取失效範圍測試"""
+
+    def test_invalidate_pages_only_drops_affected_pages(self):
+        """
+        TC-CACHE-004: 寫入只失效受影響的列表頁
+        """
+        from utils import page_cache
+
+        page_cache.page_cache.clear()
+        approved = page_cache.page_key("approved", None, "created_at", 1, 20, None, "exact")
+        pending = page_cache.page_key("pending", 3, "created_at", 1, 20, None, "exact")
+        by_votes = page_cache.page_key("approved", None, "upvotes", 1, 20, None, "exact")
+        for key, ids in ((approved, [1, 2]), (pending, [5]), (by_votes, [2])):
+            page_cache.store_page(key, "{}", ids, page_cache.generation())
+
+        # 意見 5 的留言數變動: 只影響包含它的頁面
+        assert page_cache.invalidate_pages(5, sorts=["comment_count"]) == 1
+        assert page_cache.get_page(approved) == "{}"
+
+        # 投票: 影響依讚數排序的頁面
+        assert page_cache.invalidate_pages(9, sorts=["upvotes"]) == 1
+
+        # 核准後進入 approved 篩選的頁面
+        assert page_cache.invalidate_pages(9, enters=[("approved", None)]) == 1
+        assert page_cache.get_page(approved) is None
+
+    def test_page_rendered_across_invalidation_is_not_stored(self):
+        """
+        TC-CACHE-005: 渲染期間發生寫入時不儲存舊資料
+        """
+        from utils import page_cache
+
+        page_cache.page_cache.clear()
+        key = page_cache.page_key(None, None, "created_at", 1, 20, None, "exact")
+        rendered_at = page_cache.generation()
+        page_cache.invalidate_pages(1)
+        page_cache.store_page(key, "{}", [1], rendered_at)
+
+        assert page_cache.get_page(key) is None
+
+
+class TestTotals:
+    """列表總數快取測試"""
+
+    def test_count_across_invalidation_is_not_stored(self):
+        """
+        TC-CACHE-007: COUNT 執行期間總數被失效時，不快取舊的總數
+        """
+        from utils import totals
+
+        class CountingCursor:
+            """COUNT 執行中途發生寫入的游標"""
+
+            async def execute(self, operation, params=None):
+                totals.invalidate_totals("opinions")
+
+            async def fetchone(self):
+                return {"total": 3}
+
+        totals.count_cache.clear()
+        key = ("opinions", None, None)
+        total, _ = asyncio.run(totals.fetch_total(CountingCursor(), key, "SELECT 1", []))
+
+        assert total == 3
+        assert totals.count_cache.get((totals.TOTAL_EXACT, key)) is None
+
+    def test_estimate_from_explain_plans(self):
+        """
+        TC-CACHE-008: 估計總數乘上 join 各表的列數，無可用估計的計畫改用精確 COUNT
+        """
+        from utils import totals
+
+        class PlanCursor:
+            """回傳固定 EXPLAIN 計畫與 COUNT 結果的游標"""
+
+            def __init__(self, plan):
+                self.plan = plan
+                self.statements = []
+
+            async def execute(self, operation, params=None):
+                self.statements.append(operation)
+
+            async def fetchall(self):
+                return self.plan
+
+            async def fetchone(self):
+                return {"total": 7}
+
+        def fetch(plan):
+            totals.count_cache.clear()
+            cursor = PlanCursor(plan)
+            result = asyncio.run(totals.fetch_total(
+                cursor, ("bookmarks", 1), "SELECT COUNT(*) AS total FROM t", [], totals.TOTAL_ESTIMATE
+            ))
+            return result, len(cursor.statements)
+
+        # 收藏數: collections 與 opinions 的 join，兩表估計相乘；子查詢不計入
+        join = [
+            {"id": 1, "table": "c", "type": "ref", "rows": 40, "filtered": 100.0, "Extra": "Using index"},
+            {"id": 1, "table": "o", "type": "eq_ref", "rows": 1, "filtered": 50.0, "Extra": "Using where"},
+            {"id": 2, "table": "t", "type": "ALL", "rows": 1000, "filtered": 10.0, "Extra": None},
+        ]
+        assert fetch(join) == ((20, True), 1)
+
+        # 無條件 COUNT、FULLTEXT 搜尋與 NULL 列數: 改以精確 COUNT 回傳
+        optimized_away = [{"id": 1, "table": None, "type": None, "rows": None,
+                           "filtered": None, "Extra": "Select tables optimized away"}]
+        fulltext = [{"id": 1, "table": "o", "type": "fulltext", "rows": 1,
+                     "filtered": 100.0, "Extra": "Using where; Ft_hints: sorted"}]
+        no_rows = [{"id": 1, "table": "h", "type": "ALL", "rows": None, "filtered": 100.0, "Extra": None}]
+        for plan in (optimized_away, fulltext, no_rows, []):
+            assert fetch(plan) == ((7, False), 2)
@@ -0,0 +1,371 @@
+"""
+資料庫連接池單元測試
+測試案例對應: TC-DB-001 ~ TC-DB-013
+用途: 驗證 ElasticConnectionPool 的等待、溢出與統計行為，以及讀取副本路由 (不需實際連線)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import database, db_pool
+from utils.db_pool import ElasticConnectionPool, PoolTimeoutError, RESET_DIRTY
+
+
+class FakeCursor:
+    """模擬 MySQL 游標 (記錄執行過的語句)"""
+
+    lastrowid = None
+    rowcount = 0
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, operation, params=None):
+        self.connection.statements.append(operation)
+
+    def executemany(self, operation, seq_params):
+        self.connection.statements.append(operation)
+
+    def callproc(self, procname, args=()):
+        self.connection.statements.append(f"CALL {procname}")
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """模擬 MySQL 連線"""
+
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+        self.in_transaction = False
+        self.resets = 0
+        self.pings = 0
+        self.statements = []
+
+    def is_connected(self):
+        self.pings += 1
+        return self.alive and not self.closed
+
+    def reset_session(self):
+        self.resets += 1
+        self.in_transaction = False
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    """以 FakeConnection 取代 mysql.connector.connect"""
+    opened = []
+
+    def connect(**kwargs):
+        cnx = FakeConnection()
+        cnx.host = kwargs.get("host")
+        opened.append(cnx)
+        return cnx
+
+    monkeypatch.setattr(db_pool.mysql.connector, "connect", connect)
+    return opened
+
+
+class TestElasticConnectionPool:
+    """ElasticConnectionPool 測試類別"""
+
+    def test_reuses_returned_connection(self, fake_connect):
+        """
+        TC-DB-001: 歸還的連線會被重複使用
+        """
+        pool = ElasticConnectionPool(pool_size=2, max_overflow=0)
+
+        conn = pool.get_connection()
+        conn.close()
+        pool.get_connection().close()
+
+        assert len(fake_connect) == 1
+        stats = pool.stats()
+        assert stats["checkouts"] == 2
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+
+    def test_overflow_connections_are_closed_on_return(self, fake_connect):
+        """
+        TC-DB-002: 溢出連線在歸還後關閉
+        """
+        pool = ElasticConnectionPool(pool_size=1, max_overflow=1)
+
+        first = pool.get_connection()
+        second = pool.get_connection()
+        assert pool.stats()["overflow_opened"] == 1
+
+        second.close()
+        first.close()
+
+        stats = pool.stats()
+        assert stats["open"] == 1
+        assert sum(1 for cnx in fake_connect if cnx.closed) == 1
+
+    def test_timeout_when_exhausted(self, fake_connect):
+        """
+        TC-DB-003: 連線池耗盡時等待逾時並記錄失敗
+        """
+        pool = ElasticConnectionPool(pool_size=1, max_overflow=0, timeout=0.05)
+        held = pool.get_connection()
+
+        with pytest.raises(PoolTimeoutError):
+            pool.get_connection()
+
+        held.close()
+        stats = pool.stats()
+        assert stats["timeouts"] == 1
+        assert stats["checkout_failures"] == 1
+
+    def test_waiter_gets_connection_when_released(self, fake_connect):
+        """
+        TC-DB-004: 等待中的請求在連線歸還後取得連線
+        """
+        pool = ElasticConnectionPool(pool_size=1, max_overflow=0, timeout=2)
+        held = pool.get_connection()
+        waiting = []
+
+        def release_later():
+            time.sleep(0.05)
+            waiting.append(pool.stats()["waiters"])
+            held.close()
+
+        assert pool.stats()["waiters"] == 0  # 直接取得連線的請求不算等待
+        threading.Thread(target=release_later).start()
+        conn = pool.get_connection()
+        conn.close()
+
+        stats = pool.stats()
+        assert waiting == [1]
+        assert stats["waiters"] == 0
+        assert stats["checkouts"] == 2
+        assert stats["wait_ms"]["max"] > 0
+        assert sum(b["count"] for b in stats["wait_ms"]["histogram"]) == 2
+
+    def test_closed_handle_cannot_be_used(self, fake_connect):
+        """
+        TC-DB-005: 歸還後的連線物件不可再使用
+        """
+        pool = ElasticConnectionPool(pool_size=1)
+        conn = pool.get_connection()
+        conn.close()
+        conn.close()  # 重複關閉不應影響連線池
+
+        with pytest.raises(Exception):
+            conn.cursor()
+        assert pool.stats()["in_use"] == 0
+
+    def test_async_waiters_do_not_exhaust_executor(self, fake_connect):
+        """
+        TC-DB-012: 非同步等待連線的請求多於執行緒時，不會佔滿執行緒造成死結
+        """
+        pool = ElasticConnectionPool(pool_size=2, max_overflow=1, timeout=5)
+
+        async def request():
+            conn = await pool.get_connection_async()
+            try:
+                await asyncio.to_thread(time.sleep, 0.005)  # 模擬查詢
+            finally:
+                await asyncio.to_thread(conn.close)
+
+        async def burst():
+            # 執行緒數少於連線數，請求數遠多於兩者
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(2))
+            await asyncio.gather(*(request() for _ in range(50)))
+
+        started = time.monotonic()
+        asyncio.run(burst())
+
+        stats = pool.stats()
+        assert time.monotonic() - started < 3
+        assert stats["checkouts"] == 50
+        assert stats["timeouts"] == 0
+        assert stats["in_use"] == 0
+        assert stats["open"] <= pool.max_size
+
+
+class TestSessionReset:
+    """連線歸還時的 session 重設測試類別"""
+
+    def test_clean_connection_skips_reset(self, fake_connect):
+        """
+        TC-DB-006: dirty 模式下乾淨的連線不重設、不 ping
+        """
+        pool = ElasticConnectionPool(pool_size=1, reset_mode=RESET_DIRTY)
+
+        for _ in range(3):
+            conn = pool.get_connection()
+            conn.cursor().execute("SELECT 1")
+            conn.close()
+
+        assert fake_connect[0].resets == 0
+        assert fake_connect[0].pings == 0
+        assert pool.stats()["session_resets_skipped"] == 3
+
+    def test_dirty_connection_is_reset(self, fake_connect):
+        """
+        TC-DB-007: 執行 SET 或交易未結束的連線在歸還時重設
+        """
+        pool = ElasticConnectionPool(pool_size=1, reset_mode=RESET_DIRTY)
+
+        conn = pool.get_connection()
+        conn.cursor().execute("SET @user_id = 1")
+        conn.close()
+        assert fake_connect[0].resets == 1
+
+        conn = pool.get_connection()
+        fake_connect[0].in_transaction = True
+        conn.close()
+        assert fake_connect[0].resets == 2
+
+    def test_executemany_and_callproc_mark_dirty(self, fake_connect):
+        """
+        TC-DB-013: executemany 的 SET 語句與預存程序呼叫也會讓連線在歸還時重設
+        """
+        pool = ElasticConnectionPool(pool_size=1, reset_mode=RESET_DIRTY)
+
+        conn = pool.get_connection()
+        conn.cursor().executemany("INSERT INTO tags (name) VALUES (%s)", [("a",), ("b",)])
+        conn.close()
+        assert fake_connect[0].resets == 0
+
+        conn = pool.get_connection()
+        conn.cursor().executemany("SET @tag = %s", [("a",)])
+        conn.close()
+        assert fake_connect[0].resets == 1
+
+        conn = pool.get_connection()
+        conn.cursor().callproc("refresh_stats")
+        conn.close()
+        assert fake_connect[0].resets == 2
+
+    def test_ping_idle_discards_dead_connections(self, fake_connect):
+        """
+        TC-DB-008: 閒置過久的連線被 ping，失效者被移除
+        """
+        pool = ElasticConnectionPool(pool_size=2, ping_interval=0)
+        first = pool.get_connection()
+        second = pool.get_connection()
+        first.close()
+        second.close()
+
+        fake_connect[0].alive = False
+        discarded = pool.ping_idle()
+
+        stats = pool.stats()
+        assert discarded == 1
+        assert stats["open"] == 1
+        assert stats["idle"] == 1
+        assert stats["dead_connections"] == 1
+
+
+@pytest.fixture
+def replicas(monkeypatch, fake_connect):
+    """設定兩個讀取副本並重置路由狀態"""
+    monkeypatch.setattr(database.DatabaseConfig, "REPLICA_HOSTS", ["replica-a", "replica-b:3307"])
+    monkeypatch.setattr(database, "_test_connection_pool", None)
+    monkeypatch.setattr(database, "_connection_pool", None)
+    monkeypatch.setattr(database, "_replica_pools", None)
+    monkeypatch.setattr(database, "_replica_down_until", {})
+    monkeypatch.setattr(database, "_recent_writers", {})
+    return fake_connect
+
+
+class TestReadReplicaRouting:
+    """讀取副本路由測試類別"""
+
+    def test_reads_use_replicas_and_skip_unavailable(self, replicas, monkeypatch):
+        """
+        TC-DB-009: 讀取查詢分散到副本，無法連線的副本被略過
+        """
+        connect = db_pool.mysql.connector.connect
+
+        def flaky_connect(**kwargs):
+            if kwargs.get("host") == "replica-b":
+                raise RuntimeError("replica down")
+            return connect(**kwargs)
+
+        monkeypatch.setattr(db_pool.mysql.connector, "connect", flaky_connect)
+
+        async def read():
+            async with database.get_async_db_read_cursor() as cursor:
+                await cursor.execute("SELECT 1")
+
+        for _ in range(3):
+            asyncio.run(read())
+
+        assert {cnx.host for cnx in replicas} == {"replica-a"}
+        assert [r["down"] for r in database.get_pool_stats()["replicas"]] == [False, True]
+
+    def test_reads_after_write_stay_on_primary(self, replicas):
+        """
+        TC-DB-010: 使用者寫入後，其讀取在黏著期間內回到主資料庫
+        """
+        async def write_then_read(user_id):
+            database.bind_request_user(user_id)
+            async with database.get_async_db_cursor() as cursor:
+                await cursor.execute("UPDATE opinions SET title = %s WHERE id = %s", ("t", 1))
+            async with database.get_async_db_read_cursor() as cursor:
+                await cursor.execute("SELECT 1")
+
+        async def read(user_id):
+            database.bind_request_user(user_id)
+            async with database.get_async_db_read_cursor() as cursor:
+                await cursor.execute("SELECT 1")
+
+        asyncio.run(write_then_read(7))
+        assert database.get_pool_stats()["checkouts"] == 2
+
+        # 同一使用者的下一個請求仍讀主資料庫，其他使用者走副本
+        asyncio.run(read(7))
+        assert database.get_pool_stats()["checkouts"] == 3
+        asyncio.run(read(8))
+        assert database.get_pool_stats()["checkouts"] == 3
+        assert any(cnx.host.startswith("replica") for cnx in replicas)
+
+
+class TestUnitOfWork:
+    """Unit of work 測試類別"""
+
+    def test_nested_calls_share_connection_and_savepoint(self, replicas):
+        """
+        TC-DB-011: 巢狀服務呼叫共用同一連線，失敗的巢狀區塊只回滾到保存點
+        """
+        async def notify():
+            async with database.get_async_db_cursor() as cursor:
+                await cursor.execute("INSERT INTO notifications (user_id) VALUES (%s)", (1,))
+                raise RuntimeError("notification failed")
+
+        async def add_comment():
+            async with database.get_async_db_cursor() as cursor:
+                await cursor.execute("INSERT INTO comments (content) VALUES (%s)", ("hi",))
+                with pytest.raises(RuntimeError):
+                    await notify()
+                async with database.get_async_db_read_cursor() as reader:
+                    await reader.execute("SELECT * FROM comments WHERE id = %s", (1,))
+
+        asyncio.run(add_comment())
+
+        assert database.get_pool_stats()["checkouts"] == 1
+        statements = replicas[0].statements
+        assert statements[1] == "SAVEPOINT uow_1"
+        assert statements[3] == "ROLLBACK TO SAVEPOINT uow_1"
+        assert statements[-1].startswith("SELECT * FROM comments")
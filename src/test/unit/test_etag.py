@@ -0,0 +1,44 @@
+"""
+ETag 工具單元測試
+測試案例對應: TC-ETAG-001 ~ TC-ETAG-002
+用途: 驗證 ETag 產生與 If-None-Match 比對 (不需實際連線)
+"""
+
+from utils.etag import (
+    body_etag, conditional_json, etag_matches, render_json, version_etag
+)
+
+
+class TestEtag:
+    """ETag 測試類別"""
+
+    def test_etags_are_stable(self):
+        """
+        TC-ETAG-001: 相同內容產生相同 ETag，內容改變則不同
+        """
+        assert body_etag('{"a":1}') == body_etag(b'{"a":1}')
+        assert body_etag('{"a":1}') != body_etag('{"a":2}')
+        assert body_etag("x").startswith('"')
+
+        assert version_etag(1, 2, ("a",)) == version_etag(1, 2, ("a",))
+        assert version_etag(1, 2, ("a",)) != version_etag(1, 3, ("a",))
+        assert version_etag(1).startswith('W/"')
+
+    def test_if_none_match(self):
+        """
+        TC-ETAG-002: If-None-Match 採弱比較，支援多個值與 *，相符時回傳 304
+        """
+        etag = version_etag(7)
+        assert etag_matches(etag, etag)
+        assert etag_matches(etag[2:], etag)
+        assert etag_matches(f'"other", {etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"other"', etag)
+
+        rendered = render_json({"total": 0})
+        assert rendered.body == b'{"total":0}'
+        assert conditional_json(rendered, None).status_code == 200
+        response = conditional_json(rendered, rendered.etag)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == rendered.etag
@@ -0,0 +1,55 @@
+"""
+匯出格式單元測試
+測試案例對應: TC-EXPORT-001 ~ TC-EXPORT-002
+用途: 驗證 NDJSON / CSV 分塊輸出格式 (不需實際連線)
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from utils.export import csv_header, to_csv, to_ndjson
+
+
+ROWS = [
+    {"id": 1, "title": "路燈, \"不亮\"", "tags": ["安全", "路燈, 照明"],
+     "latitude": Decimal("25.03300000"), "created_at": datetime(2025, 1, 2, 3, 4, 5)},
+    {"id": 2, "title": "第二筆\n換行", "tags": [], "latitude": None,
+     "created_at": datetime(2025, 1, 3)},
+]
+
+
+class TestExportFormats:
+    """匯出格式測試類別"""
+
+    def test_ndjson_one_object_per_line(self):
+        """
+        TC-EXPORT-001: NDJSON 每列一個 JSON 物件，日期與 Decimal 可序列化
+        """
+        lines = to_ndjson(ROWS).splitlines()
+        assert len(lines) == 2
+
+        first = json.loads(lines[0])
+        assert first["title"] == "路燈, \"不亮\""
+        assert first["tags"] == ["安全", "路燈, 照明"]
+        assert first["latitude"] == 25.033
+        assert first["created_at"] == "2025-01-02T03:04:05"
+        assert json.loads(lines[1])["latitude"] is None
+
+    def test_csv_quotes_and_flattens(self):
+        """
+        TC-EXPORT-002: CSV 正確跳脫逗號、引號與換行，清單以 JSON 陣列輸出 (標籤可含逗號)
+        """
+        columns = ("id", "title", "tags", "latitude", "created_at")
+        header = csv_header(columns)
+        assert header == "﻿id,title,tags,latitude,created_at\n"
+
+        body = to_csv(ROWS, columns)
+        assert body == (
+            '1,"路燈, ""不亮""","[""安全"", ""路燈, 照明""]",25.03300000,2025-01-02T03:04:05\n'
+            '2,"第二筆\n換行",[],,2025-01-03T00:00:00\n'
+        )
+        record = next(csv.reader(io.StringIO(body)))
+        assert json.loads(record[2]) == ["安全", "路燈, 照明"]
@@ -0,0 +1,45 @@
+"""
+Geohash 工具單元測試
+測試案例對應: TC-GEO-001 ~ TC-GEO-003
+用途: 驗證 geohash 編碼與查詢範圍的格子覆蓋 (不需實際連線)
+"""
+
+import random
+
+from utils.geo import bounding_box, covering_cells, encode_geohash, precision_for_zoom
+
+
+class TestGeohash:
+    """Geohash 測試類別"""
+
+    def test_encode_matches_reference(self):
+        """
+        TC-GEO-001: 編碼結果與標準 geohash (MySQL ST_GeoHash) 相同
+        """
+        assert encode_geohash(42.605, -5.603, 5) == "ezs42"
+        assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        assert len(encode_geohash(25.0330, 121.5654)) == 9
+
+    def test_covering_cells_contain_every_point_of_the_area(self):
+        """
+        TC-GEO-002: 範圍內任一點的 geohash 皆以某個覆蓋格子為前綴
+        """
+        rng = random.Random(42)
+        for radius in (50, 1000, 20000):
+            min_lat, min_lng, max_lat, max_lng = bounding_box(25.0330, 121.5654, radius)
+            cells = covering_cells(min_lat, min_lng, max_lat, max_lng)
+            assert len(cells) <= 20
+
+            for _ in range(500):
+                point = encode_geohash(rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng))
+                assert any(point.startswith(cell) for cell in cells)
+
+    def test_precision_follows_zoom(self):
+        """
+        TC-GEO-003: 地圖縮放層級越大，聚合格子越細
+        """
+        precisions = [precision_for_zoom(zoom, 8) for zoom in range(0, 23)]
+        assert precisions == sorted(precisions)
+        assert precisions[0] == 1
+        assert precisions[-1] == 8
+        assert precision_for_zoom(10, 8) == 5
@@ -0,0 +1,87 @@
+"""
+背景工作 leader 選舉單元測試
+測試案例對應: TC-LEADER-001
+用途: 驗證只有取得 GET_LOCK 的行程執行共用資料的背景工作 (不需實際連線)
+"""
+
+import pytest
+
+from utils import leader
+
+
+class FakeLockServer:
+    """模擬 MySQL 具名鎖: 同一時間只有一個 session 持有"""
+
+    def __init__(self):
+        self.holder = None
+
+
+class FakeLockCursor:
+    """執行 GET_LOCK 的游標"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._result = None
+
+    def execute(self, operation, params=None):
+        server = self.connection.server
+        if server.holder is None or not server.holder.alive:
+            server.holder = self.connection
+        self._result = (1 if server.holder is self.connection else 0,)
+
+    def fetchone(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeLockConnection:
+    """模擬持有 session 的連線"""
+
+    def __init__(self, server):
+        self.server = server
+        self.alive = True
+
+    def cursor(self):
+        return FakeLockCursor(self)
+
+    def is_connected(self):
+        return self.alive
+
+    def close(self):
+        self.alive = False
+
+
+@pytest.fixture
+def lock_server(monkeypatch):
+    server = FakeLockServer()
+    monkeypatch.setattr(leader.mysql.connector, "connect", lambda **kwargs: FakeLockConnection(server))
+    monkeypatch.setattr(leader, "LEADER_MODE", "lock")
+    monkeypatch.setattr(leader, "_connection", None)
+    return server
+
+
+class TestLeader:
+    """Leader 選舉測試類別"""
+
+    def test_only_lock_holder_runs_jobs(self, lock_server, monkeypatch):
+        """
+        TC-LEADER-001: 持有鎖的行程為 leader，其他行程略過；leader 釋放後可接手
+        """
+        assert leader.is_leader()
+        assert leader.is_leader()  # 保留同一連線與鎖
+        first = leader._connection
+
+        # 另一個 worker (自己的模組狀態) 取不到鎖
+        monkeypatch.setattr(leader, "_connection", None)
+        assert not leader.is_leader()
+
+        # 原 leader 的 session 結束，鎖隨之釋放
+        first.close()
+        assert leader.is_leader()
+
+        monkeypatch.setattr(leader, "LEADER_MODE", "never")
+        assert not leader.is_leader()
+        monkeypatch.setattr(leader, "LEADER_MODE", "always")
+        assert leader.is_leader()
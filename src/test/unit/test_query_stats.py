@@ -0,0 +1,63 @@
+"""
+查詢統計單元測試
+測試案例對應: TC-QS-001 ~ TC-QS-003
+用途: 驗證 SQL 指紋正規化、慢查詢記錄與 N+1 偵測 (不需實際連線)
+"""
+
+import pytest
+
+from utils import query_stats
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """每個測試前後清除統計資料"""
+    query_stats.reset()
+    yield
+    query_stats.reset()
+
+
+class TestQueryStats:
+    """query_stats 測試類別"""
+
+    def test_fingerprint_ignores_parameters(self):
+        """
+        TC-QS-001: 僅參數不同的語句共用同一指紋
+        """
+        first = query_stats.fingerprint("SELECT * FROM opinions WHERE id = 1 AND title = 'a'")
+        second = query_stats.fingerprint("SELECT *   FROM opinions\n WHERE id = %s AND title = %s")
+        assert first == second == "SELECT * FROM opinions WHERE id = ? AND title = ?"
+
+        in_list = query_stats.fingerprint("SELECT * FROM tags WHERE id IN (%s, %s, %s)")
+        assert in_list == "SELECT * FROM tags WHERE id IN (?+)"
+
+    def test_slow_queries_are_logged(self, capsys):
+        """
+        TC-QS-002: 超過門檻的查詢被記錄為慢查詢
+        """
+        query_stats.record("SELECT 1", 5.0, 1, slow_ms=100)
+        query_stats.record("SELECT 2", 150.0, 1, slow_ms=100)
+
+        snapshot = query_stats.snapshot()
+        assert snapshot["fingerprints"] == 1
+        assert snapshot["top"][0]["count"] == 2
+        assert [q["elapsed_ms"] for q in snapshot["slow_queries"]] == [150.0]
+        assert "[SLOW QUERY]" in capsys.readouterr().out
+
+    def test_repeated_fingerprint_in_request_flagged(self):
+        """
+        TC-QS-003: 同一請求重複執行相同語句達門檻時標記為 N+1
+        """
+        token = query_stats.begin_request("GET /opinions")
+        query_stats.record("SELECT * FROM opinions LIMIT 20", 1.0, 20, slow_ms=0)
+        for opinion_id in range(20):
+            query_stats.record(
+                f"SELECT name FROM tags WHERE opinion_id = {opinion_id}", 1.0, 1, slow_ms=0
+            )
+        request = query_stats.end_request(token, threshold=10)
+
+        assert request.count == 21
+        detections = query_stats.snapshot()["n_plus_one"]
+        assert len(detections) == 1
+        assert detections[0]["count"] == 20
+        assert detections[0]["fingerprint"] == "SELECT name FROM tags WHERE opinion_id = ?"
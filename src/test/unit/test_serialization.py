@@ -0,0 +1,71 @@
+"""
+快速序列化單元測試
+測試案例對應: TC-SER-001 ~ TC-SER-002
+用途: 驗證免驗證建構與 orjson 輸出與 Pydantic 一致 (不需實際連線)
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+from models.opinion import NearbyOpinion, OpinionCard, OpinionList, OpinionStatus, OpinionWithUser
+from utils.serialization import FastJSONResponse, dump_json, trusted
+
+
+def _row(opinion_id):
+    """模擬 MySQL 回傳的一列 (BOOLEAN 為 0/1、ENUM 為字串)"""
+    return {
+        "id": opinion_id, "user_id": 3, "title": "路燈不亮請修理", "content": "中正路口的路燈已經壞了一週",
+        "category_id": 2, "category_name": "交通", "region": None,
+        "latitude": Decimal("25.03300000"), "longitude": Decimal("121.56540000"),
+        "is_public": 1, "status": "approved", "view_count": 12, "merged_to_id": None,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5), "updated_at": datetime(2024, 1, 2, 3, 4, 5, 120000),
+        "needs_manual_review": 0, "upvotes": 4, "downvotes": 0, "comment_count": 1,
+        "username": "citizen", "user_full_name": None, "hot_score": 1.5,
+        "tags": ["路燈"],
+        "media": [{
+            "id": 9, "opinion_id": opinion_id, "file_path": "/uploads/a.jpg", "file_size": 1024,
+            "media_type": "image", "created_at": datetime(2024, 1, 2, 3, 4, 6),
+        }],
+    }
+
+
+class TestSerialization:
+    """快速序列化測試類別"""
+
+    def test_trusted_matches_validated(self):
+        """
+        TC-SER-001: trusted() 建出的模型與驗證後的模型相同，並轉換 BOOLEAN/ENUM/float
+        """
+        row = _row(1)
+        opinion = trusted(OpinionWithUser, row)
+
+        assert opinion.is_public is True
+        assert opinion.status is OpinionStatus.APPROVED
+        assert opinion.media[0].id == 9
+        assert not hasattr(opinion, "hot_score")
+        assert opinion == OpinionWithUser(**row)
+
+        nearby = trusted(NearbyOpinion, {**row, "distance_m": Decimal("12.5")})
+        assert nearby.distance_m == 12.5 and type(nearby.distance_m) is float
+
+    def test_dump_json_matches_pydantic(self):
+        """
+        TC-SER-002: dump_json 輸出與 model_dump_json 逐位元相同 (含 exclude_unset 投影)
+        """
+        rows = [_row(i) for i in range(1, 4)]
+        page = OpinionList(
+            total=3, total_estimated=False, has_more=False, page=1, page_size=20,
+            items=[trusted(OpinionWithUser, row) for row in rows], next_cursor=None
+        )
+        expected = OpinionList(
+            total=3, total_estimated=False, has_more=False, page=1, page_size=20,
+            items=[OpinionWithUser(**row) for row in rows], next_cursor=None
+        ).model_dump_json()
+        assert dump_json(page) == expected.encode()
+
+        card = trusted(OpinionCard, {"id": 1, "title": "路燈不亮請修理", "latitude": Decimal("25.03300000")})
+        assert dump_json(card, exclude_unset=True) == card.model_dump_json(exclude_unset=True).encode()
+
+        response = FastJSONResponse([card], headers={"ETag": '"x"'})
+        assert response.body == b'[' + dump_json(card) + b']'
+        assert response.headers["ETag"] == '"x"'
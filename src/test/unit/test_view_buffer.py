@@ -0,0 +1,99 @@
+"""
+瀏覽數緩衝單元測試
+測試案例對應: TC-VIEW-001 ~ TC-VIEW-004
+用途: 驗證瀏覽數累計、批次 UPDATE 語句與寫入期間的快取更新 (不需實際連線)
+"""
+
+from collections import deque
+
+import pytest
+
+from utils import view_buffer
+from utils.cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    view_buffer.clear()
+    yield
+    view_buffer.clear()
+
+
+class TestViewBuffer:
+    """瀏覽數緩衝測試類別"""
+
+    def test_views_accumulate_until_taken(self):
+        """
+        TC-VIEW-001: 瀏覽數在記憶體累計，寫入失敗時放回
+        """
+        assert view_buffer.record_view(1) == 1
+        assert view_buffer.record_view(1) == 2
+        view_buffer.record_view(2)
+
+        taken = view_buffer.take_pending()
+        assert taken == {1: 2, 2: 1}
+        assert view_buffer.take_pending() == {}
+
+        view_buffer.record_view(1)
+        view_buffer.restore(taken)
+        assert view_buffer.pending_views(1) == 3
+        assert view_buffer.take_pending() == {1: 3, 2: 1}
+
+    def test_flush_queries_are_batched(self, monkeypatch):
+        """
+        TC-VIEW-002: 每批一條 UPDATE ... CASE 語句
+        """
+        monkeypatch.setattr(view_buffer, "VIEW_FLUSH_BATCH", 2)
+        queries = view_buffer.build_flush_queries({3: 1, 1: 5, 2: 2})
+
+        assert len(queries) == 2
+        sql, params = queries[0]
+        assert "CASE id WHEN %s THEN %s WHEN %s THEN %s" in sql
+        assert sql.count("%s") == len(params)
+        assert params == [1, 5, 2, 2, 1, 2]
+        assert queries[1][1] == [3, 1, 3]
+
+    def test_flushed_views_stay_visible_until_cache_updated(self):
+        """
+        TC-VIEW-003: 寫入中的瀏覽數持續計入回應，提交後就地更新快取且不影響進行中的載入
+        """
+        detail_cache = TTLCache("test_details")
+        detail_cache.set(1, 10)  # 快取中的 view_count
+        for _ in range(3):
+            view_buffer.record_view(1)
+
+        loaded_at = detail_cache.generation
+        taken = view_buffer.take_pending()
+        # UPDATE 提交前: 顯示的瀏覽數不下降
+        assert detail_cache.get(1) + view_buffer.pending_views(1) == 13
+        assert view_buffer.record_view(1) == 4
+
+        # 提交後: 快取加上寫入的數量，再結束 in flight
+        detail_cache.update(1, lambda view_count: view_count + taken[1])
+        view_buffer.finish_flush(taken)
+        assert detail_cache.get(1) + view_buffer.pending_views(1) == 14
+
+        # 沒有遞增 generation，進行中的載入仍可寫入快取
+        assert detail_cache.generation == loaded_at
+        detail_cache.set(2, 5, generation=loaded_at)
+        assert detail_cache.get(2) == 5
+        assert not detail_cache.update(3, lambda view_count: view_count + 1)
+
+    def test_load_across_flush_is_not_cached(self, monkeypatch):
+        """
+        TC-VIEW-004: 讀取期間有寫入提交的意見不快取，其他意見不受影響
+        """
+        monkeypatch.setattr(view_buffer, "_flushed", deque(maxlen=2))
+        started = view_buffer.flush_sequence()
+        assert not view_buffer.flushed_since(started, 1)
+
+        view_buffer.record_view(1)
+        view_buffer.finish_flush(view_buffer.take_pending())
+        assert view_buffer.flushed_since(started, 1)
+        assert not view_buffer.flushed_since(started, 2)
+
+        # 超出保留的寫入紀錄時一律視為已寫入
+        for _ in range(2):
+            view_buffer.record_view(3)
+            view_buffer.finish_flush(view_buffer.take_pending())
+        assert view_buffer.flushed_since(started, 2)